@@ -0,0 +1,98 @@
+"""Concurrent checkout stress test for stock reservation.
+
+Creates a throwaway product with a little stock, fires many more concurrent
+one-unit orders at POST /api/orders than there is stock, and checks that
+exactly the available stock was sold: no oversell, no negative stock, and one
+reservation per successful order. Cleans up after itself.
+
+Run against the configured database (use PostgreSQL to exercise real
+row-level concurrency):
+    python dental-api/scripts/stress_checkout.py --stock 25 --orders 200 --threads 32
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+try:
+    from src.main import app
+    from src.database import db
+    from src.models.order import Order
+    from src.models.order_item import OrderItem
+    from src.models.product import Product
+    from src.models.stock_reservation import StockReservation
+except ImportError as e:
+    print(f"Error importing modules: {e}")
+    print("Example: python dental-api/scripts/stress_checkout.py")
+    sys.exit(1)
+
+
+def place_one_order(product_id):
+    with app.test_client() as client:
+        response = client.post('/api/orders', json={
+            'cart_items': [{'id': product_id, 'name': 'stress', 'quantity': 1, 'price': 1}],
+            'total_price': 1,
+            'customer_name': 'Stress test',
+            'whatsapp_message': 'stress test'
+        })
+        return response.status_code
+
+
+def run(stock, orders, threads):
+    with app.app_context():
+        product = Product(
+            name='Stress test product', description='Temporary product for scripts/stress_checkout.py',
+            price=1.0, category='consumables', stock_quantity=stock, is_active=True
+        )
+        db.session.add(product)
+        db.session.commit()
+        product_id = product.id
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = Counter(pool.map(place_one_order, [product_id] * orders))
+
+        with app.app_context():
+            remaining = db.session.get(Product, product_id).stock_quantity
+            reserved = db.session.query(db.func.coalesce(db.func.sum(StockReservation.quantity), 0)).filter(
+                StockReservation.product_id == product_id
+            ).scalar()
+
+        print(f"Responses: {dict(statuses)}")
+        print(f"Stock: {stock} -> {remaining}, reserved: {reserved}")
+
+        created = statuses[201]
+        server_errors = sum(count for status, count in statuses.items() if status >= 500)
+        if server_errors:
+            # Failed requests prove nothing about overselling
+            print(f"FAILED: {server_errors} server errors")
+            return False
+        ok = (
+            remaining >= 0 and created == min(stock, orders) and statuses[409] == orders - created
+            and created == reserved and remaining == stock - reserved
+        )
+        print("OK: no oversell" if ok else "FAILED: stock accounting is inconsistent")
+        return ok
+    finally:
+        with app.app_context():
+            order_ids = [row.order_id for row in db.session.query(StockReservation.order_id).filter(
+                StockReservation.product_id == product_id
+            )]
+            db.session.query(StockReservation).filter(StockReservation.product_id == product_id).delete()
+            if order_ids:
+                db.session.query(OrderItem).filter(OrderItem.order_id.in_(order_ids)).delete(synchronize_session=False)
+                db.session.query(Order).filter(Order.id.in_(order_ids)).delete(synchronize_session=False)
+            db.session.query(Product).filter(Product.id == product_id).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent checkout stress test')
+    parser.add_argument('--stock', type=int, default=25)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=32)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.stock, args.orders, args.threads) else 1)
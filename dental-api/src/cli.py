@@ -0,0 +1,130 @@
+import sys
+
+import click
+
+from src import migrations
+from src.database import db
+from src.utils.cart_store import get_cart_store
+from src.utils.idempotency import get_idempotency_store
+from src.utils.jobs import JobQueue, purge_finished_jobs, run_next_job
+from src.utils.category_stats import rebuild_category_stats
+from src.utils.review_stats import rebuild_review_stats
+from src.utils.sales_stats import rebuild_sales_stats
+from src.utils.search import rebuild_search_index
+from src.utils.stock import release_expired_reservations
+
+
+def register_commands(app):
+    """Attach maintenance commands to the ``flask`` CLI."""
+
+    @app.cli.command('search-reindex')
+    def search_reindex():
+        """Rebuild the product full-text search index."""
+        backend = rebuild_search_index()
+        click.echo(f"Search index rebuilt ({backend}).")
+
+    @app.cli.command('rebuild-category-stats')
+    def rebuild_category_stats_command():
+        """Recompute the per-category product counts."""
+        count = rebuild_category_stats()
+        click.echo(f"Category stats rebuilt ({count} categories).")
+
+    @app.cli.command('rebuild-review-stats')
+    def rebuild_review_stats_command():
+        """Recompute product ratings and review counts from the reviews table."""
+        count = rebuild_review_stats()
+        click.echo(f"Review stats rebuilt ({count} products).")
+
+    @app.cli.command('rebuild-sales-stats')
+    def rebuild_sales_stats_command():
+        """Recompute the sales rollups from the orders table."""
+        count = rebuild_sales_stats()
+        click.echo(f"Sales rollups rebuilt ({count} orders).")
+
+    @app.cli.command('purge-carts')
+    def purge_carts():
+        """Delete carts idle for longer than CART_TTL."""
+        count = get_cart_store().purge_expired()
+        click.echo(f"Purged {count} expired carts.")
+
+    @app.cli.command('purge-idempotency-keys')
+    def purge_idempotency_keys():
+        """Delete stored Idempotency-Key responses older than IDEMPOTENCY_TTL."""
+        count = get_idempotency_store().purge_expired()
+        click.echo(f"Purged {count} expired idempotency keys.")
+
+    @app.cli.command('release-expired-stock')
+    def release_expired_stock():
+        """Give back stock held by pending orders past STOCK_RESERVATION_TTL."""
+        count = release_expired_reservations()
+        db.session.commit()
+        click.echo(f"Released {count} expired stock reservations.")
+
+    @app.cli.command('run-jobs')
+    @click.option('--workers', type=int, default=2, help='Worker threads.')
+    @click.option('--once', is_flag=True, help='Run the jobs that are due, then exit.')
+    def run_jobs(workers, once):
+        """Work the background job queue in the foreground."""
+        if once:
+            count = 0
+            while run_next_job(app.config.get('JOB_TIMEOUT', 300)):
+                count += 1
+            click.echo(f"Ran {count} jobs.")
+            return
+        queue = JobQueue(app, workers=workers, poll_interval=app.config.get('JOB_POLL_INTERVAL', 5),
+                         timeout=app.config.get('JOB_TIMEOUT', 300))
+        queue.start()
+        click.echo(f"Working the job queue with {workers} threads (Ctrl+C to stop).")
+        try:
+            queue.join()
+        except KeyboardInterrupt:
+            queue.stop()
+
+    @app.cli.command('purge-jobs')
+    @click.option('--days', type=int, default=7, help='Keep finished jobs this many days.')
+    def purge_jobs(days):
+        """Delete successfully finished jobs older than --days."""
+        count = purge_finished_jobs(days)
+        click.echo(f"Purged {count} finished jobs.")
+
+    @app.cli.command('db-upgrade')
+    @click.option('--to', 'target', type=int, default=None, help='Stop at this revision (default: latest).')
+    def db_upgrade(target):
+        """Apply pending schema migrations."""
+        applied = migrations.upgrade(target)
+        for migration in applied:
+            click.echo(f"Applied {migration.revision:04d}: {migration.description}")
+        if not applied:
+            click.echo("Database is up to date.")
+
+    @app.cli.command('db-downgrade')
+    @click.option('--to', 'target', type=int, default=None,
+                  help='Revert every migration newer than this revision (default: only the latest).')
+    def db_downgrade(target):
+        """Revert schema migrations."""
+        reverted = migrations.downgrade(target)
+        for migration in reverted:
+            click.echo(f"Reverted {migration.revision:04d}: {migration.description}")
+        if not reverted:
+            click.echo("Nothing to revert.")
+
+    @app.cli.command('db-status')
+    def db_status():
+        """List migrations and whether they are applied."""
+        for revision, description, applied in migrations.status():
+            click.echo(f"[{'x' if applied else ' '}] {revision:04d} {description}")
+
+    @app.cli.command('db-explain')
+    def db_explain():
+        """EXPLAIN the hot listing queries and fail if one is not index-backed."""
+        from src.migrations.explain import explain_listing_queries
+
+        failures = 0
+        for label, lines, ok in explain_listing_queries():
+            click.echo(f"{'OK  ' if ok else 'FAIL'} {label}")
+            for line in lines:
+                click.echo(f"       {line}")
+            failures += not ok
+        if failures:
+            click.echo(f"{failures} queries are not served by an index; run 'flask db-upgrade'.")
+            sys.exit(1)
@@ -11,9 +11,29 @@ from src.routes.products import products_bp
 from src.routes.cart import cart_bp
 from src.routes.orders import orders_bp
 from src.routes.auth import auth_bp
+from src.routes.admin.stats_admin import stats_admin_bp
+from src.routes.admin.jobs_admin import jobs_admin_bp
+from src.routes.admin.orders_admin import orders_admin_bp
+from src.routes.admin.products_admin import products_admin_bp
+from src.routes.admin.stock_alerts_sse import stock_alerts_sse_bp
+from src.utils.search import init_search_index
+from src.utils.cache import init_response_cache
+from src.utils.compression import init_compression
+from src.utils.cart_store import init_cart_store
+from src.utils.idempotency import init_idempotency
+from src.utils.jobs import init_jobs
+from src.utils.stock_alerts import init_stock_alerts
+from src.utils.category_stats import init_category_stats
+from src.utils.review_stats import init_review_stats
+from src.utils.sales_stats import init_sales_stats
+from src.cli import register_commands
+from src.utils.json_provider import FastJSONProvider
+from src import migrations
 
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+# jsonify() through orjson when installed (see src/utils/json_provider.py)
+app.json = FastJSONProvider(app)
 
 # File Upload Configuration
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -36,6 +56,49 @@ CORS(app, origins=['http://localhost:5173'], supports_credentials=True)
 # Initialize JWTManager
 jwt = JWTManager(app)
 
+# Catalog response cache (see src/utils/cache.py)
+app.config['RESPONSE_CACHE_MAX_BYTES'] = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+app.config['RESPONSE_CACHE_TTL'] = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+init_response_cache(app)
+
+# gzip/brotli for API responses above this size (see src/utils/compression.py)
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+init_compression(app)
+
+# Server-side carts: 'database' (shared by all workers) or 'memory' (see src/utils/cart_store.py)
+app.config['CART_STORE'] = os.environ.get('CART_STORE', 'database')
+app.config['CART_TTL'] = int(os.environ.get('CART_TTL', 30 * 24 * 3600))
+app.config['CART_MEMORY_MAX_CARTS'] = int(os.environ.get('CART_MEMORY_MAX_CARTS', 10000))
+init_cart_store(app)
+
+# Replayed responses for retried order requests (see src/utils/idempotency.py)
+app.config['IDEMPOTENCY_STORE'] = os.environ.get('IDEMPOTENCY_STORE', 'database')
+app.config['IDEMPOTENCY_TTL'] = int(os.environ.get('IDEMPOTENCY_TTL', 24 * 3600))
+app.config['IDEMPOTENCY_WAIT'] = int(os.environ.get('IDEMPOTENCY_WAIT', 10))
+app.config['IDEMPOTENCY_LOCK_TIMEOUT'] = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+init_idempotency(app)
+
+# Stock held by pending orders is given back after this many seconds (see src/utils/stock.py)
+app.config['STOCK_RESERVATION_TTL'] = int(os.environ.get('STOCK_RESERVATION_TTL', 48 * 3600))
+
+# Background job workers per process (see src/utils/jobs.py); 0 leaves the queue to 'flask run-jobs'
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_POLL_INTERVAL'] = int(os.environ.get('JOB_POLL_INTERVAL', 5))
+app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', 300))
+init_jobs(app)
+# New orders are POSTed here by a background job when set (see src/utils/order_jobs.py)
+app.config['ORDER_WEBHOOK_URL'] = os.environ.get('ORDER_WEBHOOK_URL')
+
+# Low-stock alerts pushed to every admin dashboard stream on stock changes (see src/utils/stock_alerts.py)
+app.config['STOCK_ALERT_THRESHOLD'] = int(os.environ.get('STOCK_ALERT_THRESHOLD', 10))
+app.config['STOCK_ALERT_RESYNC_INTERVAL'] = int(os.environ.get('STOCK_ALERT_RESYNC_INTERVAL', 300))
+app.config['STOCK_ALERT_QUEUE_SIZE'] = int(os.environ.get('STOCK_ALERT_QUEUE_SIZE', 100))
+app.config['STOCK_ALERT_HEARTBEAT'] = int(os.environ.get('STOCK_ALERT_HEARTBEAT', 15))
+init_stock_alerts(app)
+
+# Search-as-you-type index reload interval (see src/utils/suggest.py)
+app.config['SUGGEST_INDEX_TTL'] = int(os.environ.get('SUGGEST_INDEX_TTL', 300))
+
 # Helper function for file uploads
 def allowed_file(filename):
     return '.' in filename and \
@@ -46,6 +109,11 @@ app.register_blueprint(products_bp, url_prefix='/api')
 app.register_blueprint(cart_bp, url_prefix='/api')
 app.register_blueprint(orders_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
+app.register_blueprint(stats_admin_bp, url_prefix='/api/admin')
+app.register_blueprint(jobs_admin_bp, url_prefix='/api/admin')
+app.register_blueprint(orders_admin_bp, url_prefix='/api/admin')
+app.register_blueprint(products_admin_bp, url_prefix='/api/admin/products')
+app.register_blueprint(stock_alerts_sse_bp, url_prefix='/api/admin')
 
 
 # Database configuration
@@ -57,10 +125,20 @@ sqlite_db_path = os.path.join(database_dir, 'app.db')
 
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', f"sqlite:///{sqlite_db_path}")
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Apply schema migrations at start-up for the local SQLite fallback. With
+# DATABASE_URL (Docker), 'flask db-upgrade' runs before gunicorn instead.
+app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE', '0' if 'DATABASE_URL' in os.environ else '1') == '1'
 db.init_app(app)
+register_commands(app)
 
 with app.app_context():
     db.create_all()
+    if app.config['AUTO_MIGRATE']:
+        migrations.upgrade()
+    init_search_index()
+    init_category_stats()
+    init_review_stats()
+    init_sales_stats()
     # Initialize sample data (Now handled by dental-api/src/utils/seed.py manually)
     # from src.models.product import Product
     # if Product.query.count() == 0:
@@ -0,0 +1,120 @@
+"""Versioned schema migrations.
+
+Tables are still created by ``db.create_all()``; migrations carry what
+``create_all`` cannot do to an existing database: adding indexes, backfilling
+data, reshaping columns. Each migration is a module in
+``src/migrations/versions`` named ``vNNNN_<slug>.py`` that defines
+``revision`` (int), ``description``, ``upgrade(connection)`` and
+``downgrade(connection)``. Applied revisions are recorded in
+``schema_migrations``; every migration runs in its own transaction.
+
+Run them with ``flask db-upgrade`` / ``flask db-downgrade`` / ``flask db-status``.
+"""
+import importlib
+import pkgutil
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+
+from src.database import db
+from src.migrations import versions
+
+# Arbitrary key for pg_advisory_xact_lock, so that concurrent deploys (or
+# several workers starting at once) apply each migration exactly once.
+_LOCK_KEY = 72_710_001
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200)),
+    Column('applied_at', DateTime),
+)
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+def load_migrations():
+    """All migration modules, ordered by revision."""
+    modules = [
+        importlib.import_module(f'{versions.__name__}.{name}')
+        for _, name, _ in pkgutil.iter_modules(versions.__path__)
+        if name.startswith('v')
+    ]
+    modules.sort(key=lambda module: module.revision)
+    revisions = [module.revision for module in modules]
+    if len(set(revisions)) != len(revisions):
+        raise MigrationError(f'Duplicate migration revisions: {revisions}')
+    return modules
+
+
+@contextmanager
+def _migration_transaction():
+    """Transaction holding the migration lock (PostgreSQL only)."""
+    with db.engine.begin() as connection:
+        # Locked first, so concurrent runs don't race to create schema_migrations
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+        schema_migrations.create(connection, checkfirst=True)
+        yield connection
+
+
+def applied_revisions(connection=None):
+    if connection is None:
+        with _migration_transaction() as connection:
+            return applied_revisions(connection)
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+
+def upgrade(target=None):
+    """Apply every pending migration up to ``target`` (default: latest).
+
+    Returns the modules that were applied.
+    """
+    applied = []
+    for migration in load_migrations():
+        if target is not None and migration.revision > target:
+            break
+        with _migration_transaction() as connection:
+            if migration.revision in applied_revisions(connection):
+                continue
+            migration.upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=migration.revision,
+                description=migration.description,
+                applied_at=datetime.utcnow()
+            ))
+        applied.append(migration)
+    return applied
+
+
+def downgrade(target=None):
+    """Revert applied migrations newer than ``target`` (default: the latest one only).
+
+    Returns the modules that were reverted.
+    """
+    reverted = []
+    done = applied_revisions()
+    if not done:
+        return reverted
+    if target is None:
+        target = max(done) - 1
+    for migration in reversed(load_migrations()):
+        if migration.revision <= target:
+            break
+        with _migration_transaction() as connection:
+            if migration.revision not in applied_revisions(connection):
+                continue
+            migration.downgrade(connection)
+            connection.execute(schema_migrations.delete().where(schema_migrations.c.version == migration.revision))
+        reverted.append(migration)
+    return reverted
+
+
+def status():
+    """``[(revision, description, applied)]`` for every known migration."""
+    done = applied_revisions()
+    return [(m.revision, m.description, m.revision in done) for m in load_migrations()]
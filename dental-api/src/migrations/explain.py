@@ -0,0 +1,75 @@
+"""Check with EXPLAIN that the hot listing queries are served by indexes.
+
+Used by ``flask db-explain`` after ``flask db-upgrade``. A plan fails when it
+scans a whole table or sorts rows instead of reading them in index order.
+PostgreSQL is asked to avoid sequential scans and sorts whenever it can, so
+small development tables still show whether a usable index exists.
+"""
+import re
+
+from sqlalchemy import text
+
+from src.database import db
+from src.models.order import Order
+from src.models.product import Product, ProductReview
+from src.routes.admin.orders_admin import ORDER_LIST_ORDER
+from src.routes.products import PRODUCT_SORTS
+from src.utils.pagination import keyset_filter, order_by_clauses
+
+_SQLITE_BAD = re.compile(r'^(SCAN \w+$|USE TEMP B-TREE FOR ORDER BY)')
+_POSTGRES_BAD = re.compile(r'(Seq Scan|^\s*(->\s+)?Sort\b)')
+
+
+def listing_queries():
+    """``{label: Query}`` for the queries the indexes are meant to serve."""
+    active = Product.query.filter(Product.is_active == True)
+    queries = {
+        f'products sort={key}': active.order_by(*order_by_clauses(order)).limit(20)
+        for key, order in PRODUCT_SORTS.items()
+    }
+    # A deep keyset page must cost the same as the first one
+    queries['products keyset sort=name'] = active.filter(
+        keyset_filter(PRODUCT_SORTS['name'], ['M', 0])
+    ).order_by(*order_by_clauses(PRODUCT_SORTS['name'])).limit(20)
+    for key in ('name', 'price-asc'):
+        queries[f'products category sort={key}'] = active.filter(
+            Product.category == 'equipments'
+        ).order_by(*order_by_clauses(PRODUCT_SORTS[key])).limit(20)
+    queries['products low stock'] = active.filter(Product.stock_quantity < 10)
+    queries['admin orders'] = Order.query.order_by(*order_by_clauses(ORDER_LIST_ORDER)).limit(10)
+    queries['admin orders status'] = Order.query.filter(
+        Order.status == 'En attente'
+    ).order_by(*order_by_clauses(ORDER_LIST_ORDER)).limit(10)
+    queries['product reviews'] = ProductReview.query.filter(
+        ProductReview.product_id == 1
+    ).order_by(ProductReview.created_at.desc(), ProductReview.id.desc()).limit(11)
+    return queries
+
+
+def explain(connection, query):
+    """Plan lines for ``query`` and whether the plan avoids scans and sorts."""
+    dialect = connection.dialect
+    sql = str(query.statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'sqlite':
+        lines = [row[-1] for row in connection.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+        ok = not any(_SQLITE_BAD.match(line) for line in lines)
+    elif dialect.name == 'postgresql':
+        lines = [row[0] for row in connection.execute(text(f'EXPLAIN {sql}'))]
+        ok = not any(_POSTGRES_BAD.search(line) for line in lines)
+    else:
+        lines = ['EXPLAIN not supported for this database']
+        ok = True
+    return lines, ok
+
+
+def explain_listing_queries():
+    """``[(label, plan_lines, ok)]`` for every listing query."""
+    results = []
+    with db.engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SET LOCAL enable_seqscan = off'))
+            connection.execute(text('SET LOCAL enable_sort = off'))
+        for label, query in listing_queries().items():
+            lines, ok = explain(connection, query)
+            results.append((label, lines, ok))
+    return results
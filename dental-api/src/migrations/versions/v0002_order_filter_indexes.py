@@ -0,0 +1,35 @@
+"""Indexes for the admin order list filters.
+
+Customer search is a case-insensitive prefix match on ``lower(customer_name)``;
+on PostgreSQL the index uses ``varchar_pattern_ops`` so ``LIKE 'abc%'`` can
+use it whatever the database collation. Date-range filters use
+``ix_orders_created_at`` from revision 1.
+"""
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, func
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+revision = 2
+description = 'Indexes for admin order customer and amount filters'
+
+_metadata = MetaData()
+
+orders = Table(
+    'orders', _metadata,
+    Column('id', Integer), Column('customer_name', String), Column('total_amount', Float),
+)
+
+INDEXES = [
+    Index('ix_orders_customer_name_lower', func.lower(orders.c.customer_name).label('customer_name_lower'),
+          postgresql_ops={'customer_name_lower': 'varchar_pattern_ops'}),
+    Index('ix_orders_total_amount', orders.c.total_amount, orders.c.id),
+]
+
+
+def upgrade(connection):
+    for index in INDEXES:
+        connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def downgrade(connection):
+    for index in reversed(INDEXES):
+        connection.execute(DropIndex(index, if_exists=True))
@@ -0,0 +1,70 @@
+"""Backfill ``order_items`` from the ``orders.items`` JSON.
+
+The table itself is created by ``create_all``. Orders are read in ID order in
+batches, and only orders without any ``order_items`` row are filled in, so
+the migration can be re-run safely. Both line shapes found in ``items`` are
+understood: ``{id, quantity, price}`` (checkout) and ``{product_id, qty,
+subtotal}`` (early WhatsApp orders). Lines without a product ID or quantity
+are skipped.
+
+Downgrading leaves the rows in place: the table is still written by the
+application and the JSON column is unchanged.
+"""
+from sqlalchemy import Column, Float, Integer, JSON, MetaData, Table, exists, select
+
+revision = 3
+description = 'Backfill order_items from orders.items'
+
+BATCH_SIZE = 500
+
+_metadata = MetaData()
+
+orders = Table(
+    'orders', _metadata,
+    Column('id', Integer), Column('items', JSON),
+)
+order_items = Table(
+    'order_items', _metadata,
+    Column('id', Integer, primary_key=True), Column('order_id', Integer), Column('product_id', Integer),
+    Column('quantity', Integer), Column('unit_price', Float),
+)
+
+
+def _lines(order_id, items):
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        product_id = item.get('id', item.get('product_id'))
+        quantity = item.get('quantity', item.get('qty'))
+        if not isinstance(product_id, int) or not isinstance(quantity, int) or quantity <= 0:
+            continue
+        unit_price = item.get('price', item.get('price_at_purchase'))
+        if unit_price is None and item.get('subtotal') is not None:
+            unit_price = item['subtotal'] / quantity
+        yield {'order_id': order_id, 'product_id': product_id, 'quantity': quantity, 'unit_price': unit_price or 0.0}
+
+
+def upgrade(connection):
+    missing = ~exists().where(order_items.c.order_id == orders.c.id)
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            select(orders.c.id, orders.c['items'])
+            .where(orders.c.id > last_id, missing)
+            .order_by(orders.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        rows = [line for order_id, items in batch for line in _lines(order_id, items)]
+        if rows:
+            connection.execute(order_items.insert(), rows)
+        last_id = batch[-1].id
+
+
+def downgrade(connection):
+    pass
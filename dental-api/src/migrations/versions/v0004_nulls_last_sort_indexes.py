@@ -0,0 +1,54 @@
+"""Match the descending sort indexes to ``NULLS LAST`` ordering.
+
+Listings now sort nullable columns with NULLs last in either direction (see
+``src/utils/pagination.py``). SQLite reads its indexes backwards for
+``DESC NULLS LAST`` already; PostgreSQL indexes default to ``NULLS LAST``
+ascending, which reads backwards as ``DESC NULLS FIRST``, so the indexes
+behind the newest-first and best-rated sorts are rebuilt with ``NULLS
+FIRST`` there.
+"""
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, MetaData, String, Table, true
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from src.migrations.versions import v0001_performance_indexes as previous
+
+revision = 4
+description = 'NULLS LAST sort indexes on PostgreSQL'
+
+_metadata = MetaData()
+
+products = Table(
+    'products', _metadata,
+    Column('id', Integer), Column('rating', Float), Column('is_active', Boolean), Column('created_at', DateTime),
+)
+orders = Table(
+    'orders', _metadata,
+    Column('id', Integer), Column('status', String), Column('created_at', DateTime),
+)
+
+_active = products.c.is_active == true()
+
+INDEXES = [
+    Index('ix_products_active_rating', products.c.rating.nulls_first(), products.c.id, postgresql_where=_active),
+    Index('ix_products_active_created_at', products.c.created_at.nulls_first(), products.c.id,
+          postgresql_where=_active),
+    Index('ix_orders_created_at', orders.c.created_at.nulls_first(), orders.c.id),
+    Index('ix_orders_status_created_at', orders.c.status, orders.c.created_at.nulls_first(), orders.c.id),
+]
+
+
+def _replace(connection, indexes):
+    if connection.dialect.name != 'postgresql':
+        return
+    for index in indexes:
+        connection.execute(DropIndex(index, if_exists=True))
+        connection.execute(CreateIndex(index))
+
+
+def upgrade(connection):
+    _replace(connection, INDEXES)
+
+
+def downgrade(connection):
+    names = {index.name for index in INDEXES}
+    _replace(connection, [index for index in previous.INDEXES if index.name in names])
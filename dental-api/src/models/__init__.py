@@ -1,12 +1,18 @@
-from flask_sqlalchemy import SQLAlchemy
-
-db = SQLAlchemy()
+# The one SQLAlchemy instance (initialized in src/main.py); every model,
+# whichever module it is imported from, shares its metadata.
+from src.database import db
 
 # Import models here to make them accessible via src.models.ModelName
 # This also helps SQLAlchemy discover the models for db.create_all()
 
 from .user import User
-from .product import Product, ProductReview
+from .product import Product, ProductReview, CategoryStat, ProductRatingStats
 from .article import Article
 from .casestudy import CaseStudy
 from .order import Order
+from .order_item import OrderItem
+from .cart import Cart
+from .idempotency_key import IdempotencyKey
+from .stock_reservation import StockReservation
+from .sales import DailySales, ProductDailySales
+from .job import Job
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from src.models import db # Import db from src.models (centralized instance)
+from src.utils.serializers import ModelSerializer
+
+class Article(db.Model):
+    __tablename__ = 'articles'
+
+    id = Column(Integer, primary_key=True)
+    title = Column(String(255), nullable=False)
+    slug = Column(String(255), unique=True, nullable=False)
+    content = Column(Text, nullable=False)
+    author = Column(String(150), nullable=True)
+    category = Column(String(100), nullable=True)
+    image_url = Column(String(500), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def to_dict(self):
+        return _article_serializer(self)
+
+    def __repr__(self):
+        return f'<Article {self.slug}>'
+
+
+_article_serializer = ModelSerializer(
+    ('id', 'title', 'slug', 'content', 'author', 'category', 'image_url', 'created_at', 'updated_at'),
+    datetimes=('created_at', 'updated_at')
+)
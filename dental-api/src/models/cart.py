@@ -0,0 +1,18 @@
+from datetime import datetime
+from src.database import db
+
+
+class Cart(db.Model):
+    """Server-side shopping cart (see src/utils/cart_store.py).
+
+    ``cart_key`` is ``user:<id>`` for signed-in customers and ``session:<id>``
+    for guests; ``items`` holds ``[{product_id, quantity}, ...]``.
+    """
+    __tablename__ = 'carts'
+
+    cart_key = db.Column(db.String(100), primary_key=True)
+    items = db.Column(db.JSON, nullable=False, default=list)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<Cart {self.cart_key}: {len(self.items or [])} items>'
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime
 from sqlalchemy.sql import func
 from src.models import db # Import db from src.models (centralized instance)
+from src.utils.serializers import ModelSerializer
 
 class CaseStudy(db.Model):
     __tablename__ = 'case_studies'
@@ -18,19 +19,16 @@ class CaseStudy(db.Model):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'slug': self.slug,
-            'summary': self.summary,
-            'challenge': self.challenge,
-            'solution': self.solution,
-            'results': self.results,
-            'image_url': self.image_url,
-            'published_at': self.published_at.isoformat() if self.published_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-        }
+        return _case_study_serializer(self)
 
     def __repr__(self):
         return f'<CaseStudy {self.slug}>'
+
+
+_case_study_serializer = ModelSerializer(
+    (
+        'id', 'title', 'slug', 'summary', 'challenge', 'solution', 'results', 'image_url',
+        'published_at', 'created_at', 'updated_at'
+    ),
+    datetimes=('published_at', 'created_at', 'updated_at')
+)
@@ -0,0 +1,23 @@
+from datetime import datetime
+from src.database import db
+
+
+class IdempotencyKey(db.Model):
+    """A request made with an ``Idempotency-Key`` header and, once it has
+    finished, its response (see src/utils/idempotency.py).
+
+    ``key`` is a hash of the client's key scoped to the endpoint and caller;
+    ``response_status`` stays NULL while the first request is still running.
+    """
+    __tablename__ = 'idempotency_keys'
+
+    key = db.Column(db.String(64), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key[:12]} status={self.response_status}>'
@@ -0,0 +1,50 @@
+from datetime import datetime
+from src.database import db
+from src.utils.serializers import ModelSerializer
+
+
+class Job(db.Model):
+    """A unit of background work (see src/utils/jobs.py).
+
+    ``queued`` jobs run once ``run_at`` has passed; a failed attempt is queued
+    again with a later ``run_at`` until ``max_attempts`` is reached, then the
+    job is ``failed``.
+    """
+    __tablename__ = 'jobs'
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        # Next due job, and queue depth per status
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at', 'id'),
+    )
+
+    def to_dict(self):
+        return _job_serializer(self)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
+
+_job_serializer = ModelSerializer(
+    (
+        'id', 'name', 'payload', 'status', 'attempts', 'max_attempts',
+        'run_at', 'created_at', 'started_at', 'finished_at', 'last_error'
+    ),
+    datetimes=('run_at', 'created_at', 'started_at', 'finished_at')
+)
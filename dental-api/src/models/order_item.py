@@ -0,0 +1,29 @@
+from src.database import db
+from src.utils.serializers import ModelSerializer
+
+
+class OrderItem(db.Model):
+    """One line of an order, written alongside ``Order.items`` so per-product
+    sales can be queried in SQL. ``product_id`` has no foreign key: sales
+    history outlives deleted products."""
+    __tablename__ = 'order_items'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id', ondelete='CASCADE'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    unit_price = db.Column(db.Float, nullable=False)
+
+    __table_args__ = (
+        # Sales of a product, and the orders containing it
+        db.Index('ix_order_items_product_id_order_id', 'product_id', 'order_id'),
+    )
+
+    def to_dict(self):
+        return _order_item_serializer(self)
+
+    def __repr__(self):
+        return f'<OrderItem order={self.order_id} product={self.product_id} x{self.quantity}>'
+
+
+_order_item_serializer = ModelSerializer(('order_id', 'product_id', 'quantity', 'unit_price'))
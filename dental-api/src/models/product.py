@@ -1,5 +1,6 @@
 from datetime import datetime
 from src.database import db
+from src.utils.serializers import ModelSerializer
 
 class Product(db.Model):
     __tablename__ = 'products'
@@ -22,27 +23,45 @@ class Product(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'short_description': self.short_description,
-            'category': self.category,
-            'price': self.price,
-            'original_price': self.original_price,
-            'rating': self.rating,
-            'reviews_count': self.reviews_count,
-            'stock_quantity': self.stock_quantity,
-            'is_active': self.is_active,
-            'badge': self.badge,
-            'image_url': self.image_url,
-            'specifications': self.specifications,
-            'features': self.features,
-            'in_stock': self.stock_quantity > 0,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+    # Fields returned by listing grids (?view=card). The long description and
+    # the specifications/features JSON are left out and never loaded.
+    CARD_FIELDS = (
+        'id', 'name', 'short_description', 'category', 'price', 'original_price',
+        'rating', 'reviews_count', 'stock_quantity', 'badge', 'image_url', 'in_stock'
+    )
+    SERIALIZED_FIELDS = CARD_FIELDS + (
+        'description', 'is_active', 'specifications', 'features', 'created_at', 'updated_at'
+    )
+    # Specification keys exposed as catalog filters/facets (?spec.<name>=),
+    # mapped to the key used inside the specifications JSON.
+    FACET_SPECIFICATIONS = {'material': 'Material', 'origin': 'Origin', 'brand': 'Brand'}
+    # Serialized fields that are computed, mapped to the columns they read.
+    DERIVED_FIELDS = {'in_stock': ('stock_quantity',)}
+    # Display names of the catalog categories (others are title-cased).
+    CATEGORY_LABELS = {
+        'equipments': 'Équipements',
+        'consumables': 'Consommables',
+        'cadcam': 'CAD/CAM',
+        'implantology': 'Implantologie',
+        'orthodontics': 'Orthodontie'
+    }
+
+    @classmethod
+    def category_label(cls, category):
+        return cls.CATEGORY_LABELS.get(category, category.title())
+
+    @classmethod
+    def columns_for(cls, fields):
+        """Column attributes needed to serialize ``fields`` (for ``load_only``)."""
+        names = set()
+        for field in fields:
+            names.update(cls.DERIVED_FIELDS.get(field, (field,)))
+        return [getattr(cls, name) for name in sorted(names)]
+
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return _product_serializer.only(fields)(self)
+        return _product_serializer(self)
 
 class ProductReview(db.Model):
     __tablename__ = 'product_reviews'
@@ -55,16 +74,56 @@ class ProductReview(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_verified = db.Column(db.Boolean, default=False)
     
-    product = db.relationship('Product', backref=db.backref('reviews', lazy=True))
+    # Dynamic: ``product.reviews`` is a query to narrow down (see
+    # src/utils/loaders.py), never an implicit load of every review.
+    product = db.relationship('Product', backref=db.backref('reviews', lazy='dynamic'))
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'product_id': self.product_id,
-            'author_name': self.author_name,
-            'rating': self.rating,
-            'comment': self.comment,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'is_verified': self.is_verified
-        }
+        return _review_serializer(self)
+
+
+class CategoryStat(db.Model):
+    """Active product count per category, maintained incrementally on every
+    product write (see src/utils/category_stats.py)."""
+    __tablename__ = 'category_stats'
+
+    category = db.Column(db.String(100), primary_key=True)
+    active_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CategoryStat {self.category}: {self.active_count}>'
+
+class ProductRatingStats(db.Model):
+    """Running review aggregates per product, updated atomically in SQL when a
+    review is added (see src/utils/review_stats.py)."""
+    __tablename__ = 'product_rating_stats'
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    rating_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+
+    def histogram(self):
+        return {str(stars): getattr(self, f'stars_{stars}') for stars in range(1, 6)}
+
+    def __repr__(self):
+        return f'<ProductRatingStats {self.product_id}: {self.rating_sum}/{self.rating_count}>'
+
 
+_product_serializer = ModelSerializer(
+    (
+        'id', 'name', 'description', 'short_description', 'category', 'price', 'original_price',
+        'rating', 'reviews_count', 'stock_quantity', 'is_active', 'badge', 'image_url',
+        'specifications', 'features', 'in_stock', 'created_at', 'updated_at'
+    ),
+    datetimes=('created_at', 'updated_at'),
+    computed={'in_stock': lambda product: product.stock_quantity > 0}
+)
+_review_serializer = ModelSerializer(
+    ('id', 'product_id', 'author_name', 'rating', 'comment', 'created_at', 'is_verified'),
+    datetimes=('created_at',)
+)
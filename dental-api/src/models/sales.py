@@ -0,0 +1,34 @@
+from src.database import db
+
+
+class DailySales(db.Model):
+    """Orders and revenue per creation day and current status, maintained
+    incrementally on every order write (see src/utils/sales_stats.py)."""
+    __tablename__ = 'sales_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(50), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<DailySales {self.day} {self.status}: {self.order_count} / {self.revenue}>'
+
+
+class ProductDailySales(db.Model):
+    """Units sold and revenue per product and day, excluding cancelled orders
+    (see src/utils/sales_stats.py)."""
+    __tablename__ = 'sales_product_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        # Per-product history
+        db.Index('ix_sales_product_daily_product_day', 'product_id', 'day'),
+    )
+
+    def __repr__(self):
+        return f'<ProductDailySales {self.day} product={self.product_id}: {self.units} / {self.revenue}>'
@@ -0,0 +1,32 @@
+from datetime import datetime
+from src.database import db
+
+
+class StockReservation(db.Model):
+    """Stock taken from a product for an order (see src/utils/stock.py).
+
+    ``held`` reservations expire at ``expires_at`` and give their stock back
+    unless the order is confirmed first (``committed``); cancelled or expired
+    ones are ``released``.
+    """
+    __tablename__ = 'stock_reservations'
+
+    HELD = 'held'
+    COMMITTED = 'committed'
+    RELEASED = 'released'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=HELD)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Expiry sweep: held reservations past their deadline
+        db.Index('ix_stock_reservations_status_expires_at', 'status', 'expires_at'),
+    )
+
+    def __repr__(self):
+        return f'<StockReservation order={self.order_id} product={self.product_id} x{self.quantity} {self.status}>'
@@ -1,4 +1,5 @@
 from src.database import db
+from src.utils.serializers import ModelSerializer
 
 
 class User(db.Model):
@@ -23,10 +24,7 @@ class User(db.Model):
         return checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'role': self.role
+        return _user_serializer(self)
 
-        }
+
+_user_serializer = ModelSerializer(('id', 'username', 'email', 'role'))
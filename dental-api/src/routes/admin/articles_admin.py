@@ -4,6 +4,7 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 from sqlalchemy import desc
 from src.utils.decorators import admin_required
+from src.utils.pagination import InvalidCursor, cursor_requested, keyset_paginate, total_requested
 from src.models import db
 from src.models.article import Article # Assuming Article model exists as defined in previous subtask proposal
 # Ensure main.py's allowed_file can be accessed or redefine/import it if it's in a utils file.
@@ -22,6 +23,28 @@ def get_admin_articles():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
 
+    # Keyset pagination (opt-in with ?cursor=), newest first
+    if cursor_requested(request.args):
+        try:
+            result = keyset_paginate(
+                Article.query, [(Article.created_at, True), (Article.id, True)],
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                key='created_at:desc',
+                with_total=total_requested(request.args)
+            )
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
+
+        response = {
+            "articles": [article.to_dict() for article in result.items],
+            "next_cursor": result.next_cursor,
+            "has_next": result.has_next
+        }
+        if result.total is not None:
+            response["total_articles"] = result.total
+        return jsonify(response), 200
+
     query = Article.query.order_by(desc(Article.created_at))
     paginated_articles = query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -0,0 +1,46 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from sqlalchemy import desc
+from src.database import db
+from src.models.job import Job
+from src.utils.decorators import admin_required
+from src.utils.jobs import queue_stats
+
+jobs_admin_bp = Blueprint('jobs_admin', __name__)
+
+# GET /api/admin/jobs
+@jobs_admin_bp.route('/jobs', methods=['GET'])
+@admin_required
+def get_admin_jobs():
+    """Queue depth and latency (see src/utils/jobs.py), plus the latest jobs, optionally by status"""
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    status_filter = request.args.get('status', None, type=str)
+
+    query = Job.query
+    if status_filter:
+        query = query.filter(Job.status == status_filter)
+    jobs = query.order_by(desc(Job.id)).limit(per_page).all()
+
+    return jsonify({
+        "stats": queue_stats(),
+        "jobs": [job.to_dict() for job in jobs]
+    }), 200
+
+# POST /api/admin/jobs/<int:job_id>/retry
+@jobs_admin_bp.route('/jobs/<int:job_id>/retry', methods=['POST'])
+@admin_required
+def retry_job(job_id):
+    job = Job.query.get_or_404(job_id)
+    if job.status != Job.FAILED:
+        return jsonify({"msg": "Only failed jobs can be retried"}), 409
+
+    try:
+        job.status = Job.QUEUED
+        job.attempts = 0
+        job.run_at = datetime.utcnow()
+        job.finished_at = None
+        db.session.commit()
+        return jsonify(job.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"msg": "Failed to retry job", "error": str(e)}), 500
@@ -1,28 +1,59 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from src.utils.decorators import admin_required
 from src.models import db
 from src.models.order import Order
-from sqlalchemy import desc
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from src.utils.pagination import InvalidCursor, cursor_requested, keyset_paginate, order_by_clauses, total_requested
+from src.utils.compression import compress_stream
+from src.utils.stock import InsufficientStock, OrderAlreadyShipped, sync_order_stock
 import io
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 
 orders_admin_bp = Blueprint('orders_admin', __name__)
 
+# Newest first, for both page-number and keyset pagination
+ORDER_LIST_ORDER = [(Order.created_at, True), (Order.id, True)]
+
 # GET /api/admin/orders
 @orders_admin_bp.route('/orders', methods=['GET'])
 @admin_required
 def get_admin_orders():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
-    status_filter = request.args.get('status', None, type=str)
-
-    query = Order.query
 
-    if status_filter:
-        query = query.filter(Order.status == status_filter)
-
-    query = query.order_by(desc(Order.created_at))
+    try:
+        filters = parse_order_filters(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # Users are joined into the page query instead of loaded one per order by to_dict()
+    query = Order.query.options(joinedload(Order.user)).filter(*filters)
+
+    # Keyset pagination (opt-in with ?cursor=), newest first
+    if cursor_requested(request.args):
+        try:
+            result = keyset_paginate(
+                query, ORDER_LIST_ORDER,
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                key='created_at:desc',
+                with_total=total_requested(request.args)
+            )
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
+
+        response = {
+            "orders": [order.to_dict() for order in result.items],
+            "next_cursor": result.next_cursor,
+            "has_next": result.has_next
+        }
+        if result.total is not None:
+            response["total_orders"] = result.total
+        return jsonify(response), 200
+
+    query = query.order_by(*order_by_clauses(ORDER_LIST_ORDER))
 
     paginated_orders = query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -51,63 +82,152 @@ def update_order_status(order_id):
         return jsonify({"msg": f"Invalid status. Must be one of: {', '.join(valid_statuses)}"}), 400
 
     try:
+        # Cancelling gives the order's stock back; reopening takes it again
+        sync_order_stock(db.session, order.id, new_status, previous_status=order.status)
         order.status = new_status
         order.updated_at = datetime.utcnow() # Manually update timestamp if not auto-updated by DB
         db.session.commit()
         return jsonify(order.to_dict()), 200
+    except InsufficientStock as e:
+        db.session.rollback()
+        return jsonify({"msg": "Not enough stock to reopen this order", "product_id": e.product_id}), 409
+    except OrderAlreadyShipped:
+        db.session.rollback()
+        return jsonify({"msg": "Shipped or delivered orders cannot be cancelled or reopened"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Failed to update order status", "error": str(e)}), 500
 
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    Order.id, Order.customer_name, Order.user_id, Order.status, Order.total_amount,
+    Order.items, Order.whatsapp_message_preview, Order.created_at, Order.updated_at
+)
+
+def parse_order_filters(args):
+    """SQL conditions for the order list and export query parameters
+
+    ``date_from``/``date_to`` (ISO dates or datetimes, ``date_to`` inclusive),
+    ``status`` (comma-separated), ``customer`` (case-insensitive name prefix),
+    ``user_id`` and ``min_amount``/``max_amount``. Each is backed by an index
+    (see migrations 1 and 2).
+    """
+    filters = []
+    date_from = args.get('date_from')
+    if date_from:
+        filters.append(Order.created_at >= _parse_date(date_from, 'date_from'))
+    date_to = args.get('date_to')
+    if date_to:
+        end = _parse_date(date_to, 'date_to')
+        # A bare date includes the whole day
+        filters.append(Order.created_at < end + timedelta(days=1) if len(date_to) == 10 else Order.created_at <= end)
+    statuses = [status for status in args.get('status', '').split(',') if status]
+    if statuses:
+        filters.append(Order.status.in_(statuses))
+    customer = args.get('customer', '').strip().lower()
+    if customer:
+        pattern = customer.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        filters.append(func.lower(Order.customer_name).like(pattern, escape='\\'))
+    if args.get('user_id'):
+        filters.append(Order.user_id == _parse_number(args['user_id'], 'user_id', int))
+    if args.get('min_amount'):
+        filters.append(Order.total_amount >= _parse_number(args['min_amount'], 'min_amount', float))
+    if args.get('max_amount'):
+        filters.append(Order.total_amount <= _parse_number(args['max_amount'], 'max_amount', float))
+    return filters
+
+def _parse_number(value, name, type_):
+    try:
+        return type_(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: expected a number") from None
+
+def _parse_date(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: expected an ISO date such as 2024-01-31") from None
+
+def _format_items(items):
+    if isinstance(items, dict): # Handle if it's a single item dict (though less likely for 'items')
+        items = [items]
+    if not isinstance(items, list) or not items:
+        return "No items listed"
+    return "; ".join(
+        f"{item.get('name', 'N/A')} (Qty: {item.get('quantity', 0)}, Price: {item.get('price', 0)} MAD)"
+        for item in items
+    )
+
+def _csv_chunks(rows):
+    """Yield the CSV one batch of rows at a time"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    # CSV Header
+    writer.writerow([
+        'ID', 'Customer Name', 'User ID', 'Status', 'Total Amount (MAD)',
+        'Items', 'WhatsApp Message Preview', 'Created At', 'Updated At'
+    ])
+    try:
+        for batch in rows.partitions():
+            for order in batch:
+                writer.writerow([
+                    order.id,
+                    order.customer_name,
+                    order.user_id if order.user_id else 'N/A',
+                    order.status,
+                    order.total_amount,
+                    _format_items(order.items),
+                    order.whatsapp_message_preview if order.whatsapp_message_preview else '',
+                    order.created_at.strftime('%Y-%m-%d %H:%M:%S') if order.created_at else '',
+                    order.updated_at.strftime('%Y-%m-%d %H:%M:%S') if order.updated_at else ''
+                ])
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+        if output.tell():
+            yield output.getvalue().encode('utf-8')
+    finally:
+        rows.close()
+
 # GET /api/admin/orders/export_csv
 @orders_admin_bp.route('/orders/export_csv', methods=['GET'])
 @admin_required
 def export_orders_csv():
+    """Stream orders as CSV, newest first
+
+    Takes the same filters as the order list (see ``parse_order_filters``).
+    ``?gzip=1`` downloads a gzipped file instead.
+    """
+    try:
+        filters = parse_order_filters(request.args)
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    query = (
+        db.select(*EXPORT_COLUMNS)
+        .where(*filters)
+        .order_by(*order_by_clauses(ORDER_LIST_ORDER))
+    )
     try:
-        orders = Order.query.order_by(desc(Order.created_at)).all()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # CSV Header
-        headers = [
-            'ID', 'Customer Name', 'User ID', 'Status', 'Total Amount (MAD)',
-            'Items', 'WhatsApp Message Preview', 'Created At', 'Updated At'
-        ]
-        writer.writerow(headers)
-
-        for order in orders:
-            items_list = []
-            if isinstance(order.items, list): # Check if order.items is a list
-                items_list = [
-                    f"{item.get('name', 'N/A')} (Qty: {item.get('quantity', 0)}, Price: {item.get('price', 0)} MAD)"
-                    for item in order.items
-                ]
-            elif isinstance(order.items, dict): # Handle if it's a single item dict (though less likely for 'items')
-                 items_list = [f"{order.items.get('name', 'N/A')} (Qty: {order.items.get('quantity',0)}, Price: {order.items.get('price',0)} MAD)"]
-
-            items_summary = "; ".join(items_list) if items_list else "No items listed"
-
-            row = [
-                order.id,
-                order.customer_name,
-                order.user_id if order.user_id else 'N/A',
-                order.status,
-                order.total_amount,
-                items_summary,
-                order.whatsapp_message_preview if order.whatsapp_message_preview else '',
-                order.created_at.strftime('%Y-%m-%d %H:%M:%S') if order.created_at else '',
-                order.updated_at.strftime('%Y-%m-%d %H:%M:%S') if order.updated_at else ''
-            ]
-            writer.writerow(row)
-
-        output.seek(0)
-
-        return Response(
-            output,
-            mimetype="text/csv",
-            headers={"Content-Disposition": "attachment;filename=orders_export.csv"}
-        )
+        # Server-side cursor (PostgreSQL) fetched in batches: memory stays
+        # flat however many orders match.
+        rows = db.session.execute(query, execution_options={'yield_per': EXPORT_BATCH_SIZE})
     except Exception as e:
         # Log the error e
         return jsonify({"msg": "Failed to export orders", "error": str(e)}), 500
+    chunks = stream_with_context(_csv_chunks(rows))
+
+    filename = 'orders_export.csv'
+    mimetype = 'text/csv'
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks = compress_stream(chunks, 'gzip')
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    return Response(
+        chunks,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment;filename={filename}"}
+    )
@@ -2,8 +2,11 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt # get_jwt might not be needed directly in routes if decorator handles it
 from src.models import db
 from src.models.product import Product
+from src.models.order import Order
+from src.models.order_item import OrderItem
 from src.utils.decorators import admin_required # Import the new decorator
-from sqlalchemy import desc, asc # For sorting
+from sqlalchemy import desc, func # For sorting
+from src.utils.pagination import InvalidCursor, cursor_requested, keyset_paginate, order_by_clauses, total_requested
 
 products_admin_bp = Blueprint('products_admin', __name__)
 
@@ -22,12 +25,35 @@ def get_admin_products():
         sort_by = 'id'
 
     query = Product.query
-
-    # Sorting logic
-    if sort_order.lower() == 'desc':
-        query = query.order_by(desc(getattr(Product, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(Product, sort_by)))
+    # Ties broken by id; NULLs last whichever the direction
+    descending = sort_order.lower() == 'desc'
+    order = [(Product.id, descending)]
+    if sort_by != 'id':
+        order.insert(0, (getattr(Product, sort_by), descending))
+
+    # Keyset pagination (opt-in with ?cursor=)
+    if cursor_requested(request.args):
+        try:
+            result = keyset_paginate(
+                query, order,
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                key=f"{sort_by}:{'desc' if descending else 'asc'}",
+                with_total=total_requested(request.args)
+            )
+        except InvalidCursor as e:
+            return jsonify({"msg": str(e)}), 400
+
+        response = {
+            "products": [product.to_dict() for product in result.items],
+            "next_cursor": result.next_cursor,
+            "has_next": result.has_next
+        }
+        if result.total is not None:
+            response["total_products"] = result.total
+        return jsonify(response), 200
+
+    query = query.order_by(*order_by_clauses(order))
 
     paginated_products = query.paginate(page=page, per_page=per_page, error_out=False)
 
@@ -122,3 +148,47 @@ def delete_product(product_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Failed to deactivate product", "error": str(e)}), 500
+
+# GET /api/admin/products/<int:product_id>/sales
+@products_admin_bp.route('/<int:product_id>/sales', methods=['GET'])
+@admin_required
+def get_product_sales(product_id):
+    """Units sold, revenue and latest orders of a product, from ``order_items``
+
+    Cancelled orders are left out. Both queries use the
+    ``(product_id, order_id)`` index on ``order_items``.
+    """
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    try:
+        sold = db.session.query(OrderItem).join(Order, Order.id == OrderItem.order_id).filter(
+            OrderItem.product_id == product_id,
+            Order.status != 'Annulée'
+        )
+        units, revenue, order_count = sold.with_entities(
+            func.coalesce(func.sum(OrderItem.quantity), 0),
+            func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0.0),
+            func.count(func.distinct(OrderItem.order_id))
+        ).one()
+        recent = sold.with_entities(
+            Order.id, Order.customer_name, Order.status, Order.created_at, OrderItem.quantity, OrderItem.unit_price
+        ).order_by(desc(OrderItem.order_id)).limit(limit).all()
+
+        return jsonify({
+            "product_id": product_id,
+            "units_sold": units,
+            "revenue": round(revenue, 2),
+            "order_count": order_count,
+            "recent_orders": [
+                {
+                    "order_id": order_id,
+                    "customer_name": customer_name,
+                    "status": status,
+                    "created_at": created_at.isoformat() if created_at else None,
+                    "quantity": quantity,
+                    "unit_price": unit_price
+                }
+                for order_id, customer_name, status, created_at, quantity, unit_price in recent
+            ]
+        }), 200
+    except Exception as e:
+        return jsonify({"msg": "Failed to load product sales", "error": str(e)}), 500
@@ -0,0 +1,36 @@
+from datetime import date, timedelta
+from flask import Blueprint, request, jsonify
+from src.utils.decorators import admin_required
+from src.utils.sales_stats import default_range, sales_summary
+
+stats_admin_bp = Blueprint('stats_admin', __name__)
+
+MAX_RANGE_DAYS = 366
+
+# GET /api/admin/stats
+@stats_admin_bp.route('/stats', methods=['GET'])
+@admin_required
+def get_admin_stats():
+    """Dashboard figures served from the sales rollups (see src/utils/sales_stats.py)
+
+    ``date_from``/``date_to`` (ISO dates, inclusive) default to the last 30 days;
+    ``top`` limits the best-selling products list.
+    """
+    date_from, date_to = default_range()
+    try:
+        if request.args.get('date_from'):
+            date_from = date.fromisoformat(request.args['date_from'])
+        if request.args.get('date_to'):
+            date_to = date.fromisoformat(request.args['date_to'])
+    except ValueError:
+        return jsonify({"msg": "Invalid date: expected an ISO date such as 2024-01-31"}), 400
+    if date_from > date_to:
+        return jsonify({"msg": "date_from must not be after date_to"}), 400
+    if date_to - date_from > timedelta(days=MAX_RANGE_DAYS):
+        return jsonify({"msg": f"Date range is limited to {MAX_RANGE_DAYS} days"}), 400
+    top = min(max(request.args.get('top', 10, type=int), 1), 50)
+
+    try:
+        return jsonify(sales_summary(date_from, date_to, top_products=top)), 200
+    except Exception as e:
+        return jsonify({"msg": "Failed to load stats", "error": str(e)}), 500
@@ -3,6 +3,7 @@ from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identi
 # Werkzeug security functions are used in the User model, not directly here
 from src.models import db
 from src.models.user import User
+from src.utils.cart_store import merge_guest_cart
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -30,6 +31,7 @@ def register_user():
 
         db.session.add(new_user)
         db.session.commit()
+        merge_guest_cart(new_user.id)
 
         # Role claim is needed in JWT for @admin_required decorator to work
         access_token = create_access_token(
@@ -70,6 +72,9 @@ def login_user():
     )
     # No refresh token in this specific response structure
 
+    # Keep what the customer put in their cart before signing in
+    merge_guest_cart(user.id)
+
     return jsonify(
         msg="Login successful", # Added success message
         access_token=access_token,
@@ -79,7 +84,7 @@ def login_user():
 
 @auth_bp.get('/me')
 @jwt_required()
-$def get_me():
+def get_me():
     current_user_id = get_jwt_identity()
     user = User.query.get(current_user_id)
 
@@ -1,49 +1,32 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify
 from src.models.product import Product, db
-import uuid
+from src.utils.cart_store import current_cart_key, get_cart_store, get_session_id
+from src.utils.cart_pricing import load_products, price_cart
 
 cart_bp = Blueprint('cart', __name__)
 
-def get_session_id():
-    """Get or create a session ID for cart management"""
-    if 'session_id' not in session:
-        session['session_id'] = str(uuid.uuid4())
-    return session['session_id']
+MAX_BULK_OPERATIONS = 200
+BULK_OPERATIONS = ('add', 'set', 'remove')
+
+def cart_contents(cart_items):
+    """Priced cart payload returned by GET /cart and POST /cart/bulk"""
+    # Price every line from one product query
+    cart = price_cart(cart_items)
+    return {
+        'items': [line.to_dict() for line in cart.lines],
+        'total_items': cart.total_items,
+        'total_price': cart.total_price,
+        'session_id': get_session_id()
+    }
 
 @cart_bp.route('/cart', methods=['GET'])
 def get_cart():
     """Get current cart contents"""
     try:
-        session_id = get_session_id()
-        
-        # For simplicity, we'll store cart in session
-        # In production, you might want to use a database table
-        cart_items = session.get('cart_items', [])
-        
-        # Enrich cart items with current product data
-        enriched_items = []
-        total_price = 0
-        
-        for item in cart_items:
-            product = Product.query.get(item['product_id'])
-            if product and product.is_active:
-                enriched_item = {
-                    'id': item['product_id'],
-                    'name': product.name,
-                    'price': product.price,
-                    'image_url': product.image_url,
-                    'quantity': item['quantity'],
-                    'subtotal': product.price * item['quantity']
-                }
-                enriched_items.append(enriched_item)
-                total_price += enriched_item['subtotal']
-        
-        return jsonify({
-            'items': enriched_items,
-            'total_items': sum(item['quantity'] for item in enriched_items),
-            'total_price': total_price,
-            'session_id': session_id
-        })
+        # Carts are stored server-side (see src/utils/cart_store.py)
+        cart_items = get_cart_store().load(current_cart_key())
+        
+        return jsonify(cart_contents(cart_items))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -69,26 +52,26 @@ def add_to_cart():
         if product.stock_quantity < quantity:
             return jsonify({'error': 'Insufficient stock'}), 400
         
-        session_id = get_session_id()
-        cart_items = session.get('cart_items', [])
-        
-        # Check if item already exists in cart
-        existing_item = next((item for item in cart_items if item['product_id'] == product_id), None)
-        
-        if existing_item:
-            # Update quantity
-            new_quantity = existing_item['quantity'] + quantity
-            if product.stock_quantity < new_quantity:
-                return jsonify({'error': 'Insufficient stock'}), 400
-            existing_item['quantity'] = new_quantity
-        else:
-            # Add new item
-            cart_items.append({
-                'product_id': product_id,
-                'quantity': quantity
-            })
-        
-        session['cart_items'] = cart_items
+        cart_key = current_cart_key()
+        store = get_cart_store()
+        with store.locked(cart_key) as cart_items:
+            # Check if item already exists in cart
+            existing_item = next((item for item in cart_items if item['product_id'] == product_id), None)
+            
+            if existing_item:
+                # Update quantity
+                new_quantity = existing_item['quantity'] + quantity
+                if product.stock_quantity < new_quantity:
+                    return jsonify({'error': 'Insufficient stock'}), 400
+                existing_item['quantity'] = new_quantity
+            else:
+                # Add new item
+                cart_items.append({
+                    'product_id': product_id,
+                    'quantity': quantity
+                })
+            
+            store.save(cart_key, cart_items)
         
         return jsonify({'message': 'Item added to cart successfully'}), 200
         
@@ -117,20 +100,21 @@ def update_cart_item():
         if quantity > 0 and product.stock_quantity < quantity:
             return jsonify({'error': 'Insufficient stock'}), 400
         
-        cart_items = session.get('cart_items', [])
-        
-        if quantity == 0:
-            # Remove item from cart
-            cart_items = [item for item in cart_items if item['product_id'] != product_id]
-        else:
-            # Update quantity
-            existing_item = next((item for item in cart_items if item['product_id'] == product_id), None)
-            if existing_item:
-                existing_item['quantity'] = quantity
+        cart_key = current_cart_key()
+        store = get_cart_store()
+        with store.locked(cart_key) as cart_items:
+            if quantity == 0:
+                # Remove item from cart
+                cart_items = [item for item in cart_items if item['product_id'] != product_id]
             else:
-                return jsonify({'error': 'Item not found in cart'}), 404
-        
-        session['cart_items'] = cart_items
+                # Update quantity
+                existing_item = next((item for item in cart_items if item['product_id'] == product_id), None)
+                if existing_item:
+                    existing_item['quantity'] = quantity
+                else:
+                    return jsonify({'error': 'Item not found in cart'}), 404
+            
+            store.save(cart_key, cart_items)
         
         return jsonify({'message': 'Cart updated successfully'}), 200
         
@@ -141,9 +125,11 @@ def update_cart_item():
 def remove_from_cart(product_id):
     """Remove item from cart"""
     try:
-        cart_items = session.get('cart_items', [])
-        cart_items = [item for item in cart_items if item['product_id'] != product_id]
-        session['cart_items'] = cart_items
+        cart_key = current_cart_key()
+        store = get_cart_store()
+        with store.locked(cart_key) as cart_items:
+            cart_items = [item for item in cart_items if item['product_id'] != product_id]
+            store.save(cart_key, cart_items)
         
         return jsonify({'message': 'Item removed from cart successfully'}), 200
         
@@ -154,9 +140,90 @@ def remove_from_cart(product_id):
 def clear_cart():
     """Clear all items from cart"""
     try:
-        session['cart_items'] = []
+        get_cart_store().delete(current_cart_key())
         return jsonify({'message': 'Cart cleared successfully'}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def parse_bulk_operations(operations):
+    """Validate the shape of a bulk request; returns ``(operations, errors)``"""
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('operations must be a non-empty list')
+    if len(operations) > MAX_BULK_OPERATIONS:
+        raise ValueError(f'At most {MAX_BULK_OPERATIONS} operations per request')
+    
+    parsed, errors = [], []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in BULK_OPERATIONS:
+            errors.append({'index': index, 'error': f"op must be one of: {', '.join(BULK_OPERATIONS)}"})
+            continue
+        product_id = operation.get('product_id')
+        quantity = operation.get('quantity', 1 if operation['op'] == 'add' else None)
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            errors.append({'index': index, 'error': 'product_id must be an integer'})
+            continue
+        if operation['op'] != 'remove':
+            minimum = 1 if operation['op'] == 'add' else 0
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < minimum:
+                errors.append({'index': index, 'error': f'quantity must be an integer >= {minimum}'})
+                continue
+        parsed.append((index, operation['op'], product_id, quantity))
+    return parsed, errors
+
+@cart_bp.route('/cart/bulk', methods=['POST'])
+def bulk_update_cart():
+    """Apply a list of add/set/remove operations to the cart, all or nothing
+    
+    Body: {"operations": [{"op": "add"|"set"|"remove", "product_id": 1, "quantity": 2}, ...]}
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Body must be a JSON object: {"operations": [...]}'}), 400
+        try:
+            operations, errors = parse_bulk_operations(data.get('operations'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if errors:
+            return jsonify({'error': 'Invalid operations', 'details': errors}), 400
+        
+        cart_key = current_cart_key()
+        store = get_cart_store()
+        with store.locked(cart_key) as cart_items:
+            quantities = {item['product_id']: item['quantity'] for item in cart_items}
+            
+            # Replay the operations on a copy; the stored cart changes only if all succeed
+            touched = {}
+            for index, op, product_id, quantity in operations:
+                if op == 'add':
+                    quantities[product_id] = quantities.get(product_id, 0) + quantity
+                elif op == 'set' and quantity > 0:
+                    quantities[product_id] = quantity
+                else:
+                    quantities.pop(product_id, None)
+                touched[product_id] = index
+            
+            # One query validates every product the request touched
+            products = load_products(list(touched))
+            for product_id, index in touched.items():
+                product = products.get(product_id)
+                quantity = quantities.get(product_id, 0)
+                if product is None:
+                    if quantity:
+                        errors.append({'index': index, 'product_id': product_id, 'error': 'Product not found'})
+                elif quantity and not product.is_active:
+                    errors.append({'index': index, 'product_id': product_id, 'error': 'Product is not available'})
+                elif quantity > product.stock_quantity:
+                    errors.append({'index': index, 'product_id': product_id, 'error': 'Insufficient stock'})
+            if errors:
+                return jsonify({'error': 'Cart not updated', 'details': sorted(errors, key=lambda error: error['index'])}), 400
+            
+            cart_items = [{'product_id': product_id, 'quantity': quantity} for product_id, quantity in quantities.items()]
+            store.save(cart_key, cart_items)
+        
+        return jsonify(cart_contents(cart_items)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
@@ -1,48 +1,59 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models import db
 from src.models.order import Order
+from src.models.order_item import OrderItem
 from src.models.user import User # Optional, if fetching user details for the order
-from datetime import datetime
+from src.utils.cart_store import current_cart_key, current_user_id, get_cart_store
+from src.utils.cart_pricing import price_cart
+from src.utils.idempotency import idempotent
+from src.utils.order_jobs import order_placed
+from src.utils.stock import InsufficientStock, reserve_stock
 
 orders_bp = Blueprint('orders', __name__)
 
-# Simple in-memory order storage for demo purposes
-# In production, you would use a proper database table
-orders_storage = {}
+def place_order(order, cart):
+    """Save ``order`` with its ``order_items`` and reserve stock for every line of ``cart`` in one transaction
+
+    Raises ``InsufficientStock`` (after rolling back) if any line cannot be served.
+    """
+    db.session.add(order)
+    db.session.flush()
+    # Normalized copy of the lines, for per-product sales queries
+    db.session.add_all(
+        OrderItem(order_id=order.id, product_id=line.product.id, quantity=line.quantity, unit_price=line.product.price)
+        for line in cart.lines
+    )
+    try:
+        reserve_stock(db.session, order.id, {line.product.id: line.quantity for line in cart.lines})
+    except InsufficientStock:
+        db.session.rollback()
+        raise
+    # Notifications and other follow-up work run in the background
+    order_placed(order.id)
+    db.session.commit()
 
 @orders_bp.route('/checkout/whatsapp', methods=['POST'])
+@idempotent
 def checkout_whatsapp():
     try:
         data = request.get_json()
         if not data or 'customer' not in data:
             return jsonify({'error': 'customer info required'}), 400
 
-        cart_items = session.get('cart_items', [])
+        cart_key = current_cart_key()
+        cart_items = get_cart_store().load(cart_key)
         if not cart_items:
             return jsonify({'error': 'Cart is empty'}), 400
 
-        order_items = []
-        total = 0
-        for item in cart_items:
-            product = Product.query.get(item['product_id'])
-            if not product:
-                return jsonify({'error': 'Product not found'}), 404
-            subtotal = product.price * item['quantity']
-            order_items.append({'product_id': product.id, 'name': product.name, 'qty': item['quantity'], 'subtotal': subtotal})
-            total += subtotal
-
-        order_id = str(uuid.uuid4())
-        order = {
-            'id': order_id,
-            'items': order_items,
-            'total_amount': total,
-            'status': 'pending',
-            'customer': data['customer'],
-            'created_at': datetime.utcnow().isoformat()
-        }
-        orders_storage[order_id] = order
-        session['cart_items'] = []
+        cart = price_cart(cart_items)
+        if cart.unavailable:
+            return jsonify({'error': 'Product not found'}), 404
+
+        order_items = [
+            {'product_id': line.product.id, 'name': line.product.name, 'qty': line.quantity, 'subtotal': line.subtotal}
+            for line in cart.lines
+        ]
+        total = cart.total_price
 
         # Build WhatsApp message
         message_lines = [f"{i['name']} x{i['qty']} = {i['subtotal']} MAD" for i in order_items]
@@ -50,12 +61,33 @@ def checkout_whatsapp():
         if 'name' in data['customer']:
             message_lines.append(f"Client: {data['customer']['name']}")
         msg = '\n'.join(message_lines)
-        return jsonify({'order_id': order_id, 'message': msg}), 201
+
+        order = Order(
+            user_id=current_user_id(),
+            customer_name=data['customer'].get('name') or 'Client WhatsApp',
+            # Same item shape as POST /orders
+            items=[
+                {'id': line.product.id, 'name': line.product.name, 'quantity': line.quantity, 'price': line.product.price}
+                for line in cart.lines
+            ],
+            total_amount=float(total),
+            status='En attente',
+            whatsapp_message_preview=msg
+        )
+        try:
+            place_order(order, cart)
+        except InsufficientStock as e:
+            return jsonify({'error': str(e), 'product_id': e.product_id}), 409
+        get_cart_store().delete(cart_key)
+
+        return jsonify({'order_id': order.id, 'message': msg}), 201
 
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @orders_bp.route('/orders', methods=['POST'])
+@idempotent
 def create_order():
     """Create a new order from cart contents"""
 
@@ -83,9 +115,18 @@ def create_order():
         if not isinstance(cart_items, list) or not cart_items:
             return jsonify({'error': 'cart_items must be a non-empty list'}), 400
         
+        requested_items = []
         for item in cart_items:
-            if not all(k in item for k in ['id', 'name', 'quantity', 'price']):
+            if not isinstance(item, dict) or not all(k in item for k in ['id', 'name', 'quantity', 'price']):
                  return jsonify({'error': 'Each cart item must include id, name, quantity, and price'}), 400
+            if not isinstance(item['quantity'], int) or isinstance(item['quantity'], bool) or item['quantity'] <= 0:
+                 return jsonify({'error': 'Each cart item quantity must be a positive integer'}), 400
+            # Clients send IDs as numbers or numeric strings; products are keyed by int
+            try:
+                product_id = int(item['id'])
+            except (TypeError, ValueError):
+                 return jsonify({'error': 'Each cart item id must be a product ID'}), 400
+            requested_items.append({'product_id': product_id, 'quantity': item['quantity']})
 
         if not isinstance(total_price, (int, float)) or total_price <= 0:
             return jsonify({'error': 'total_price must be a positive number'}), 400
@@ -94,7 +135,8 @@ def create_order():
             return jsonify({'error': 'customer_name must be a non-empty string'}), 400
 
         user_id = None
-        current_user_identity = get_jwt_identity()
+        # Optional auth: guests order without a token
+        current_user_identity = current_user_id()
         if current_user_identity:
             user = User.query.filter_by(id=current_user_identity).first()
             if user:
@@ -105,18 +147,29 @@ def create_order():
                 # This case should ideally not happen if JWT is valid and refers to an existing user
                 return jsonify({'error': 'User from token not found'}), 404
 
+        # Reprice from the catalog; client-side names, prices and totals are not trusted
+        cart = price_cart(requested_items)
+        if cart.unavailable:
+            return jsonify({'error': 'Some products are no longer available', 'product_ids': cart.unavailable}), 400
+        order_items = [
+            {'id': line.product.id, 'name': line.product.name, 'quantity': line.quantity, 'price': line.product.price}
+            for line in cart.lines
+        ]
 
         new_order = Order(
             user_id=user_id,
             customer_name=customer_name,
-            items=cart_items, # Stored as JSON
-            total_amount=float(total_price),
+            items=order_items, # Stored as JSON
+            total_amount=float(cart.total_price),
             status='En attente', # Default status
             whatsapp_message_preview=whatsapp_message
         )
 
-        db.session.add(new_order)
-        db.session.commit()
+        # Stock is taken atomically; a sold-out line fails the whole order
+        try:
+            place_order(new_order, cart)
+        except InsufficientStock as e:
+            return jsonify({'error': str(e), 'product_id': e.product_id}), 409
 
         return jsonify({
             'message': 'Order created successfully via WhatsApp checkout',
@@ -1,47 +1,139 @@
-from flask import Blueprint, request, jsonify
-from src.models.product import Product, ProductReview, db
-from sqlalchemy import or_
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy.orm import load_only
+from src.models.product import Product, ProductReview, CategoryStat, db
+from src.utils.search import apply_search
+from src.utils.cache import cached_response
+from src.utils.review_stats import record_review
+from src.utils.loaders import load_product_detail
+from src.utils.suggest import DEFAULT_LIMIT, MAX_LIMIT, suggest_index
+from src.utils.facets import TRUE_VALUES, catalog_filters, product_facets
+from src.utils.pagination import (
+    InvalidCursor, cursor_requested, keyset_paginate, order_by_clauses, total_requested
+)
 
 products_bp = Blueprint('products', __name__)
 
+MAX_BATCH_IDS = 100
+MAX_REVIEWS_PER_PAGE = 50
+
+# Sort keys accepted by get_products. Each ends with the primary key so the
+# ordering is total, which keyset (cursor) pagination relies on.
+PRODUCT_SORTS = {
+    'name': [(Product.name, False), (Product.id, False)],
+    'price-asc': [(Product.price, False), (Product.id, False)],
+    'price-desc': [(Product.price, True), (Product.id, True)],
+    'rating': [(Product.rating, True), (Product.id, True)],
+    'created_at': [(Product.created_at, True), (Product.id, True)],
+}
+
+def requested_fields(args):
+    """Projection requested with ``?view=card`` or ``?fields=a,b``.
+
+    Returns ``None`` for the full product shape. Raises ``ValueError`` on
+    unknown field names.
+    """
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in Product.SERIALIZED_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return ['id'] + [field for field in dict.fromkeys(fields) if field != 'id']
+    if args.get('view') == 'card':
+        return list(Product.CARD_FIELDS)
+    return None
+
+def parse_product_ids(raw_ids):
+    """Validate a list of product IDs, de-duplicated in request order."""
+    if not isinstance(raw_ids, list) or not raw_ids:
+        raise ValueError('ids must be a non-empty list of product IDs')
+    if len(raw_ids) > MAX_BATCH_IDS:
+        raise ValueError(f'At most {MAX_BATCH_IDS} ids can be requested at once')
+    try:
+        ids = [int(product_id) for product_id in raw_ids]
+    except (TypeError, ValueError):
+        raise ValueError('ids must be integers')
+    return list(dict.fromkeys(ids))
+
+def batch_products_response(ids, fields):
+    """Products for ``ids`` fetched with one ``IN (...)`` query, in request order."""
+    query = Product.query.filter(Product.id.in_(ids))
+    if fields is not None:
+        query = query.options(load_only(*Product.columns_for(fields)))
+    found = {product.id: product for product in query}
+    return jsonify({
+        'products': [found[product_id].to_dict(fields) for product_id in ids if product_id in found],
+        'missing': [product_id for product_id in ids if product_id not in found]
+    })
+
 @products_bp.route('/products', methods=['GET'])
+@cached_response
 def get_products():
     """Get all products with optional filtering and pagination"""
     try:
         # Get query parameters
-        category = request.args.get('category', 'all')
         search = request.args.get('search', '')
-        sort_by = request.args.get('sort', 'name')
+        # Searches are ranked by relevance unless an explicit sort is requested
+        sort_by = request.args.get('sort', 'relevance' if search else 'name')
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         
+        try:
+            fields = requested_fields(request.args)
+            # Batch lookup: ?ids=1,2,3 returns exactly those products
+            if 'ids' in request.args:
+                ids = parse_product_ids(request.args['ids'].split(','))
+                return batch_products_response(ids, fields)
+            # Category, price, stock, badge and specification filters
+            filters = catalog_filters(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Build query
         query = Product.query.filter(Product.is_active == True)
         
-        # Apply category filter
-        if category != 'all':
-            query = query.filter(Product.category == category)
-        
-        # Apply search filter
+        # Apply search filter (full-text index, see src/utils/search.py)
+        relevance = None
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Product.name.ilike(search_term),
-                    Product.description.ilike(search_term),
-                    Product.short_description.ilike(search_term)
-                )
-            )
+            query, relevance = apply_search(query, search)
+        
+        # Facets are counted before the filters narrow the query (?facets=1)
+        facets = product_facets(query, filters) if request.args.get('facets', '').lower() in TRUE_VALUES else None
+        
+        query = query.filter(*filters.values())
+        if fields is not None:
+            # Only hydrate the projected columns; the heavy ones stay deferred
+            query = query.options(load_only(*Product.columns_for(fields)))
         
         # Apply sorting
-        if sort_by == 'price-asc':
-            query = query.order_by(Product.price.asc())
-        elif sort_by == 'price-desc':
-            query = query.order_by(Product.price.desc())
-        elif sort_by == 'rating':
-            query = query.order_by(Product.rating.desc())
-        else:  # default to name
-            query = query.order_by(Product.name.asc())
+        if sort_by == 'relevance' and relevance is not None:
+            order = [(relevance, True), (Product.name, False), (Product.id, False)]
+        else:
+            if sort_by not in PRODUCT_SORTS:
+                sort_by = 'name'
+            order = PRODUCT_SORTS[sort_by]
+        
+        # Keyset pagination (opt-in with ?cursor=)
+        if cursor_requested(request.args):
+            result = keyset_paginate(
+                query, order,
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                key=sort_by,
+                with_total=total_requested(request.args)
+            )
+            response = {
+                'products': [product.to_dict(fields) for product in result.items],
+                'per_page': per_page,
+                'next_cursor': result.next_cursor,
+                'has_next': result.has_next
+            }
+            if result.total is not None:
+                response['total'] = result.total
+            if facets is not None:
+                response['facets'] = facets
+            return jsonify(response)
+        
+        query = query.order_by(*order_by_clauses(order))
         
         # Paginate
         products = query.paginate(
@@ -50,32 +142,79 @@ def get_products():
             error_out=False
         )
         
-        return jsonify({
-            'products': [product.to_dict() for product in products.items],
+        response = {
+            'products': [product.to_dict(fields) for product in products.items],
             'total': products.total,
             'pages': products.pages,
             'current_page': page,
             'per_page': per_page,
             'has_next': products.has_next,
             'has_prev': products.has_prev
+        }
+        if facets is not None:
+            response['facets'] = facets
+        return jsonify(response)
+        
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@products_bp.route('/products/batch', methods=['POST'])
+def get_products_batch():
+    """Get many products by ID in one request (body: {"ids": [...]})"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Body must be a JSON object: {"ids": [...]}'}), 400
+        try:
+            fields = requested_fields(request.args)
+            ids = parse_product_ids(data.get('ids'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return batch_products_response(ids, fields)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@products_bp.route('/products/suggest', methods=['GET'])
+def suggest_products():
+    """Search-as-you-type suggestions for product names and categories"""
+    try:
+        query = request.args.get('q', '')
+        limit = min(max(request.args.get('limit', DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+        
+        # Served from the in-process index (see src/utils/suggest.py)
+        suggest_index.ensure_loaded(current_app.config.get('SUGGEST_INDEX_TTL', 300))
+        products, categories = suggest_index.suggest(query, limit)
+        
+        return jsonify({
+            'query': query,
+            'products': products,
+            'categories': categories
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @products_bp.route('/products/<int:product_id>', methods=['GET'])
+@cached_response
 def get_product(product_id):
     """Get a single product by ID"""
     try:
-        product = Product.query.get_or_404(product_id)
+        reviews_page = max(request.args.get('reviews_page', 1, type=int), 1)
+        reviews_per_page = min(max(request.args.get('reviews_per_page', 10, type=int), 1), MAX_REVIEWS_PER_PAGE)
         
-        # Get product reviews
-        reviews = ProductReview.query.filter_by(product_id=product_id).order_by(
-            ProductReview.created_at.desc()
-        ).all()
+        # Product, rating histogram and one page of reviews in a single query
+        detail = load_product_detail(product_id, reviews_page, reviews_per_page)
+        if detail is None:
+            return jsonify({'error': 'Product not found'}), 404
         
-        product_data = product.to_dict()
-        product_data['reviews'] = [review.to_dict() for review in reviews]
+        product_data = detail.to_dict()
+        product_data['reviews_page'] = reviews_page
+        product_data['reviews_per_page'] = reviews_per_page
+        product_data['reviews_has_next'] = detail.has_next_reviews
         
         return jsonify(product_data)
         
@@ -83,31 +222,25 @@ def get_product(product_id):
         return jsonify({'error': str(e)}), 500
 
 @products_bp.route('/products/categories', methods=['GET'])
+@cached_response
 def get_categories():
     """Get all product categories with counts"""
     try:
+        # Counts are maintained on write (see src/utils/category_stats.py)
         categories = db.session.query(
-            Product.category,
-            db.func.count(Product.id).label('count')
-        ).filter(Product.is_active == True).group_by(Product.category).all()
+            CategoryStat.category,
+            CategoryStat.active_count
+        ).filter(CategoryStat.active_count > 0).order_by(CategoryStat.category).all()
         
         # Calculate total count
-        total_count = Product.query.filter(Product.is_active == True).count()
+        total_count = sum(count for _, count in categories)
         
         result = [{'id': 'all', 'name': 'Tous les produits', 'count': total_count}]
         
-        category_names = {
-            'equipments': 'Équipements',
-            'consumables': 'Consommables',
-            'cadcam': 'CAD/CAM',
-            'implantology': 'Implantologie',
-            'orthodontics': 'Orthodontie'
-        }
-        
         for category, count in categories:
             result.append({
                 'id': category,
-                'name': category_names.get(category, category.title()),
+                'name': Product.category_label(category),
                 'count': count
             })
         
@@ -126,7 +259,7 @@ def add_review(product_id):
             return jsonify({'error': 'Missing required fields'}), 400
         
         # Validate rating
-        if not isinstance(data['rating'], int) or data['rating'] < 1 or data['rating'] > 5:
+        if not isinstance(data['rating'], int) or isinstance(data['rating'], bool) or data['rating'] < 1 or data['rating'] > 5:
             return jsonify({'error': 'Rating must be between 1 and 5'}), 400
         
         # Check if product exists
@@ -142,12 +275,8 @@ def add_review(product_id):
         
         db.session.add(review)
         
-        # Update product rating
-        reviews = ProductReview.query.filter_by(product_id=product_id).all()
-        if reviews:
-            avg_rating = sum(r.rating for r in reviews) / len(reviews)
-            product.rating = round(avg_rating, 1)
-            product.reviews_count = len(reviews)
+        # Update product rating from the running aggregates
+        record_review(db.session, product.id, data['rating'])
         
         db.session.commit()
         
@@ -0,0 +1,213 @@
+"""In-process response cache for the public catalog endpoints.
+
+Entries are keyed on the request path plus the normalized query string and
+stamped with the catalog version current when they were built. A commit that
+touches ``Product`` or ``ProductReview`` bumps that version, which makes every
+older entry stale at once; stale entries are dropped on lookup or pushed out by
+LRU eviction once the memory cap is reached. Compressed variants of a body are
+produced on first request for each encoding and count towards the same cap.
+
+Each gunicorn worker keeps its own cache and only observes its own commits, so
+entries also expire after ``RESPONSE_CACHE_TTL`` seconds to bound how long a
+write made through another worker can go unnoticed.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from itertools import chain
+from urllib.parse import urlencode
+
+from flask import current_app, make_response, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.models.product import Product, ProductReview
+from src.utils.compression import DEFAULT_MIN_SIZE, compress, is_compressible, negotiate_encoding
+
+CATALOG_MODELS = (Product, ProductReview)
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL = 60
+
+
+class CatalogVersion:
+    """Monotonic counter bumped after every commit that changes the catalog."""
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self._value
+
+    def bump(self):
+        with self._lock:
+            self._value += 1
+            return self._value
+
+
+catalog_version = CatalogVersion()
+
+
+class CachedResponse:
+    __slots__ = ('version', 'body', 'etag', 'mimetype', 'created_at', 'size', 'variants')
+
+    def __init__(self, version, body, mimetype):
+        self.version = version
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.mimetype = mimetype
+        self.created_at = time.monotonic()
+        self.size = len(body)
+        self.variants = {}
+
+
+class ResponseCache:
+    """Thread-safe LRU of response bodies bounded by total size in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version or time.monotonic() - entry.created_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def add_variant(self, key, entry, encoding, body):
+        """Keep ``body`` as the ``encoding`` variant of the cached ``entry``."""
+        with self._lock:
+            if self._entries.get(key) is not entry or encoding in entry.variants:
+                return
+            entry.variants[encoding] = body
+            entry.size += len(body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        self._size -= self._entries.pop(key).size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def mark_catalog_changed(session):
+    """Flag a session whose pending transaction changes the catalog.
+
+    ORM writes are detected automatically; call this after bulk or Core
+    ``UPDATE`` statements that bypass the unit of work.
+    """
+    session.info['catalog_changed'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_catalog_writes(session, flush_context):
+    if any(isinstance(obj, CATALOG_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        mark_catalog_changed(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_catalog_version(session):
+    if session.info.pop('catalog_changed', False):
+        catalog_version.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_catalog_writes(session):
+    session.info.pop('catalog_changed', None)
+
+
+def init_response_cache(app):
+    app.extensions['response_cache'] = ResponseCache(
+        max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES),
+        ttl=app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL)
+    )
+
+
+def _cache_key():
+    args = sorted(request.args.items(multi=True))
+    return f"{request.path}?{urlencode(args)}" if args else request.path
+
+
+def _encode(cache, key, entry, response):
+    """Swap in the compressed variant the client accepts, compressing it once."""
+    if 'compression' not in current_app.extensions or not is_compressible(entry.mimetype):
+        return
+    if entry.size < current_app.config.get('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE):
+        return
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return
+    body = entry.variants.get(encoding)
+    if body is None:
+        body = compress(entry.body, encoding, cached=True)
+        cache.add_variant(key, entry, encoding, body)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+
+
+def _serve(cache, key, entry):
+    response = make_response(entry.body)
+    response.mimetype = entry.mimetype
+    # Weak, so the same validator holds for any content-encoding of the body.
+    response.set_etag(entry.etag, weak=True)
+    response.cache_control.no_cache = True
+    # Answers If-None-Match with a bodiless 304 when the client is current.
+    response = response.make_conditional(request)
+    if response.status_code == 200:
+        _encode(cache, key, entry, response)
+    return response
+
+
+def cached_response(view):
+    """Cache a catalog view's successful responses until the catalog changes."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = current_app.extensions.get('response_cache')
+        if cache is None:
+            return view(*args, **kwargs)
+
+        key = _cache_key()
+        entry = cache.get(key, catalog_version.value)
+        if entry is None:
+            # Read the version before rendering: a write that lands meanwhile
+            # leaves this entry already stale rather than silently current.
+            version = catalog_version.value
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            entry = CachedResponse(version, response.get_data(), response.mimetype)
+            cache.put(key, entry)
+        return _serve(cache, key, entry)
+
+    return wrapper
@@ -0,0 +1,81 @@
+"""Cart pricing shared by the cart view, WhatsApp checkout and order creation.
+
+All products of a cart are fetched with one ``IN`` query (only the columns
+pricing needs), then lines, subtotals and totals are computed in a single
+pass, so the cost of pricing a cart does not grow in queries with its size.
+Prices always come from the database, never from the client.
+"""
+from sqlalchemy.orm import load_only
+
+from src.models.product import Product
+
+PRICING_COLUMNS = (
+    Product.id, Product.name, Product.price, Product.image_url, Product.is_active, Product.stock_quantity
+)
+
+
+class CartLine:
+    __slots__ = ('product', 'quantity', 'subtotal')
+
+    def __init__(self, product, quantity):
+        self.product = product
+        self.quantity = quantity
+        self.subtotal = product.price * quantity
+
+    def to_dict(self):
+        return {
+            'id': self.product.id,
+            'name': self.product.name,
+            'price': self.product.price,
+            'image_url': self.product.image_url,
+            'quantity': self.quantity,
+            'subtotal': self.subtotal
+        }
+
+
+class PricedCart:
+    """Priced lines of a cart plus the product IDs that could not be priced.
+
+    ``unavailable`` lists products that no longer exist or are inactive.
+    """
+
+    __slots__ = ('lines', 'unavailable', 'total_items', 'total_price')
+
+    def __init__(self, lines, unavailable):
+        self.lines = lines
+        self.unavailable = unavailable
+        self.total_items = 0
+        self.total_price = 0
+        for line in lines:
+            self.total_items += line.quantity
+            self.total_price += line.subtotal
+
+
+def load_products(product_ids):
+    """``{id: Product}`` for ``product_ids``, loaded with one query."""
+    if not product_ids:
+        return {}
+    products = Product.query.options(load_only(*PRICING_COLUMNS)).filter(Product.id.in_(product_ids)).all()
+    return {product.id: product for product in products}
+
+
+def price_cart(items):
+    """Price ``[{product_id, quantity}, ...]`` against current product data.
+
+    Lines for the same product are combined; line order follows first
+    appearance in ``items``.
+    """
+    quantities = {}
+    for item in items:
+        quantities[item['product_id']] = quantities.get(item['product_id'], 0) + item['quantity']
+
+    products = load_products(list(quantities))
+    lines = []
+    unavailable = []
+    for product_id, quantity in quantities.items():
+        product = products.get(product_id)
+        if product is None or not product.is_active:
+            unavailable.append(product_id)
+        else:
+            lines.append(CartLine(product, quantity))
+    return PricedCart(lines, unavailable)
@@ -0,0 +1,247 @@
+"""Server-side cart storage.
+
+Carts used to live in the signed session cookie; now the cookie only carries
+a session ID and the items are kept server-side, keyed by ``user:<id>`` for
+signed-in customers and ``session:<id>`` for guests. Two backends:
+
+* ``database`` (default): one row per cart in ``carts``, shared by every
+  gunicorn worker and surviving restarts. Abandoned carts are removed by
+  ``flask purge-carts``.
+* ``memory``: a per-process LRU bounded by ``CART_MEMORY_MAX_CARTS``, for
+  single-process deployments and development.
+
+Both expire carts that have not been touched for ``CART_TTL`` seconds. When a
+guest signs in, their cart is merged into their account's cart. Changes to a
+cart go through ``CartStore.locked``, so two requests editing the same cart
+at once (e.g. double-clicked "add" buttons served by different workers) are
+applied one after the other instead of one overwriting the other.
+"""
+import copy
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app, session
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+
+from src.database import db
+from src.models.cart import Cart
+from src.utils.counters import insert_missing, upsert
+
+DEFAULT_TTL = 30 * 24 * 3600
+DEFAULT_MEMORY_MAX_CARTS = 10000
+
+
+class CartStore(ABC):
+    """Interface of the cart backends: carts are lists of ``{product_id, quantity}``."""
+
+    @abstractmethod
+    def load(self, key):
+        """The cart at ``key`` (empty if missing or expired); callers may mutate it."""
+
+    @abstractmethod
+    def save(self, key, items):
+        """Replace the cart at ``key``; an empty ``items`` deletes it."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove the cart at ``key``."""
+
+    @abstractmethod
+    def locked(self, key):
+        """Context manager yielding the cart at ``key`` for a read-modify-write.
+
+        Other writers of the same cart wait until the block ends, so a
+        ``save`` inside it cannot overwrite a concurrent change.
+        """
+
+    def purge_expired(self):
+        return 0
+
+    def merge_items(self, key, extra_items):
+        """Add the quantities of ``extra_items`` to the cart at ``key``."""
+        with self.locked(key) as items:
+            lines = {item['product_id']: item for item in items}
+            for item in extra_items:
+                line = lines.get(item['product_id'])
+                if line is None:
+                    line = lines[item['product_id']] = dict(item)
+                    items.append(line)
+                else:
+                    line['quantity'] += item['quantity']
+            self.save(key, items)
+        return items
+
+    def merge(self, source_key, target_key):
+        """Move ``source_key``'s cart into ``target_key``'s, adding up quantities."""
+        source = self.load(source_key)
+        if not source:
+            return self.load(target_key)
+        items = self.merge_items(target_key, source)
+        self.delete(source_key)
+        return items
+
+
+class MemoryCartStore(CartStore):
+    """Per-process LRU of carts with an idle timeout."""
+
+    def __init__(self, max_carts=DEFAULT_MEMORY_MAX_CARTS, ttl=DEFAULT_TTL):
+        self.max_carts = max_carts
+        self.ttl = ttl
+        self._carts = OrderedDict()
+        # Reentrant: load and save take it again inside locked()
+        self._lock = threading.RLock()
+
+    def load(self, key):
+        with self._lock:
+            entry = self._carts.get(key)
+            if entry is None:
+                return []
+            touched_at, items = entry
+            if time.monotonic() - touched_at > self.ttl:
+                del self._carts[key]
+                return []
+            self._carts[key] = (time.monotonic(), items)
+            self._carts.move_to_end(key)
+            # Callers mutate the list they get back.
+            return copy.deepcopy(items)
+
+    def save(self, key, items):
+        if not items:
+            self.delete(key)
+            return
+        with self._lock:
+            self._carts[key] = (time.monotonic(), copy.deepcopy(items))
+            self._carts.move_to_end(key)
+            while len(self._carts) > self.max_carts:
+                self._carts.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._carts.pop(key, None)
+
+    @contextmanager
+    def locked(self, key):
+        with self._lock:
+            yield self.load(key)
+
+    def purge_expired(self):
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            expired = [key for key, (touched_at, _) in self._carts.items() if touched_at < cutoff]
+            for key in expired:
+                del self._carts[key]
+        return len(expired)
+
+
+class DatabaseCartStore(CartStore):
+    """Carts in the ``carts`` table; every write commits the current session."""
+
+    def __init__(self, ttl=DEFAULT_TTL):
+        self.ttl = ttl
+
+    def _cutoff(self):
+        return datetime.utcnow() - timedelta(seconds=self.ttl)
+
+    def load(self, key):
+        items, updated_at = db.session.execute(
+            db.select(Cart.items, Cart.updated_at).where(Cart.cart_key == key)
+        ).first() or (None, None)
+        if not items or (updated_at is not None and updated_at < self._cutoff()):
+            return []
+        return items
+
+    def save(self, key, items):
+        if not items:
+            self.delete(key)
+            return
+        upsert(db.session.connection(), Cart.__table__, {'cart_key': key}, {
+            'items': items,
+            'updated_at': datetime.utcnow(),
+        })
+        db.session.commit()
+
+    def delete(self, key):
+        db.session.execute(db.delete(Cart).where(Cart.cart_key == key))
+        db.session.commit()
+
+    @contextmanager
+    def locked(self, key):
+        """Lock the cart's row until the session's transaction ends (``save`` commits).
+
+        The row is created first if needed, so there always is one to lock;
+        on SQLite that insert also takes the database's write lock.
+        """
+        insert_missing(db.session.connection(), Cart.__table__, {'cart_key': key}, {
+            'items': [],
+            'updated_at': datetime.utcnow(),
+        })
+        items, updated_at = db.session.execute(
+            db.select(Cart.items, Cart.updated_at).where(Cart.cart_key == key).with_for_update()
+        ).one()
+        try:
+            yield [] if not items or (updated_at is not None and updated_at < self._cutoff()) else items
+        finally:
+            # A no-op after save() committed; otherwise drops the placeholder row and the lock
+            db.session.rollback()
+
+    def purge_expired(self):
+        result = db.session.execute(db.delete(Cart).where(Cart.updated_at < self._cutoff()))
+        db.session.commit()
+        return result.rowcount
+
+
+def init_cart_store(app):
+    backend = app.config.get('CART_STORE', 'database')
+    ttl = app.config.get('CART_TTL', DEFAULT_TTL)
+    if backend == 'memory':
+        store = MemoryCartStore(app.config.get('CART_MEMORY_MAX_CARTS', DEFAULT_MEMORY_MAX_CARTS), ttl)
+    elif backend == 'database':
+        store = DatabaseCartStore(ttl)
+    else:
+        raise ValueError(f"Unknown CART_STORE backend: {backend!r}")
+    app.extensions['cart_store'] = store
+    return store
+
+
+def get_cart_store():
+    return current_app.extensions['cart_store']
+
+
+def get_session_id():
+    """Get or create the guest session ID (the only cart data kept in the cookie)."""
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    return session['session_id']
+
+
+def current_user_id():
+    """ID of the signed-in user, if the request carries a valid access token."""
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        # An expired or malformed token shops as a guest rather than failing.
+        return None
+    return get_jwt_identity()
+
+
+def current_cart_key():
+    user_id = current_user_id()
+    key = f'user:{user_id}' if user_id else f'session:{get_session_id()}'
+
+    # Carts from before the server-side store still sit in the cookie.
+    legacy_items = session.pop('cart_items', None)
+    if legacy_items:
+        get_cart_store().merge_items(key, legacy_items)
+    return key
+
+
+def merge_guest_cart(user_id):
+    """Fold the current guest session's cart into ``user_id``'s cart on sign-in."""
+    if 'session_id' not in session:
+        return
+    get_cart_store().merge(f"session:{session['session_id']}", f'user:{user_id}')
@@ -0,0 +1,67 @@
+"""Incrementally maintained active-product counts per category.
+
+Every flush that creates, recategorizes, activates, deactivates or deletes a
+``Product`` adjusts ``category_stats`` in the same transaction, so
+``/api/products/categories`` reads a handful of rows instead of aggregating
+the products table. Bulk ``Query.update()`` calls bypass the ORM unit of work
+and are not tracked; run ``flask rebuild-category-stats`` after those.
+"""
+from collections import Counter
+
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+
+from src.database import db
+from src.models.product import CategoryStat, Product
+from src.utils.cache import mark_catalog_changed
+from src.utils.counters import increment, original_value
+
+
+def _is_active(value):
+    return value is True or value == 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_category_stats(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        if isinstance(obj, Product) and _is_active(obj.is_active):
+            deltas[obj.category] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Product) and _is_active(original_value(obj, 'is_active')):
+            deltas[original_value(obj, 'category')] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, Product) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not (state.attrs.category.history.has_changes() or state.attrs.is_active.history.has_changes()):
+            continue
+        if _is_active(original_value(obj, 'is_active')):
+            deltas[original_value(obj, 'category')] -= 1
+        if _is_active(obj.is_active):
+            deltas[obj.category] += 1
+
+    connection = session.connection()
+    for category, delta in deltas.items():
+        if delta:
+            increment(connection, CategoryStat.__table__, {'category': category}, {'active_count': delta})
+
+
+def rebuild_category_stats():
+    """Recompute every category count from the products table (repair tool)."""
+    counts = db.session.query(
+        Product.category,
+        func.count(Product.id)
+    ).filter(Product.is_active == True).group_by(Product.category).all()
+
+    CategoryStat.query.delete()
+    db.session.add_all(CategoryStat(category=category, active_count=count) for category, count in counts)
+    mark_catalog_changed(db.session)
+    db.session.commit()
+    return len(counts)
+
+
+def init_category_stats():
+    """Populate the stats table on first start against an existing catalog."""
+    if db.session.execute(text("SELECT 1 FROM category_stats LIMIT 1")).first() is None:
+        rebuild_category_stats()
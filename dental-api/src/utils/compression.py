@@ -0,0 +1,123 @@
+"""Content negotiation and compression for API responses.
+
+Responses of a compressible type are encoded with brotli (when the ``brotli``
+package is installed) or gzip, whichever the client's ``Accept-Encoding``
+prefers. Buffered bodies are compressed only above ``COMPRESSION_MIN_SIZE``
+bytes; streamed bodies (CSV exports and other generators) are compressed
+chunk by chunk as they are produced, without ever being held in memory.
+
+Views served from the response cache are compressed once per encoding and the
+result is kept with the cache entry (see ``src/utils/cache.py``).
+"""
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+
+# Levels for per-request compression, and for bodies compressed once and then
+# served many times from the response cache.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHED_GZIP_LEVEL = 9
+CACHED_BROTLI_QUALITY = 9
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/css',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'text/xml',
+})
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def is_compressible(mimetype):
+    return mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def negotiate_encoding():
+    """The content-coding to use for the current request, or ``None``."""
+    encoding = request.accept_encodings.best_match(ENCODINGS)
+    return encoding if encoding in ENCODINGS else None
+
+
+def compress(body, encoding, cached=False):
+    if encoding == 'br':
+        return brotli.compress(body, quality=CACHED_BROTLI_QUALITY if cached else BROTLI_QUALITY)
+    compressor = zlib.compressobj(CACHED_GZIP_LEVEL if cached else GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def compress_stream(chunks, encoding, source=None):
+    """Compress an iterable of byte chunks incrementally; closes ``source`` when done."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+    try:
+        for chunk in chunks:
+            # The compressor buffers at most its window; output is passed on
+            # as soon as it produces any.
+            data = process(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(source, 'close'):
+            source.close()
+
+
+def _weaken_etag(response):
+    # A strong validator promises byte-identical bodies across encodings.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    """``after_request`` hook compressing eligible responses."""
+    if not is_compressible(response.mimetype):
+        return response
+    response.vary.add('Accept-Encoding')
+
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.cache_control.no_transform):
+        return response
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        source = response.response
+        response.response = compress_stream(response.iter_encoded(), encoding, source)
+        response.headers.pop('Content-Length', None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config.get('COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE):
+            return response
+        response.set_data(compress(body, encoding))
+
+    response.headers['Content-Encoding'] = encoding
+    _weaken_etag(response)
+    return response
+
+
+def init_compression(app):
+    app.extensions['compression'] = True
+    app.after_request(compress_response)
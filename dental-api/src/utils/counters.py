@@ -0,0 +1,76 @@
+from sqlalchemy import and_, inspect, insert, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def increment(connection, table, key, deltas):
+    """Atomically add ``deltas`` to the counter row identified by ``key``.
+
+    The row is created if it does not exist yet. On PostgreSQL and SQLite this
+    is a single ``INSERT ... ON CONFLICT DO UPDATE``, so concurrent writers
+    never lose an increment; other databases fall back to update-then-insert.
+    """
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = dialect_insert(table).values(**key, **deltas)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + statement.excluded[name] for name in deltas}
+        )
+        connection.execute(statement)
+        return
+
+    updated = connection.execute(
+        update(table)
+        .where(and_(*[table.c[name] == value for name, value in key.items()]))
+        .values({name: table.c[name] + delta for name, delta in deltas.items()})
+    )
+    if not updated.rowcount:
+        connection.execute(insert(table).values(**key, **deltas))
+
+
+def upsert(connection, table, key, values):
+    """Insert the row identified by ``key``, or overwrite ``values`` if it exists."""
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = dialect_insert(table).values(**key, **values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: statement.excluded[name] for name in values}
+        )
+        connection.execute(statement)
+        return
+
+    updated = connection.execute(
+        update(table)
+        .where(and_(*[table.c[name] == value for name, value in key.items()]))
+        .values(**values)
+    )
+    if not updated.rowcount:
+        connection.execute(insert(table).values(**key, **values))
+
+
+def insert_missing(connection, table, key, values):
+    """Insert the row identified by ``key`` unless it exists; an existing row is left alone."""
+    dialect = connection.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        connection.execute(dialect_insert(table).values(**key, **values).on_conflict_do_nothing())
+        return
+
+    exists = connection.execute(
+        select(literal(1)).select_from(table).where(and_(*[table.c[name] == value for name, value in key.items()]))
+    ).first()
+    if exists is None:
+        connection.execute(insert(table).values(**key, **values))
+
+
+def original_value(obj, attribute):
+    """Value of ``attribute`` as of the start of the current flush."""
+    history = inspect(obj).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return getattr(obj, attribute)
@@ -0,0 +1,97 @@
+"""Catalog filters and facet counts for ``GET /api/products``.
+
+Filters are keyed by facet name so that each facet can be counted over the
+current result set *without* its own filter (the usual "disjunctive" facet
+behaviour): selecting a badge still shows how many products the other badges
+would give. Every count is one indexed ``GROUP BY`` over the filtered set.
+"""
+from sqlalchemy import and_, case, func, or_
+
+from src.models.product import Product
+from src.utils.sql import spec_value
+
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def _values(raw):
+    return [value.strip() for value in raw.split(',') if value.strip()]
+
+
+def _price(args, name):
+    try:
+        return float(args[name])
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+
+
+def catalog_filters(args):
+    """Parse the catalog filter arguments into ``{facet: clause}``.
+
+    Raises ``ValueError`` on malformed prices.
+    """
+    filters = {}
+
+    category = args.get('category', 'all')
+    if category != 'all':
+        filters['category'] = Product.category == category
+
+    price = []
+    if args.get('min_price'):
+        price.append(Product.price >= _price(args, 'min_price'))
+    if args.get('max_price'):
+        price.append(Product.price <= _price(args, 'max_price'))
+    if price:
+        filters['price'] = and_(*price)
+
+    in_stock = args.get('in_stock', '').lower()
+    if in_stock in TRUE_VALUES:
+        filters['in_stock'] = Product.stock_quantity > 0
+    elif in_stock in FALSE_VALUES:
+        filters['in_stock'] = or_(Product.stock_quantity <= 0, Product.stock_quantity.is_(None))
+
+    if args.get('badge'):
+        filters['badge'] = Product.badge.in_(_values(args['badge']))
+
+    for name, key in Product.FACET_SPECIFICATIONS.items():
+        if args.get(f'spec.{name}'):
+            filters[f'spec.{name}'] = spec_value(Product.specifications, key).in_(_values(args[f'spec.{name}']))
+
+    return filters
+
+
+def _value_counts(query, expression):
+    rows = query.with_entities(expression, func.count(Product.id)).filter(
+        expression.isnot(None)
+    ).group_by(expression).order_by(expression).all()
+    return [{'value': value, 'count': count} for value, count in rows]
+
+
+def product_facets(base_query, filters):
+    """Facet counts for ``base_query`` narrowed by ``filters``.
+
+    ``base_query`` must select ``Product`` with only the unconditional
+    restrictions applied (active products, search match).
+    """
+    def scoped(facet):
+        return base_query.filter(*[clause for name, clause in filters.items() if name != facet])
+
+    in_stock, total = scoped('in_stock').with_entities(
+        func.sum(case((Product.stock_quantity > 0, 1), else_=0)),
+        func.count(Product.id)
+    ).one()
+    min_price, max_price = scoped('price').with_entities(
+        func.min(Product.price),
+        func.max(Product.price)
+    ).one()
+
+    return {
+        'category': _value_counts(scoped('category'), Product.category),
+        'badge': _value_counts(scoped('badge'), Product.badge),
+        'in_stock': {'true': in_stock or 0, 'false': total - (in_stock or 0)},
+        'price': {'min': min_price, 'max': max_price},
+        'specifications': {
+            name: _value_counts(scoped(f'spec.{name}'), spec_value(Product.specifications, key))
+            for name, key in Product.FACET_SPECIFICATIONS.items()
+        },
+    }
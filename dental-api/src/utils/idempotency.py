@@ -0,0 +1,277 @@
+"""``Idempotency-Key`` support for order-creating endpoints.
+
+A client that may retry a request sends the same ``Idempotency-Key`` header
+with every attempt. The first attempt claims the key and runs the view; its
+response is stored for ``IDEMPOTENCY_TTL`` seconds and replayed verbatim
+(with ``Idempotent-Replayed: true``) to every retry, without running the view
+again. A retry that arrives while the first attempt is still running waits up
+to ``IDEMPOTENCY_WAIT`` seconds for its response instead of running a second
+time, then gets a 409. Reusing a key with a different body is a 422.
+
+Keys are scoped to the endpoint and the caller (user, or guest session), and
+stored hashed; a guest's first keyed request starts their session. Server
+errors (5xx) are not stored, so they can be retried. A claim whose request
+never finished (the worker died) is taken over after
+``IDEMPOTENCY_LOCK_TIMEOUT`` seconds. Two backends, as for carts:
+
+* ``database`` (default): ``idempotency_keys`` rows, shared by every gunicorn
+  worker; claims are written on their own connection so other workers see
+  them immediately. ``flask purge-idempotency-keys`` removes expired rows.
+* ``memory``: a per-process dict, for single-process deployments.
+"""
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from src.database import db
+from src.models.idempotency_key import IdempotencyKey
+from src.utils.cart_store import current_user_id, get_session_id
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+DEFAULT_TTL = 24 * 3600
+DEFAULT_WAIT = 10
+DEFAULT_LOCK_TIMEOUT = 60
+POLL_INTERVAL = 0.05
+
+_keys = IdempotencyKey.__table__
+
+
+class StoredResponse:
+    __slots__ = ('status', 'body', 'mimetype')
+
+    def __init__(self, status, body, mimetype):
+        self.status = status
+        self.body = body
+        self.mimetype = mimetype
+
+
+class Claim:
+    """Someone else's claim on a key: its request fingerprint and, once finished, its response."""
+
+    __slots__ = ('fingerprint', 'response')
+
+    def __init__(self, fingerprint, response=None):
+        self.fingerprint = fingerprint
+        self.response = response
+
+
+class IdempotencyStore(ABC):
+    """Interface of the backends."""
+
+    def __init__(self, ttl=DEFAULT_TTL, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+
+    @abstractmethod
+    def claim(self, key, fingerprint):
+        """Claim ``key``; returns ``None`` on success, or the existing ``Claim``."""
+
+    @abstractmethod
+    def complete(self, key, response):
+        """Store the finished response for ``key``."""
+
+    @abstractmethod
+    def release(self, key):
+        """Drop the claim on ``key`` so the request can be retried."""
+
+    def wait(self, key, timeout):
+        """Block until ``key`` may have changed, for at most ``timeout`` seconds."""
+        time.sleep(min(POLL_INTERVAL, timeout))
+
+    def purge_expired(self):
+        return 0
+
+
+class MemoryIdempotencyStore(IdempotencyStore):
+    def __init__(self, ttl=DEFAULT_TTL, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+        super().__init__(ttl, lock_timeout)
+        # key -> [fingerprint, response, locked_at, expires_at] (monotonic times)
+        self._entries = {}
+        self._changed = threading.Condition()
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        fingerprint, response, locked_at, expires_at = entry
+        if expires_at < now or (response is None and locked_at + self.lock_timeout < now):
+            del self._entries[key]
+            return None
+        return entry
+
+    def claim(self, key, fingerprint):
+        now = time.monotonic()
+        with self._changed:
+            entry = self._live(key, now)
+            if entry is None:
+                self._entries[key] = [fingerprint, None, now, now + self.ttl]
+                return None
+            return Claim(entry[0], entry[1])
+
+    def complete(self, key, response):
+        with self._changed:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1] = response
+                entry[3] = time.monotonic() + self.ttl
+            self._changed.notify_all()
+
+    def release(self, key):
+        with self._changed:
+            self._entries.pop(key, None)
+            self._changed.notify_all()
+
+    def wait(self, key, timeout):
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self._changed:
+            expired = [key for key in list(self._entries) if self._live(key, now) is None]
+        return len(expired)
+
+
+class DatabaseIdempotencyStore(IdempotencyStore):
+    """Keys in the ``idempotency_keys`` table, written outside the request's transaction."""
+
+    def _insert(self, connection, values):
+        dialect = connection.dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            result = connection.execute(dialect_insert(_keys).values(**values).on_conflict_do_nothing())
+            return result.rowcount == 1
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(_keys).values(**values))
+            return True
+        except IntegrityError:
+            return False
+
+    def claim(self, key, fingerprint):
+        now = datetime.utcnow()
+        with db.engine.begin() as connection:
+            # Forget finished keys past their TTL and abandoned claims
+            connection.execute(delete(_keys).where(_keys.c.key == key, or_(
+                _keys.c.expires_at < now,
+                and_(_keys.c.response_status.is_(None), _keys.c.locked_at < now - timedelta(seconds=self.lock_timeout))
+            )))
+            claimed = self._insert(connection, {
+                'key': key,
+                'fingerprint': fingerprint,
+                'locked_at': now,
+                'expires_at': now + timedelta(seconds=self.ttl),
+            })
+            if claimed:
+                return None
+            row = connection.execute(
+                select(_keys.c.fingerprint, _keys.c.response_status, _keys.c.response_body, _keys.c.response_mimetype)
+                .where(_keys.c.key == key)
+            ).first()
+        if row is None:
+            # Released between our insert and select; let the caller retry
+            return Claim(fingerprint)
+        response = None
+        if row.response_status is not None:
+            response = StoredResponse(row.response_status, row.response_body, row.response_mimetype)
+        return Claim(row.fingerprint, response)
+
+    def complete(self, key, response):
+        with db.engine.begin() as connection:
+            connection.execute(update(_keys).where(_keys.c.key == key).values(
+                response_status=response.status,
+                response_body=response.body,
+                response_mimetype=response.mimetype,
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+            ))
+
+    def release(self, key):
+        with db.engine.begin() as connection:
+            connection.execute(delete(_keys).where(_keys.c.key == key))
+
+    def purge_expired(self):
+        with db.engine.begin() as connection:
+            result = connection.execute(delete(_keys).where(_keys.c.expires_at < datetime.utcnow()))
+        return result.rowcount
+
+
+def init_idempotency(app):
+    backend = app.config.get('IDEMPOTENCY_STORE', 'database')
+    ttl = app.config.get('IDEMPOTENCY_TTL', DEFAULT_TTL)
+    lock_timeout = app.config.get('IDEMPOTENCY_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+    if backend == 'memory':
+        store = MemoryIdempotencyStore(ttl, lock_timeout)
+    elif backend == 'database':
+        store = DatabaseIdempotencyStore(ttl, lock_timeout)
+    else:
+        raise ValueError(f"Unknown IDEMPOTENCY_STORE backend: {backend!r}")
+    app.extensions['idempotency'] = store
+    return store
+
+
+def get_idempotency_store():
+    return current_app.extensions['idempotency']
+
+
+def _scoped_key(client_key):
+    """The stored key for ``client_key``, scoped to the endpoint and the caller."""
+    user_id = current_user_id()
+    # A guest's first request starts their session here, so the cookie that
+    # comes back with the response scopes their retries.
+    caller = f'user:{user_id}' if user_id else f'session:{get_session_id()}'
+    return hashlib.sha256(f'{request.method} {request.path} {caller} {client_key}'.encode('utf-8')).hexdigest()
+
+
+def _replay(stored):
+    response = current_app.response_class(stored.body, status=stored.status, mimetype=stored.mimetype)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view):
+    """Make ``view`` honour the ``Idempotency-Key`` request header."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        client_key = request.headers.get(HEADER)
+        if client_key is None:
+            return view(*args, **kwargs)
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+
+        key = _scoped_key(client_key)
+        store = get_idempotency_store()
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        deadline = time.monotonic() + current_app.config.get('IDEMPOTENCY_WAIT', DEFAULT_WAIT)
+        while True:
+            claim = store.claim(key, fingerprint)
+            if claim is None:
+                break
+            if claim.fingerprint != fingerprint:
+                return jsonify({'error': f'{HEADER} was already used with a different request'}), 422
+            if claim.response is not None:
+                return _replay(claim.response)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return jsonify({'error': 'A request with this Idempotency-Key is still being processed'}), 409
+            store.wait(key, remaining)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except BaseException:
+            store.release(key)
+            raise
+        if response.status_code >= 500 or response.is_streamed:
+            store.release(key)
+        else:
+            store.complete(key, StoredResponse(response.status_code, response.get_data(), response.mimetype))
+        return response
+    return wrapper
@@ -0,0 +1,310 @@
+"""Background jobs: a durable queue table worked by a small in-process thread pool.
+
+Work that does not have to finish before a response is sent (notification
+webhooks and the like) is enqueued instead of done inline::
+
+    @job('order.notify')
+    def notify_order(order_id):
+        ...
+
+    enqueue('order.notify', {'order_id': order.id})
+    db.session.commit()
+
+``enqueue`` adds a ``jobs`` row to the caller's transaction, so a job exists
+if and only if the work that produced it was committed, and survives
+restarts. After the commit the worker threads are woken up; every gunicorn
+worker runs ``JOB_WORKERS`` of them (started on its first request, never by
+CLI commands), and they otherwise poll every ``JOB_POLL_INTERVAL`` seconds,
+which also picks up jobs enqueued by other processes.
+
+Jobs are claimed with a conditional ``UPDATE`` (and ``FOR UPDATE SKIP
+LOCKED`` on PostgreSQL), so each attempt runs in exactly one thread of one
+process. A failing job is retried with exponential backoff until its
+``max_attempts`` are used up, then marked ``failed``. Jobs left ``running``
+for more than ``JOB_TIMEOUT`` seconds (their process died) are queued again;
+should such an attempt finish after all, its result is discarded.
+``flask run-jobs`` works the queue in the foreground, e.g. with
+``JOB_WORKERS=0`` in the web workers.
+"""
+import random
+import threading
+import traceback
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, event, func, select, update
+from sqlalchemy.orm import Session
+
+from src.database import db
+from src.models.job import Job
+
+DEFAULT_WORKERS = 2
+DEFAULT_POLL_INTERVAL = 5
+DEFAULT_TIMEOUT = 300
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 10
+BACKOFF_MAX = 3600
+MAX_ERROR_LENGTH = 4000
+# Finished jobs used for the latency figures in queue_stats()
+STATS_SAMPLE_SIZE = 200
+
+_jobs = Job.__table__
+
+ClaimedJob = namedtuple('ClaimedJob', 'id name payload attempts max_attempts')
+_handlers = {}
+_wakeup = threading.Event()
+
+
+def job(name, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Register the decorated function as the handler of jobs called ``name``.
+
+    The handler is called with the job's payload as keyword arguments, inside
+    an application context; raising retries the job.
+    """
+    def register(handler):
+        _handlers[name] = (handler, max_attempts)
+        return handler
+    return register
+
+
+def enqueue(name, payload=None, delay=0, session=None):
+    """Add a job to ``session``'s transaction (``db.session`` by default)."""
+    if name not in _handlers:
+        raise KeyError(f'No handler registered for job {name!r}')
+    session = session if session is not None else db.session
+    new_job = Job(
+        name=name,
+        payload=payload or {},
+        max_attempts=_handlers[name][1],
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        created_at=datetime.utcnow()
+    )
+    session.add(new_job)
+    session.info['jobs_enqueued'] = True
+    return new_job
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('jobs_enqueued', False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_enqueued(session):
+    session.info.pop('jobs_enqueued', None)
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying after ``attempts`` failed attempts."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    # Jitter, so jobs that failed together do not all retry together
+    return delay * random.uniform(0.75, 1.0)
+
+
+def _requeue_stale(connection, now, timeout):
+    connection.execute(
+        update(_jobs)
+        .where(_jobs.c.status == Job.RUNNING, _jobs.c.started_at < now - timedelta(seconds=timeout))
+        .values(
+            status=case((_jobs.c.attempts >= _jobs.c.max_attempts, Job.FAILED), else_=Job.QUEUED),
+            run_at=now,
+            finished_at=case((_jobs.c.attempts >= _jobs.c.max_attempts, now), else_=None),
+            last_error='Timed out (worker stopped)'
+        )
+    )
+
+
+def _claim_next(timeout):
+    now = datetime.utcnow()
+    with db.engine.begin() as connection:
+        _requeue_stale(connection, now, timeout)
+        row = connection.execute(
+            select(_jobs.c.id, _jobs.c.name, _jobs.c.payload, _jobs.c.attempts, _jobs.c.max_attempts)
+            .where(_jobs.c.status == Job.QUEUED, _jobs.c.run_at <= now)
+            .order_by(_jobs.c.run_at, _jobs.c.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if row is None:
+            return None
+        claimed = connection.execute(
+            update(_jobs)
+            .where(_jobs.c.id == row.id, _jobs.c.status == Job.QUEUED)
+            .values(status=Job.RUNNING, attempts=_jobs.c.attempts + 1, started_at=now)
+        )
+        if claimed.rowcount != 1:
+            # Another process got it first
+            return False
+    return ClaimedJob(row.id, row.name, row.payload, row.attempts + 1, row.max_attempts)
+
+
+def _finish(claimed, **values):
+    """Record the outcome of ``claimed``, unless that attempt was already given up on.
+
+    An attempt that outlived ``JOB_TIMEOUT`` may have been queued again and
+    claimed by another worker; its late result must not overwrite theirs.
+    """
+    with db.engine.begin() as connection:
+        result = connection.execute(
+            update(_jobs)
+            .where(_jobs.c.id == claimed.id, _jobs.c.status == Job.RUNNING, _jobs.c.attempts == claimed.attempts)
+            .values(**values)
+        )
+    if result.rowcount != 1:
+        current_app.logger.warning('Job %s (%s) attempt %s finished after timing out; result discarded',
+                                   claimed.id, claimed.name, claimed.attempts)
+
+
+def _execute(claimed):
+    handler = _handlers.get(claimed.name)
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job {claimed.name!r}')
+        handler[0](**(claimed.payload or {}))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc()[-MAX_ERROR_LENGTH:]
+        current_app.logger.warning('Job %s (%s) failed, attempt %s/%s',
+                                   claimed.id, claimed.name, claimed.attempts, claimed.max_attempts)
+        now = datetime.utcnow()
+        if handler is None or claimed.attempts >= claimed.max_attempts:
+            _finish(claimed, status=Job.FAILED, finished_at=now, last_error=error)
+        else:
+            _finish(claimed, status=Job.QUEUED, run_at=now + timedelta(seconds=backoff(claimed.attempts)),
+                    last_error=error)
+        return
+    _finish(claimed, status=Job.DONE, finished_at=datetime.utcnow(), last_error=None)
+
+
+def run_next_job(timeout=DEFAULT_TIMEOUT):
+    """Run one due job, if any; returns whether there may be more to do."""
+    claimed = _claim_next(timeout)
+    if claimed is None:
+        return False
+    if claimed is not False:
+        _execute(claimed)
+    return True
+
+
+class JobQueue:
+    """The worker threads of one process."""
+
+    def __init__(self, app, workers=DEFAULT_WORKERS, poll_interval=DEFAULT_POLL_INTERVAL, timeout=DEFAULT_TIMEOUT):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def start(self):
+        if self._threads or not self.workers:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{number}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self, wait=True):
+        self._stopping.set()
+        _wakeup.set()
+        if wait:
+            self.join()
+
+    def _work(self):
+        while not self._stopping.is_set():
+            # Cleared before looking, so a commit made meanwhile is not missed
+            _wakeup.clear()
+            try:
+                with self.app.app_context():
+                    busy = run_next_job(self.timeout)
+            except Exception:
+                self.app.logger.exception('Job worker error')
+                busy = False
+            if not busy:
+                _wakeup.wait(self.poll_interval)
+
+
+def init_jobs(app):
+    queue = JobQueue(
+        app,
+        workers=app.config.get('JOB_WORKERS', DEFAULT_WORKERS),
+        poll_interval=app.config.get('JOB_POLL_INTERVAL', DEFAULT_POLL_INTERVAL),
+        timeout=app.config.get('JOB_TIMEOUT', DEFAULT_TIMEOUT)
+    )
+    app.extensions['jobs'] = queue
+
+    # Threads start with the first request, so CLI commands do not spawn them
+    @app.before_request
+    def _start_job_workers():
+        queue.start()
+
+    return queue
+
+
+def get_job_queue():
+    return current_app.extensions['jobs']
+
+
+def queue_stats():
+    """Queue depth per status, how far behind the queue is, and recent latencies."""
+    now = datetime.utcnow()
+    counts = dict(db.session.execute(select(_jobs.c.status, func.count()).group_by(_jobs.c.status)).all())
+    oldest_due = db.session.execute(
+        select(func.min(_jobs.c.run_at)).where(_jobs.c.status == Job.QUEUED, _jobs.c.run_at <= now)
+    ).scalar()
+
+    recent = db.session.execute(
+        select(_jobs.c.run_at, _jobs.c.started_at, _jobs.c.finished_at)
+        .where(_jobs.c.status == Job.DONE)
+        .order_by(_jobs.c.finished_at.desc())
+        .limit(STATS_SAMPLE_SIZE)
+    ).all()
+    waits = sorted(max((row.started_at - row.run_at).total_seconds(), 0) for row in recent)
+    durations = sorted((row.finished_at - row.started_at).total_seconds() for row in recent)
+
+    return {
+        'counts': {status: counts.get(status, 0) for status in (Job.QUEUED, Job.RUNNING, Job.DONE, Job.FAILED)},
+        'due': db.session.execute(
+            select(func.count()).where(_jobs.c.status == Job.QUEUED, _jobs.c.run_at <= now)
+        ).scalar(),
+        'oldest_due_seconds': round((now - oldest_due).total_seconds(), 3) if oldest_due else 0,
+        'latency': {
+            'sample_size': len(recent),
+            'wait_avg_seconds': _average(waits),
+            'wait_p95_seconds': _percentile(waits, 0.95),
+            'run_avg_seconds': _average(durations),
+            'run_p95_seconds': _percentile(durations, 0.95)
+        }
+    }
+
+
+def _average(values):
+    return round(sum(values) / len(values), 3) if values else None
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)], 3)
+
+
+def purge_finished_jobs(older_than_days=7):
+    """Delete jobs that finished successfully more than ``older_than_days`` ago."""
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    result = db.session.execute(
+        _jobs.delete().where(_jobs.c.status == Job.DONE, _jobs.c.finished_at < cutoff)
+    )
+    db.session.commit()
+    return result.rowcount
@@ -0,0 +1,95 @@
+"""JSON provider that encodes with orjson when it is installed.
+
+Output is byte-for-byte what Flask's default provider produces (sorted keys,
+compact separators, ASCII-only with ``\\uXXXX`` escapes, datetimes as HTTP
+dates). Anything orjson would write differently falls back to the standard
+encoder:
+
+* floats orjson formats without Python's exponent notation;
+* integers outside the 64-bit range and non-string dict keys;
+* pretty-printed output (debug mode).
+
+The one exception is NaN and infinities, which the standard encoder writes as
+(invalid JSON) ``NaN``/``Infinity`` and orjson writes as ``null``. Only
+``response()`` (``jsonify``) takes the fast path; ``dumps()`` is unchanged.
+"""
+import codecs
+import re
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# Let the provider's ``default`` format these exactly like Flask does.
+_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_SORT_KEYS
+    if orjson is not None else 0
+)
+
+# orjson writes exponents as "1e16"/"5e-324" (Python: "1e+16"/"5e-324") and
+# writes floats below 1e-4 out in full (Python: "5e-05"). Candidates are found
+# with a cheap scan, then confirmed by checking for a preceding digit.
+_EXPONENT_CANDIDATE = re.compile(rb'e-?[0-9]')
+_DIGITS = frozenset(b'0123456789')
+
+
+def _has_divergent_float(body):
+    if b'0.0000' in body:
+        return True
+    for match in _EXPONENT_CANDIDATE.finditer(body):
+        if match.start() and body[match.start() - 1] in _DIGITS:
+            return True
+    return False
+
+
+@lru_cache(maxsize=4096)
+def _escape(text):
+    escaped = []
+    for char in text:
+        code = ord(char)
+        if code < 0x10000:
+            escaped.append(f'\\u{code:04x}')
+        else:
+            code -= 0x10000
+            escaped.append(f'\\u{0xd800 | (code >> 10):04x}\\u{0xdc00 | (code & 0x3ff):04x}')
+    return ''.join(escaped)
+
+
+def _escape_non_ascii(error):
+    """``str.encode`` error handler producing the standard encoder's ``\\uXXXX`` escapes."""
+    return _escape(error.object[error.start:error.end]), error.end
+
+
+codecs.register_error('json_escape', _escape_non_ascii)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """``DefaultJSONProvider`` with an orjson fast path for compact responses."""
+
+    def _fast_dumps(self, obj):
+        """Encode ``obj`` with orjson, or return ``None`` to use the standard encoder."""
+        if orjson is None or not self.sort_keys:
+            return None
+        try:
+            body = orjson.dumps(obj, default=self.default, option=_OPTIONS)
+        except TypeError:
+            return None
+        if _has_divergent_float(body):
+            return None
+        if self.ensure_ascii and not body.isascii():
+            body = body.decode().encode('ascii', 'json_escape')
+        return body
+
+    def _compact(self):
+        return self.compact or (self.compact is None and not self._app.debug)
+
+    def response(self, *args, **kwargs):
+        if self._compact():
+            body = self._fast_dumps(self._prepare_response_obj(args, kwargs))
+            if body is not None:
+                return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+        return super().response(*args, **kwargs)
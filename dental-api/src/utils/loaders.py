@@ -0,0 +1,68 @@
+"""Single-query loaders for detail views.
+
+``load_product_detail`` fetches a product, its rating aggregates and one page
+of its latest reviews in one round trip: the product is outer-joined to its
+``product_rating_stats`` row and to a subquery holding the requested review
+page, so the page costs the same however many reviews the product has.
+"""
+from sqlalchemy.orm import aliased
+
+from src.database import db
+from src.models.product import Product, ProductRatingStats, ProductReview
+
+EMPTY_HISTOGRAM = {str(stars): 0 for stars in range(1, 6)}
+
+
+class ProductDetail:
+    """A product with one page of its reviews and its rating histogram."""
+
+    __slots__ = ('product', 'reviews', 'has_next_reviews', 'rating_histogram')
+
+    def __init__(self, product, reviews, has_next_reviews, rating_histogram):
+        self.product = product
+        self.reviews = reviews
+        self.has_next_reviews = has_next_reviews
+        self.rating_histogram = rating_histogram
+
+    def to_dict(self):
+        data = self.product.to_dict()
+        data['reviews'] = [review.to_dict() for review in self.reviews]
+        data['rating_histogram'] = self.rating_histogram
+        return data
+
+
+def load_product_detail(product_id, reviews_page=1, reviews_per_page=10):
+    """Load a product with the given page of reviews, newest first.
+
+    Returns ``None`` when the product does not exist.
+    """
+    # One extra review tells us whether there is a next page.
+    page = (
+        db.session.query(ProductReview)
+        .filter(ProductReview.product_id == product_id)
+        .order_by(ProductReview.created_at.desc(), ProductReview.id.desc())
+        .offset((reviews_page - 1) * reviews_per_page)
+        .limit(reviews_per_page + 1)
+        .subquery('review_page')
+    )
+    review = aliased(ProductReview, page)
+
+    rows = (
+        db.session.query(Product, ProductRatingStats, review)
+        .outerjoin(ProductRatingStats, ProductRatingStats.product_id == Product.id)
+        .outerjoin(review, review.product_id == Product.id)
+        .filter(Product.id == product_id)
+        .order_by(review.created_at.desc(), review.id.desc())
+        .all()
+    )
+    if not rows:
+        return None
+
+    product, stats, _ = rows[0]
+    reviews = [row[2] for row in rows if row[2] is not None]
+    return ProductDetail(
+        product=product,
+        reviews=reviews[:reviews_per_page],
+        has_next_reviews=len(reviews) > reviews_per_page,
+        rating_histogram=stats.histogram() if stats is not None else dict(EMPTY_HISTOGRAM),
+    )
@@ -0,0 +1,37 @@
+"""Background work triggered by new orders (see src/utils/jobs.py).
+
+``order_placed`` is called inside the order's transaction and only enqueues;
+the jobs run after the response has been sent.
+"""
+import json
+import urllib.request
+
+from flask import current_app
+
+from src.database import db
+from src.models.order import Order
+from src.utils.jobs import enqueue, job
+
+WEBHOOK_TIMEOUT = 10
+
+
+def order_placed(order_id):
+    """Enqueue the post-order jobs for ``order_id``."""
+    if current_app.config.get('ORDER_WEBHOOK_URL'):
+        enqueue('order.webhook', {'order_id': order_id})
+
+
+@job('order.webhook', max_attempts=8)
+def post_order_webhook(order_id):
+    """POST the order as JSON to ``ORDER_WEBHOOK_URL``; non-2xx responses are retried."""
+    url = current_app.config.get('ORDER_WEBHOOK_URL')
+    order = db.session.get(Order, order_id)
+    if not url or order is None:
+        return
+    body = json.dumps({'event': 'order.created', 'order': order.to_dict()}, default=str).encode('utf-8')
+    webhook_request = urllib.request.Request(
+        url, data=body, method='POST', headers={'Content-Type': 'application/json'}
+    )
+    # urlopen raises HTTPError for 4xx/5xx, which fails this attempt
+    with urllib.request.urlopen(webhook_request, timeout=WEBHOOK_TIMEOUT) as response:
+        response.read()
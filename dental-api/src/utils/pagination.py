@@ -0,0 +1,146 @@
+"""Keyset (cursor) pagination.
+
+Instead of ``OFFSET n`` plus a ``COUNT(*)``, each page is fetched with a
+``WHERE (sort columns) > (last row seen)`` predicate, so page 500 costs the
+same as page 1 as long as the sort columns are indexed. The position is handed
+to clients as an opaque, URL-safe cursor string.
+
+Sort expressions that can be NULL put NULLs last in either direction, on
+every database, and their cursor predicates test ``IS NULL`` explicitly: a
+row-value comparison involving NULL is never true, so such rows would
+otherwise end the listing early.
+"""
+import base64
+import binascii
+import json
+from datetime import date, datetime
+
+from sqlalchemy import Column, and_, false, literal, or_, tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue (or for another sort)."""
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.total = total
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        raise InvalidCursor('Malformed cursor')
+    return value
+
+
+def encode_cursor(key, values):
+    payload = json.dumps({'k': key, 'v': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, key, size):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_decode_value(v) for v in payload['v']]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursor('Malformed cursor')
+    if payload.get('k') != key or len(values) != size:
+        raise InvalidCursor('Cursor does not match the requested sort order')
+    return values
+
+
+def nullable(expression):
+    """Whether ``expression`` may be NULL; only NOT NULL columns are known not to be."""
+    column = getattr(expression, 'expression', expression)
+    return not isinstance(column, Column) or column.nullable
+
+
+def order_by_clauses(order):
+    """``ORDER BY`` clauses for a list of ``(expression, descending)`` pairs."""
+    clauses = []
+    for expression, descending in order:
+        clause = expression.desc() if descending else expression.asc()
+        clauses.append(clause.nulls_last() if nullable(expression) else clause)
+    return clauses
+
+
+def _after(expression, descending, value):
+    """Rows whose ``expression`` sorts strictly after ``value`` (NULLs last)."""
+    if value is None:
+        return false()
+    step = expression < value if descending else expression > value
+    return or_(step, expression.is_(None)) if nullable(expression) else step
+
+
+def _same(expression, value):
+    return expression.is_(None) if value is None else expression == value
+
+
+def keyset_filter(order, values):
+    """Predicate selecting rows strictly after ``values`` in ``order``."""
+    directions = {descending for _, descending in order}
+    if len(directions) == 1 and not any(nullable(expression) for expression, _ in order):
+        # Uniform direction: a single row-value comparison the planner can
+        # turn into one index range scan.
+        columns = tuple_(*[expression for expression, _ in order])
+        bound = tuple_(*[literal(value, expression.type) for (expression, _), value in zip(order, values)])
+        if directions.pop():
+            return columns < bound
+        return columns > bound
+
+    # Mixed directions or nullable columns: (a > x) OR (a = x AND b < y) OR ...
+    clauses = []
+    for i, (expression, descending) in enumerate(order):
+        equal_prefix = [_same(order[j][0], values[j]) for j in range(i)]
+        clauses.append(and_(*equal_prefix, _after(expression, descending, values[i])))
+    return or_(*clauses)
+
+
+def keyset_paginate(query, order, cursor=None, per_page=20, key='default', with_total=False):
+    """Fetch one page of ``query`` ordered by ``order``.
+
+    ``order`` is a list of ``(expression, descending)`` pairs whose last entry
+    must be unique (normally the primary key) so every row has a distinct
+    position. ``key`` names the sort order and is embedded in the cursor so a
+    cursor cannot be replayed against a different ordering. The exact total is
+    only computed when ``with_total`` is set, since it needs a full count.
+    """
+    expressions = [expression for expression, _ in order]
+    total = query.order_by(None).count() if with_total else None
+
+    query = query.order_by(None).order_by(*order_by_clauses(order))
+    if cursor:
+        query = query.filter(keyset_filter(order, decode_cursor(cursor, key, len(order))))
+
+    rows = query.add_columns(*expressions).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(key, list(rows[-1][1:]))
+
+    return KeysetPage([row[0] for row in rows], next_cursor, total)
+
+
+def cursor_requested(args):
+    """Cursor mode is opt-in: any ``cursor`` argument (even empty) enables it."""
+    return 'cursor' in args
+
+
+def total_requested(args):
+    return args.get('with_total', '').lower() in ('1', 'true', 'yes')
@@ -0,0 +1,93 @@
+"""Incremental review aggregates.
+
+Adding a review bumps the product's row in ``product_rating_stats`` (count,
+sum and per-star histogram) with a single atomic upsert, then derives
+``products.rating`` and ``products.reviews_count`` from that row in SQL. The
+cost no longer depends on how many reviews a product has, and concurrent
+reviews serialize on the stats row instead of overwriting each other's
+averages.
+"""
+from collections import defaultdict
+
+from sqlalchemy import func, literal_column, or_, select, text, update
+
+from src.database import db
+from src.models.product import Product, ProductRatingStats, ProductReview
+from src.utils.cache import mark_catalog_changed
+from src.utils.counters import increment
+
+_stats = ProductRatingStats.__table__
+_products = Product.__table__
+
+
+def _sync_product_columns(connection, product_ids=None):
+    """Copy the aggregates onto ``products.rating`` / ``products.reviews_count``."""
+    # The 1.0 literal keeps the division fractional on SQLite and NUMERIC
+    # (hence roundable to one decimal) on PostgreSQL.
+    average = (
+        select(func.round(_stats.c.rating_sum * literal_column('1.0') / _stats.c.rating_count, 1))
+        .where(_stats.c.product_id == _products.c.id, _stats.c.rating_count > 0)
+        .scalar_subquery()
+    )
+    count = select(_stats.c.rating_count).where(_stats.c.product_id == _products.c.id).scalar_subquery()
+    statement = update(_products).values(rating=func.coalesce(average, 0.0), reviews_count=count)
+    if product_ids is None:
+        statement = statement.where(_products.c.id.in_(select(_stats.c.product_id)))
+    else:
+        statement = statement.where(_products.c.id.in_(product_ids))
+    connection.execute(statement)
+    if product_ids is None:
+        # Products without a stats row have no reviews (any more)
+        connection.execute(
+            update(_products)
+            .where(_products.c.id.not_in(select(_stats.c.product_id)))
+            .where(or_(
+                _products.c.rating.is_(None), _products.c.rating != 0,
+                _products.c.reviews_count.is_(None), _products.c.reviews_count != 0
+            ))
+            .values(rating=0.0, reviews_count=0)
+        )
+
+
+def record_review(session, product_id, rating):
+    """Fold one new review into the product's aggregates, in the session's transaction."""
+    connection = session.connection()
+    increment(connection, _stats, {'product_id': product_id}, {
+        'rating_count': 1,
+        'rating_sum': rating,
+        f'stars_{rating}': 1,
+    })
+    _sync_product_columns(connection, [product_id])
+
+
+def rebuild_review_stats():
+    """Recompute every product's aggregates from its reviews (repair tool)."""
+    rows = db.session.query(
+        ProductReview.product_id,
+        ProductReview.rating,
+        func.count(ProductReview.id)
+    ).group_by(ProductReview.product_id, ProductReview.rating).all()
+
+    stats = defaultdict(lambda: {'rating_count': 0, 'rating_sum': 0, **{f'stars_{n}': 0 for n in range(1, 6)}})
+    for product_id, rating, count in rows:
+        entry = stats[product_id]
+        entry['rating_count'] += count
+        entry['rating_sum'] += rating * count
+        if 1 <= rating <= 5:
+            entry[f'stars_{rating}'] += count
+
+    connection = db.session.connection()
+    connection.execute(_stats.delete())
+    if stats:
+        connection.execute(_stats.insert(), [{'product_id': product_id, **entry} for product_id, entry in stats.items()])
+    _sync_product_columns(connection)
+    mark_catalog_changed(db.session)
+    db.session.commit()
+    return len(stats)
+
+
+def init_review_stats():
+    """Populate the stats table on first start against existing reviews."""
+    if db.session.execute(text("SELECT 1 FROM product_rating_stats LIMIT 1")).first() is None:
+        if db.session.execute(text("SELECT 1 FROM product_reviews LIMIT 1")).first() is not None:
+            rebuild_review_stats()
@@ -0,0 +1,231 @@
+"""Incrementally maintained sales rollups for the admin dashboard.
+
+Every flush that creates, updates or deletes an ``Order`` takes the order's
+old contribution out of the rollups and adds its new one, in the same
+transaction:
+
+* ``sales_daily``: order count and revenue per creation day and status, so a
+  status change moves the order from one bucket to another;
+* ``sales_product_daily``: units and revenue per product and day, counting
+  every order that is not cancelled.
+
+``/api/admin/stats`` then reads a few hundred rollup rows instead of scanning
+orders and parsing their ``items`` JSON. Days are UTC dates. Bulk
+``Query.update()`` calls bypass the ORM and are not tracked; run
+``flask rebuild-sales-stats`` after those.
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session
+
+from src.database import db
+from src.models.order import Order
+from src.models.product import Product
+from src.models.sales import DailySales, ProductDailySales
+from src.utils.counters import increment, original_value
+
+CANCELLED_STATUS = 'Annulée'
+TRACKED_ATTRIBUTES = ('status', 'total_amount', 'items', 'created_at')
+REBUILD_BATCH_SIZE = 1000
+
+_daily = DailySales.__table__
+_product_daily = ProductDailySales.__table__
+
+
+def order_day(created_at):
+    """UTC date an order is bucketed under."""
+    if created_at is None:
+        # Not yet known: created_at is filled in by the database default
+        return datetime.utcnow().date()
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def order_lines(items):
+    """``(product_id, units, revenue)`` for each line of an order's ``items`` JSON.
+
+    Understands both the ``{id, quantity, price}`` lines written by checkout
+    and the older ``{product_id, qty, subtotal}`` ones.
+    """
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    lines = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        product_id = item.get('id', item.get('product_id'))
+        units = item.get('quantity', item.get('qty')) or 0
+        if product_id is None or not units:
+            continue
+        revenue = item.get('subtotal')
+        if revenue is None:
+            revenue = (item.get('price') or item.get('price_at_purchase') or 0) * units
+        lines.append((product_id, units, revenue))
+    return lines
+
+
+class _Deltas:
+    def __init__(self):
+        self.daily = Counter()
+        self.products = Counter()
+
+    def add(self, day, status, total_amount, items, sign):
+        self.daily[(day, status, 'order_count')] += sign
+        self.daily[(day, status, 'revenue')] += sign * (total_amount or 0)
+        if status == CANCELLED_STATUS:
+            return
+        for product_id, units, revenue in order_lines(items):
+            self.products[(day, product_id, 'units')] += sign * units
+            self.products[(day, product_id, 'revenue')] += sign * revenue
+
+    def apply(self, connection):
+        for table, key_names, deltas in (
+            (_daily, ('day', 'status'), self.daily),
+            (_product_daily, ('day', 'product_id'), self.products),
+        ):
+            rows = {}
+            for (*key, column), delta in deltas.items():
+                if delta:
+                    rows.setdefault(tuple(key), {})[column] = delta
+            for key, values in rows.items():
+                increment(connection, table, dict(zip(key_names, key)), values)
+
+
+def _original_contribution(obj):
+    return (
+        order_day(original_value(obj, 'created_at')),
+        original_value(obj, 'status'),
+        original_value(obj, 'total_amount'),
+        original_value(obj, 'items'),
+    )
+
+
+@event.listens_for(Session, 'after_flush')
+def _maintain_sales_stats(session, flush_context):
+    deltas = _Deltas()
+    for obj in session.new:
+        if isinstance(obj, Order):
+            deltas.add(order_day(obj.created_at), obj.status, obj.total_amount, obj.items, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Order):
+            deltas.add(*_original_contribution(obj), -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Order) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in TRACKED_ATTRIBUTES):
+            continue
+        deltas.add(*_original_contribution(obj), -1)
+        deltas.add(order_day(obj.created_at), obj.status, obj.total_amount, obj.items, 1)
+
+    if deltas.daily or deltas.products:
+        deltas.apply(session.connection())
+
+
+def rebuild_sales_stats():
+    """Recompute every rollup from the orders table (repair tool); returns the number of orders."""
+    daily = Counter()
+    products = Counter()
+    count = 0
+    rows = db.session.execute(
+        select(Order.created_at, Order.status, Order.total_amount, Order.items),
+        execution_options={'yield_per': REBUILD_BATCH_SIZE}
+    )
+    for created_at, status, total_amount, items in rows:
+        day = order_day(created_at)
+        daily[(day, status, 'order_count')] += 1
+        daily[(day, status, 'revenue')] += total_amount or 0
+        if status != CANCELLED_STATUS:
+            for product_id, units, revenue in order_lines(items):
+                products[(day, product_id, 'units')] += units
+                products[(day, product_id, 'revenue')] += revenue
+        count += 1
+
+    connection = db.session.connection()
+    connection.execute(_daily.delete())
+    connection.execute(_product_daily.delete())
+    daily_rows = {}
+    for (day, status, column), value in daily.items():
+        daily_rows.setdefault((day, status), {'day': day, 'status': status})[column] = value
+    product_rows = {}
+    for (day, product_id, column), value in products.items():
+        product_rows.setdefault((day, product_id), {'day': day, 'product_id': product_id})[column] = value
+    if daily_rows:
+        connection.execute(_daily.insert(), list(daily_rows.values()))
+    if product_rows:
+        connection.execute(_product_daily.insert(), list(product_rows.values()))
+    db.session.commit()
+    return count
+
+
+def init_sales_stats():
+    """Populate the rollups on first start against existing orders."""
+    if db.session.execute(text("SELECT 1 FROM sales_daily LIMIT 1")).first() is None:
+        rebuild_sales_stats()
+
+
+def sales_summary(date_from, date_to, top_products=10):
+    """Dashboard figures for the inclusive UTC day range, read from the rollups."""
+    in_range = (_daily.c.day >= date_from, _daily.c.day <= date_to)
+    by_day_status = db.session.execute(
+        select(_daily.c.day, _daily.c.status, _daily.c.order_count, _daily.c.revenue)
+        .where(*in_range)
+        .order_by(_daily.c.day)
+    ).all()
+
+    by_status = {}
+    days = {}
+    for day, status, order_count, revenue in by_day_status:
+        if not order_count:
+            continue
+        entry = by_status.setdefault(status, {'orders': 0, 'revenue': 0.0})
+        entry['orders'] += order_count
+        entry['revenue'] += revenue
+        if status != CANCELLED_STATUS:
+            entry = days.setdefault(day, {'date': day.isoformat(), 'orders': 0, 'revenue': 0.0})
+            entry['orders'] += order_count
+            entry['revenue'] += revenue
+
+    units = func.sum(_product_daily.c.units).label('units')
+    revenue = func.sum(_product_daily.c.revenue).label('revenue')
+    top = db.session.execute(
+        select(_product_daily.c.product_id, Product.name, units, revenue)
+        .select_from(_product_daily)
+        .outerjoin(Product, Product.id == _product_daily.c.product_id)
+        .where(_product_daily.c.day >= date_from, _product_daily.c.day <= date_to)
+        .group_by(_product_daily.c.product_id, Product.name)
+        .having(units > 0)
+        .order_by(revenue.desc(), _product_daily.c.product_id)
+        .limit(top_products)
+    ).all()
+
+    sold = [entry for status, entry in by_status.items() if status != CANCELLED_STATUS]
+    return {
+        'date_from': date_from.isoformat(),
+        'date_to': date_to.isoformat(),
+        'orders': sum(entry['orders'] for entry in sold),
+        'revenue': round(sum(entry['revenue'] for entry in sold), 2),
+        'by_status': {
+            status: {'orders': entry['orders'], 'revenue': round(entry['revenue'], 2)}
+            for status, entry in by_status.items()
+        },
+        'daily': [
+            {**entry, 'revenue': round(entry['revenue'], 2)} for entry in days.values()
+        ],
+        'top_products': [
+            {'product_id': product_id, 'name': name, 'units': units, 'revenue': round(revenue, 2)}
+            for product_id, name, units, revenue in top
+        ],
+    }
+
+
+def default_range(days=30):
+    """The last ``days`` UTC days, today included."""
+    today = datetime.utcnow().date()
+    return today - timedelta(days=days - 1), today
+
@@ -0,0 +1,156 @@
+"""Full-text product search.
+
+PostgreSQL matches against a weighted ``tsvector`` expression backed by a GIN
+index; SQLite uses an FTS5 external-content table kept in sync with
+``products`` by triggers, so every write (admin CRUD, seed scripts, raw SQL)
+is indexed without application code having to remember it. Any other backend
+falls back to the original ILIKE scan.
+"""
+import re
+
+from flask import current_app
+from sqlalchemy import Float, Integer, Numeric, cast, column, func, literal, literal_column, or_, text
+
+from src.database import db
+from src.models.product import Product
+
+SEARCH_CONFIG = 'simple'
+MAX_SEARCH_TOKENS = 8
+# Relevance is rounded in SQL, so a rank read back from a pagination cursor
+# compares equal to the same rank computed again.
+RELEVANCE_DIGITS = 6
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Name matches weigh more than the short description, which weighs more than the body.
+_PG_VECTOR = (
+    "setweight(to_tsvector('{cfg}', coalesce({t}name, '')), 'A') || "
+    "setweight(to_tsvector('{cfg}', coalesce({t}short_description, '')), 'B') || "
+    "setweight(to_tsvector('{cfg}', coalesce({t}description, '')), 'C')"
+)
+
+_PG_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_products_search ON products "
+    f"USING GIN (({_PG_VECTOR.format(cfg=SEARCH_CONFIG, t='')}))",
+]
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, short_description, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, short_description, description)
+        VALUES (new.id, new.name, new.short_description, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, short_description, description)
+        VALUES ('delete', old.id, old.name, old.short_description, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au
+    AFTER UPDATE OF name, short_description, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, short_description, description)
+        VALUES ('delete', old.id, old.name, old.short_description, old.description);
+        INSERT INTO products_fts(rowid, name, short_description, description)
+        VALUES (new.id, new.name, new.short_description, new.description);
+    END""",
+]
+
+# bm25() column weights, in the FTS5 column order above.
+_SQLITE_MATCHES = text(
+    "SELECT rowid, bm25(products_fts, 10.0, 4.0, 1.0) AS score "
+    "FROM products_fts WHERE products_fts MATCH :match"
+).columns(column('rowid', Integer), column('score', Float))
+
+
+def search_tokens(term):
+    """Split a raw search string into lower-cased word tokens."""
+    return _TOKEN_RE.findall(term.lower())[:MAX_SEARCH_TOKENS]
+
+
+def init_search_index():
+    """Create the search index for the current database if it is missing.
+
+    Safe to call on every start-up. Records the backend in use in
+    ``SEARCH_BACKEND`` so queries know which strategy to apply.
+    """
+    dialect = db.engine.dialect.name
+    backend = 'like'
+    try:
+        if dialect == 'postgresql':
+            with db.engine.begin() as conn:
+                for statement in _PG_DDL:
+                    conn.execute(text(statement))
+            backend = 'tsvector'
+        elif dialect == 'sqlite':
+            with db.engine.begin() as conn:
+                existed = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+                )).first() is not None
+                for statement in _SQLITE_DDL:
+                    conn.execute(text(statement))
+                if not existed:
+                    # Index products that were there before the FTS table.
+                    conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+            backend = 'fts5'
+    except Exception as e:
+        current_app.logger.warning(f"Full-text search unavailable, falling back to LIKE: {e}")
+    current_app.config['SEARCH_BACKEND'] = backend
+    return backend
+
+
+def rebuild_search_index():
+    """Rebuild the search index from the products table (repair tool)."""
+    backend = init_search_index()
+    with db.engine.begin() as conn:
+        if backend == 'fts5':
+            conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        elif backend == 'tsvector':
+            conn.execute(text("REINDEX INDEX ix_products_search"))
+    return backend
+
+
+def _rounded(relevance):
+    return cast(func.round(cast(relevance, Numeric), RELEVANCE_DIGITS), Float)
+
+
+def apply_search(query, term):
+    """Restrict a ``Product`` query to rows matching ``term``.
+
+    Returns ``(query, relevance)`` where ``relevance`` is an SQL expression
+    that is higher for better matches, or ``None`` when the term has no
+    searchable words (the query is then returned unchanged).
+    """
+    tokens = search_tokens(term)
+    if not tokens:
+        return query, None
+
+    backend = current_app.config.get('SEARCH_BACKEND', 'like')
+
+    if backend == 'tsvector':
+        # Every word must match; the last one as a prefix for search-as-you-type.
+        tsquery = func.to_tsquery(
+            literal_column(f"'{SEARCH_CONFIG}'"),
+            ' & '.join(tokens[:-1] + [f"{tokens[-1]}:*"])
+        )
+        vector = literal_column(_PG_VECTOR.format(cfg=SEARCH_CONFIG, t='products.'))
+        query = query.filter(vector.op('@@')(tsquery))
+        return query, _rounded(func.ts_rank(vector, tsquery))
+
+    if backend == 'fts5':
+        match = ' '.join(f'"{token}"' for token in tokens) + '*'
+        matches = _SQLITE_MATCHES.bindparams(match=match).subquery('product_matches')
+        query = query.join(matches, Product.id == matches.c.rowid)
+        # bm25() is lower for better matches.
+        return query, _rounded(-matches.c.score)
+
+    search_term = f"%{term}%"
+    query = query.filter(
+        or_(
+            Product.name.ilike(search_term),
+            Product.description.ilike(search_term),
+            Product.short_description.ilike(search_term)
+        )
+    )
+    return query, literal(0)
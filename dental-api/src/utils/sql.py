@@ -0,0 +1,33 @@
+"""Portable SQL constructs shared by models and queries."""
+from sqlalchemy import String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+
+class spec_value(FunctionElement):
+    """Text value of ``key`` inside a JSON column.
+
+    Unlike ``column[key].as_string()``, the key is rendered inline rather than
+    as a bound parameter, so the expression in a ``WHERE`` clause is identical
+    to the one in an expression index and the planner can use that index.
+    Only pass trusted, hard-coded keys.
+    """
+    type = String()
+    name = 'spec_value'
+    inherit_cache = True
+    _traverse_internals = FunctionElement._traverse_internals + [('key', InternalTraversal.dp_string)]
+
+    def __init__(self, column, key):
+        self.key = key
+        super().__init__(column)
+
+
+@compiles(spec_value)
+def _compile_spec_value(element, compiler, **kw):
+    return "json_extract(%s, '$.\"%s\"')" % (compiler.process(element.clauses, **kw), element.key)
+
+
+@compiles(spec_value, 'postgresql')
+def _compile_spec_value_postgresql(element, compiler, **kw):
+    return "(%s ->> '%s')" % (compiler.process(element.clauses, **kw), element.key)
@@ -0,0 +1,209 @@
+"""Oversell-safe stock reservation for orders.
+
+Stock is taken with one conditional ``UPDATE`` per product::
+
+    UPDATE products SET stock_quantity = stock_quantity - :qty
+    WHERE id = :id AND is_active AND stock_quantity >= :qty
+
+The database applies the check and the decrement atomically, so concurrent
+checkouts of the same product can never take more than is left, and the row
+is only locked for the rest of the (short) checkout transaction. Products are
+updated in ID order so concurrent multi-line checkouts cannot deadlock. If any
+line cannot be served, ``InsufficientStock`` is raised and the caller rolls the
+whole transaction back: reservations are all or nothing.
+
+Each reservation is recorded in ``stock_reservations``. It stays ``held``
+until the order is confirmed (``committed``) or cancelled, and held stock
+whose order is still pending after ``STOCK_RESERVATION_TTL`` seconds is given
+back by ``release_expired_reservations``: every hold enqueues a
+``stock.release_expired`` background job due when it expires, and ``flask
+release-expired-stock`` does the same on demand.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, select, true, update
+
+from src.database import db
+from src.models.product import Product
+from src.models.stock_reservation import StockReservation
+from src.utils.cache import mark_catalog_changed
+from src.utils.jobs import enqueue, job
+from src.utils.stock_events import stock_changed
+
+DEFAULT_TTL = 48 * 3600
+RELEASE_JOB = 'stock.release_expired'
+
+CANCELLED_STATUS = 'Annulée'
+CONFIRMED_STATUSES = ('Confirmée', 'Expédiée', 'Livrée')
+# The stock of these orders has left: it is neither given back nor held again
+SHIPPED_STATUSES = ('Expédiée', 'Livrée')
+
+_products = Product.__table__
+_reservations = StockReservation.__table__
+
+
+class InsufficientStock(Exception):
+    """Raised when a product cannot cover the requested quantity."""
+
+    def __init__(self, product_id, requested):
+        self.product_id = product_id
+        self.requested = requested
+        super().__init__(f'Insufficient stock for product {product_id}')
+
+
+class OrderAlreadyShipped(Exception):
+    """Raised when a shipped or delivered order would be cancelled or reopened."""
+
+
+def _ttl():
+    return current_app.config.get('STOCK_RESERVATION_TTL', DEFAULT_TTL)
+
+
+def _expiry():
+    return datetime.utcnow() + timedelta(seconds=_ttl())
+
+
+def _schedule_release(session):
+    # Enqueued after the hold's deadline was computed, so it runs once it has passed
+    enqueue(RELEASE_JOB, delay=_ttl(), session=session)
+
+
+def _take(connection, product_id, quantity):
+    result = connection.execute(
+        update(_products)
+        .where(
+            _products.c.id == product_id,
+            _products.c.is_active == true(),
+            _products.c.stock_quantity >= quantity
+        )
+        .values(stock_quantity=_products.c.stock_quantity - quantity)
+    )
+    if result.rowcount != 1:
+        raise InsufficientStock(product_id, quantity)
+
+
+def _give_back(connection, product_id, quantity):
+    connection.execute(
+        update(_products)
+        .where(_products.c.id == product_id)
+        .values(stock_quantity=_products.c.stock_quantity + quantity)
+    )
+
+
+def reserve_stock(session, order_id, quantities):
+    """Take ``{product_id: quantity}`` from stock for ``order_id``.
+
+    Runs in the session's transaction; on ``InsufficientStock`` the caller
+    must roll back so that lines already taken are restored.
+    """
+    connection = session.connection()
+    expires_at = _expiry()
+    for product_id in sorted(quantities):
+        _take(connection, product_id, quantities[product_id])
+    connection.execute(_reservations.insert(), [
+        {
+            'order_id': order_id,
+            'product_id': product_id,
+            'quantity': quantity,
+            'status': StockReservation.HELD,
+            'expires_at': expires_at,
+            'created_at': datetime.utcnow(),
+        }
+        for product_id, quantity in sorted(quantities.items())
+    ])
+    _schedule_release(session)
+    mark_catalog_changed(session)
+    stock_changed(session, set(quantities))
+
+
+def _release(connection, reservations):
+    """Release ``(id, product_id, quantity, status)`` reservations, giving their stock back exactly once."""
+    released = 0
+    # Product order, like reserve_stock, so the two cannot deadlock.
+    for reservation_id, product_id, quantity, from_status in sorted(reservations, key=lambda line: line[1]):
+        # Conditional on the old status: a concurrent sweep or cancellation
+        # that got there first leaves nothing to give back.
+        result = connection.execute(
+            update(_reservations)
+            .where(_reservations.c.id == reservation_id, _reservations.c.status == from_status)
+            .values(status=StockReservation.RELEASED, expires_at=None)
+        )
+        if result.rowcount == 1:
+            _give_back(connection, product_id, quantity)
+            released += 1
+    return released
+
+
+def sync_order_stock(session, order_id, status, previous_status=None):
+    """Bring an order's reservations in line with its new ``status``.
+
+    Cancelling gives all of its stock back. Any other status makes sure the
+    stock is held again (re-reserving lines whose hold expired, which raises
+    ``InsufficientStock`` if it has been sold since); confirmed statuses also
+    stop the hold from expiring. Orders whose ``previous_status`` is shipped
+    or delivered can only move between confirmed statuses
+    (``OrderAlreadyShipped``).
+    """
+    if previous_status in SHIPPED_STATUSES and status not in CONFIRMED_STATUSES:
+        raise OrderAlreadyShipped(f'Order {order_id} has already been shipped')
+    connection = session.connection()
+    rows = connection.execute(
+        select(_reservations.c.id, _reservations.c.product_id, _reservations.c.quantity, _reservations.c.status)
+        .where(_reservations.c.order_id == order_id)
+        .order_by(_reservations.c.product_id)
+    ).all()
+    if not rows:
+        # Orders placed before reservations existed
+        return
+
+    if status == CANCELLED_STATUS:
+        _release(connection, [
+            (row.id, row.product_id, row.quantity, row.status) for row in rows if row.status != StockReservation.RELEASED
+        ])
+    else:
+        target = StockReservation.COMMITTED if status in CONFIRMED_STATUSES else StockReservation.HELD
+        expires_at = None if target == StockReservation.COMMITTED else _expiry()
+        for row in rows:
+            if row.status == StockReservation.RELEASED:
+                _take(connection, row.product_id, row.quantity)
+            connection.execute(
+                update(_reservations)
+                .where(_reservations.c.id == row.id)
+                .values(status=target, expires_at=expires_at)
+            )
+        if target == StockReservation.HELD:
+            _schedule_release(session)
+    mark_catalog_changed(session)
+    stock_changed(session, {row.product_id for row in rows})
+
+
+def release_expired_reservations(limit=None):
+    """Give back the stock of held reservations past their deadline; returns how many.
+
+    Runs in ``db.session``'s transaction; the caller commits.
+    """
+    query = (
+        select(_reservations.c.id, _reservations.c.product_id, _reservations.c.quantity)
+        .where(and_(
+            _reservations.c.status == StockReservation.HELD,
+            _reservations.c.expires_at < datetime.utcnow()
+        ))
+        .order_by(_reservations.c.expires_at)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    rows = db.session.execute(query).all()
+    if not rows:
+        return 0
+    released = _release(db.session.connection(), [
+        (row.id, row.product_id, row.quantity, StockReservation.HELD) for row in rows
+    ])
+    mark_catalog_changed(db.session)
+    stock_changed(db.session, {row.product_id for row in rows})
+    return released
+
+
+@job(RELEASE_JOB)
+def release_expired_job():
+    release_expired_reservations()
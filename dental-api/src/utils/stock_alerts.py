@@ -0,0 +1,244 @@
+"""Low-stock alerts fanned out to every connected admin dashboard.
+
+Alerts are driven by stock change events (see ``src/utils/stock_events.py``)
+rather than by rescanning products on a timer. One producer thread per
+process waits for events, on PostgreSQL by ``LISTEN``ing on the
+``stock_changes`` channel (so writes made by any worker are seen), elsewhere
+through an in-process callback after each commit. For every batch of changed
+products it reads just those rows, works out which crossed
+``STOCK_ALERT_THRESHOLD`` or changed while below it, and publishes the
+result once: the event is serialized a single time and put on every
+subscriber's queue. Nothing is queried while stock does not change, and the
+producer only runs while somebody is subscribed. A full rescan still runs
+when the producer starts and every ``STOCK_ALERT_RESYNC_INTERVAL`` seconds,
+to pick up bulk writes that bypass the hooks (and, without PostgreSQL,
+writes made by other processes).
+
+Each subscriber (one ``/api/admin/stock_alerts`` stream) gets a snapshot of
+the current low-stock products when it connects, then the changes. Its
+queue holds at most ``STOCK_ALERT_QUEUE_SIZE`` events; a client that falls
+that far behind is evicted and told to reconnect (``EventSource`` does so
+automatically, and gets a fresh snapshot). Idle streams get a comment line
+every ``STOCK_ALERT_HEARTBEAT`` seconds so proxies keep them open.
+"""
+import json
+import queue
+import select
+import threading
+import time
+
+from flask import current_app
+
+from src.database import db
+from src.models.product import Product
+from src.utils.stock_events import CHANNEL, add_listener, decode_ids
+
+DEFAULT_THRESHOLD = 10
+DEFAULT_RESYNC_INTERVAL = 300
+# How often an idle producer checks whether anyone is still subscribed
+IDLE_CHECK_INTERVAL = 5
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_HEARTBEAT = 15
+
+HEARTBEAT = ': heartbeat\n\n'
+_EVICTED = object()
+
+
+def sse_message(data):
+    return f"data: {json.dumps(data)}\n\n"
+
+
+class Subscriber:
+    """One connected stream: a bounded queue of serialized events."""
+
+    def __init__(self, queue_size):
+        self.queue = queue.Queue(maxsize=queue_size)
+
+    def offer(self, message):
+        """Queue ``message``; returns False if the subscriber is too far behind."""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            return False
+
+    def evict(self):
+        # Drop the backlog so the eviction notice is the next thing read
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.queue.put_nowait(_EVICTED)
+
+    def messages(self, heartbeat):
+        """Yield SSE chunks until evicted, with heartbeats while idle."""
+        while True:
+            try:
+                message = self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield HEARTBEAT
+                continue
+            if message is _EVICTED:
+                yield sse_message({'type': 'error', 'message': 'Too far behind; reconnect to resynchronize.'})
+                return
+            yield message
+
+
+class StockAlertBroadcaster:
+    def __init__(self, app, threshold=DEFAULT_THRESHOLD, resync_interval=DEFAULT_RESYNC_INTERVAL,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.app = app
+        self.threshold = threshold
+        self.resync_interval = resync_interval
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._low_stock = {}
+        self._lock = threading.Lock()
+        self._producer = None
+        self._pending = set()
+        self._wakeup = threading.Event()
+        add_listener(self.notify)
+
+    def subscribe(self):
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if self._low_stock:
+                subscriber.offer(sse_message({'type': 'low_stock', 'products': list(self._low_stock.values())}))
+            self._subscribers.add(subscriber)
+            if self._producer is None:
+                self._producer = threading.Thread(target=self._produce, name='stock-alerts', daemon=True)
+                self._producer.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, data):
+        """Serialize ``data`` once and queue it for every subscriber, evicting slow ones."""
+        message = sse_message(data)
+        with self._lock:
+            for subscriber in list(self._subscribers):
+                if not subscriber.offer(message):
+                    self._subscribers.discard(subscriber)
+                    subscriber.evict()
+
+    def notify(self, product_ids):
+        """In-process stock change event (see src/utils/stock_events.py)."""
+        with self._lock:
+            if self._producer is None:
+                return
+            self._pending.update(product_ids)
+        self._wakeup.set()
+
+    def _low_stock_entry(self, row):
+        if row is None or not row.is_active or row.stock_quantity is None or row.stock_quantity >= self.threshold:
+            return None
+        return {'id': row.id, 'name': row.name, 'stock_quantity': row.stock_quantity}
+
+    def fetch_products(self, product_ids=None):
+        """``{id: low-stock entry}`` for ``product_ids`` (all low-stock products if ``None``)."""
+        query = db.select(Product.id, Product.name, Product.stock_quantity, Product.is_active)
+        if product_ids is None:
+            query = query.where(Product.is_active == True, Product.stock_quantity < self.threshold)
+        else:
+            query = query.where(Product.id.in_(product_ids))
+        with self.app.app_context():
+            rows = db.session.execute(query).all()
+        return {row.id: self._low_stock_entry(row) for row in rows}
+
+    def refresh(self, current, product_ids=None):
+        """Publish what changed among ``product_ids`` (everything if ``None``) given their ``current`` entries."""
+        changed, cleared = [], []
+        with self._lock:
+            candidates = set(self._low_stock) | set(current) if product_ids is None else product_ids
+            for product_id in candidates:
+                entry = current.get(product_id)
+                if entry is not None:
+                    if self._low_stock.get(product_id) != entry:
+                        self._low_stock[product_id] = entry
+                        changed.append(entry)
+                elif self._low_stock.pop(product_id, None) is not None:
+                    cleared.append({'id': product_id, 'status': 'stock_ok'})
+        if changed:
+            self.publish({'type': 'low_stock', 'products': changed})
+        if cleared:
+            self.publish({'type': 'stock_ok', 'products': cleared})
+
+    def _listen(self):
+        """A ``LISTEN``ing DBAPI connection on PostgreSQL with psycopg2, else ``None``."""
+        with self.app.app_context():
+            engine = db.engine
+        if engine.dialect.name != 'postgresql' or engine.dialect.driver != 'psycopg2':
+            return None
+        connection = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        connection.exec_driver_sql(f'LISTEN {CHANNEL}')
+        return connection
+
+    def _wait_for_changes(self, listener, timeout):
+        """Product IDs changed within ``timeout`` seconds (empty if none)."""
+        if listener is not None:
+            dbapi_connection = listener.connection.dbapi_connection
+            if select.select([dbapi_connection], [], [], timeout)[0]:
+                dbapi_connection.poll()
+            notifications, dbapi_connection.notifies[:] = list(dbapi_connection.notifies), []
+            product_ids = set()
+            for notification in notifications:
+                product_ids |= decode_ids(notification.payload)
+            return product_ids
+        self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        with self._lock:
+            product_ids, self._pending = self._pending, set()
+        return product_ids
+
+    def _produce(self):
+        listener = None
+        try:
+            listener = self._listen()
+            next_resync = 0
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        # Nobody listening: stop, and start from scratch next time
+                        self._producer = None
+                        self._low_stock = {}
+                        self._pending = set()
+                        return
+                try:
+                    if time.monotonic() >= next_resync:
+                        self.refresh(self.fetch_products())
+                        next_resync = time.monotonic() + self.resync_interval
+                    timeout = min(IDLE_CHECK_INTERVAL, max(next_resync - time.monotonic(), 0))
+                    product_ids = self._wait_for_changes(listener, timeout)
+                    if product_ids:
+                        self.refresh(self.fetch_products(product_ids), product_ids)
+                except Exception:
+                    self.app.logger.exception('Stock alerts: failed to read stock levels')
+                    self.publish({'type': 'error', 'message': 'Error querying database for stock levels.'})
+                    # Start over with a full rescan after a pause
+                    next_resync = time.monotonic() + IDLE_CHECK_INTERVAL
+                    time.sleep(IDLE_CHECK_INTERVAL)
+        finally:
+            if listener is not None:
+                listener.close()
+
+
+def init_stock_alerts(app):
+    broadcaster = StockAlertBroadcaster(
+        app,
+        threshold=app.config.get('STOCK_ALERT_THRESHOLD', DEFAULT_THRESHOLD),
+        resync_interval=app.config.get('STOCK_ALERT_RESYNC_INTERVAL', DEFAULT_RESYNC_INTERVAL),
+        queue_size=app.config.get('STOCK_ALERT_QUEUE_SIZE', DEFAULT_QUEUE_SIZE)
+    )
+    app.extensions['stock_alerts'] = broadcaster
+    return broadcaster
+
+
+def get_stock_alerts():
+    return current_app.extensions['stock_alerts']
@@ -0,0 +1,95 @@
+"""Stock change events, captured when products are written.
+
+An ``after_flush`` hook notes every ``Product`` whose stock, active flag or
+name was written (created, updated or deleted through the ORM); Core
+``UPDATE`` statements that bypass the unit of work, like the stock
+reservations in ``src/utils/stock.py``, call ``stock_changed()`` themselves.
+
+On PostgreSQL each change is sent with ``pg_notify`` on the ``stock_changes``
+channel inside the writing transaction, so it is delivered to every
+listening process (every gunicorn worker) when, and only if, the
+transaction commits. Other databases have no such channel: the changed IDs
+are kept on the session and handed to this process's listeners after the
+commit, so other processes only see them at their next full resync.
+"""
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from src.models.product import Product
+
+CHANNEL = 'stock_changes'
+WATCHED_ATTRIBUTES = ('stock_quantity', 'is_active', 'name')
+# NOTIFY payloads are limited to 8000 bytes
+MAX_PAYLOAD = 7000
+
+_listeners = []
+
+
+def add_listener(callback):
+    """Call ``callback(product_ids)`` for stock changes committed in this process (non-PostgreSQL)."""
+    _listeners.append(callback)
+
+
+def remove_listener(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def encode_ids(product_ids):
+    """Comma-separated payloads of at most ``MAX_PAYLOAD`` characters."""
+    payloads, current = [], ''
+    for product_id in sorted(product_ids):
+        part = str(product_id)
+        if current and len(current) + len(part) + 1 > MAX_PAYLOAD:
+            payloads.append(current)
+            current = ''
+        current = f'{current},{part}' if current else part
+    if current:
+        payloads.append(current)
+    return payloads
+
+
+def decode_ids(payload):
+    return {int(part) for part in payload.split(',') if part.isdigit()}
+
+
+def stock_changed(session, product_ids):
+    """Record that ``product_ids``' stock changed in ``session``'s transaction."""
+    if not product_ids:
+        return
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql':
+        for payload in encode_ids(product_ids):
+            connection.execute(select(func.pg_notify(CHANNEL, payload)))
+    else:
+        session.info.setdefault('stock_changed', set()).update(product_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _capture_product_writes(session, flush_context):
+    product_ids = set()
+    for obj in session.new:
+        if isinstance(obj, Product):
+            product_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            product_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Product):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in WATCHED_ATTRIBUTES):
+                product_ids.add(obj.id)
+    stock_changed(session, product_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _deliver_in_process(session):
+    product_ids = session.info.pop('stock_changed', None)
+    if product_ids:
+        for callback in list(_listeners):
+            callback(product_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('stock_changed', None)
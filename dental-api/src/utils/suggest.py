@@ -0,0 +1,278 @@
+"""In-process index for search-as-you-type suggestions.
+
+Active product names and category names are tokenized into a sorted
+vocabulary (prefix lookups by bisection) and a trigram map over that
+vocabulary (typo-tolerant lookups), so ``/api/products/suggest`` never touches
+the database once the index is loaded.
+
+Commits that create, rename, recategorize, (de)activate or delete a
+``Product`` are applied to the index as soon as they land. Like the response
+cache, each gunicorn worker only sees its own commits, so the index is also
+reloaded from the database every ``SUGGEST_INDEX_TTL`` seconds.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from src.database import db
+from src.models.product import Product
+
+DEFAULT_TTL = 300
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+MAX_QUERY_TOKENS = 6
+
+# Share of the query word's trigrams a vocabulary word must contain to count
+# as a (misspelled) match.
+SIMILARITY_THRESHOLD = 0.5
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_INDEXED_ATTRIBUTES = ('name', 'category', 'is_active')
+
+
+def normalize(text):
+    """Lower-case ``text`` and strip accents ("Équipements" -> "equipements")."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def trigrams(word, partial=False):
+    """Padded trigrams of ``word``; a ``partial`` word (still being typed) has no end padding."""
+    padded = f"  {word}" if partial else f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TokenIndex:
+    """Maps words to the documents containing them, with prefix and fuzzy lookup."""
+
+    def __init__(self):
+        self.documents = {}
+        self.postings = {}
+        self.vocabulary = []
+        self.trigram_words = {}
+
+    def add(self, key, text):
+        self.remove(key)
+        words = tuple(dict.fromkeys(tokenize(text)))
+        self.documents[key] = words
+        for word in words:
+            keys = self.postings.get(word)
+            if keys is None:
+                keys = self.postings[word] = set()
+                insort(self.vocabulary, word)
+                for trigram in trigrams(word):
+                    self.trigram_words.setdefault(trigram, set()).add(word)
+            keys.add(key)
+
+    def remove(self, key):
+        for word in self.documents.pop(key, ()):
+            keys = self.postings[word]
+            keys.discard(key)
+            if keys:
+                continue
+            del self.postings[word]
+            del self.vocabulary[bisect_left(self.vocabulary, word)]
+            for trigram in trigrams(word):
+                words = self.trigram_words[trigram]
+                words.discard(word)
+                if not words:
+                    del self.trigram_words[trigram]
+
+    def _word_scores(self, term, partial):
+        """Vocabulary words matching ``term``, scored in (0, 1]."""
+        scores = {}
+
+        start = bisect_left(self.vocabulary, term)
+        for position in range(start, len(self.vocabulary)):
+            word = self.vocabulary[position]
+            if not word.startswith(term):
+                break
+            if word == term:
+                scores[word] = 1.0
+            elif partial:
+                # Shorter completions first: "impl" ranks "implant" above "implantology".
+                scores[word] = 0.75 + 0.2 * len(term) / len(word)
+
+        if len(term) >= 3:
+            wanted = trigrams(term, partial)
+            shared = Counter()
+            for trigram in wanted:
+                shared.update(self.trigram_words.get(trigram, ()))
+            for word, count in shared.items():
+                similarity = count / len(wanted)
+                if count >= 2 and similarity >= SIMILARITY_THRESHOLD and word not in scores:
+                    # Among close words, prefer those with fewer extra trigrams.
+                    overlap = count / (len(wanted) + len(trigrams(word)) - count)
+                    scores[word] = 0.3 * similarity + 0.3 * overlap
+
+        return scores
+
+    def search(self, terms):
+        """``{key: score}`` for documents matching every term (the last one as a prefix)."""
+        matched = None
+        for position, term in enumerate(terms):
+            document_scores = {}
+            for word, score in self._word_scores(term, partial=position == len(terms) - 1).items():
+                for key in self.postings[word]:
+                    if score > document_scores.get(key, 0):
+                        document_scores[key] = score
+            if matched is None:
+                matched = document_scores
+            else:
+                matched = {key: matched[key] + score for key, score in document_scores.items() if key in matched}
+            if not matched:
+                return {}
+        return {key: score / len(terms) for key, score in (matched or {}).items()}
+
+
+class SuggestIndex:
+    """Product and category suggestions, kept in sync with committed writes."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self.loaded_at = None
+        self._replay = None
+
+    def _clear(self):
+        self.products = {}
+        self.product_words = TokenIndex()
+        self.category_counts = Counter()
+        self.category_words = TokenIndex()
+
+    def _put(self, product_id, name, category, is_active):
+        self._discard(product_id)
+        if not is_active:
+            return
+        self.products[product_id] = (name, category, normalize(name))
+        self.product_words.add(product_id, name)
+        if category:
+            self.category_counts[category] += 1
+            if self.category_counts[category] == 1:
+                self.category_words.add(category, f"{category} {Product.category_label(category)}")
+
+    def _discard(self, product_id):
+        previous = self.products.pop(product_id, None)
+        if previous is None:
+            return
+        self.product_words.remove(product_id)
+        category = previous[1]
+        if category:
+            self.category_counts[category] -= 1
+            if not self.category_counts[category]:
+                del self.category_counts[category]
+                self.category_words.remove(category)
+
+    def apply(self, changes):
+        """Apply ``{product_id: (name, category, is_active) or None}``."""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(changes)
+            for product_id, values in changes.items():
+                if values is None:
+                    self._discard(product_id)
+                else:
+                    self._put(product_id, *values)
+
+    def load(self):
+        """Rebuild the index from the active products."""
+        with self._lock:
+            # Commits applied while the rows are read are replayed on top.
+            self._replay = []
+        try:
+            rows = db.session.query(Product.id, Product.name, Product.category).filter(
+                Product.is_active == True
+            ).all()
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._clear()
+            for product_id, name, category in rows:
+                self._put(product_id, name, category, True)
+            for changes in replay:
+                self.apply(changes)
+            self.loaded_at = time.monotonic()
+        return len(rows)
+
+    def ensure_loaded(self, ttl=DEFAULT_TTL):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > ttl:
+            self.load()
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """Top ``limit`` products and categories for the partial query ``query``."""
+        terms = tokenize(query)[:MAX_QUERY_TOKENS]
+        if not terms:
+            return [], []
+        normalized = ' '.join(terms)
+
+        with self._lock:
+            product_scores = self.product_words.search(terms)
+            category_scores = self.category_words.search(terms)
+
+            def product_rank(product_id):
+                name, _, normalized_name = self.products[product_id]
+                score = product_scores[product_id]
+                if normalized_name.startswith(normalized):
+                    score += 0.5
+                return (score, -len(name), normalized_name)
+
+            best = heapq.nlargest(limit, product_scores, key=product_rank)
+            products = [
+                {'id': product_id, 'name': self.products[product_id][0], 'category': self.products[product_id][1]}
+                for product_id in best
+            ]
+            categories = [
+                {'id': category, 'name': Product.category_label(category), 'count': self.category_counts[category]}
+                for category in heapq.nlargest(
+                    limit, category_scores, key=lambda category: (category_scores[category], -len(category))
+                )
+            ]
+        return products, categories
+
+
+suggest_index = SuggestIndex()
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_product_writes(session, flush_context):
+    changes = {}
+    for obj in session.new:
+        if isinstance(obj, Product):
+            changes[obj.id] = (obj.name, obj.category, obj.is_active)
+    for obj in session.dirty:
+        if not isinstance(obj, Product) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if any(state.attrs[name].history.has_changes() for name in _INDEXED_ATTRIBUTES):
+            changes[obj.id] = (obj.name, obj.category, obj.is_active)
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            changes[obj.id] = None
+    if changes:
+        session.info.setdefault('suggest_changes', {}).update(changes)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_product_writes(session):
+    changes = session.info.pop('suggest_changes', None)
+    if changes:
+        suggest_index.apply(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_product_writes(session):
+    session.info.pop('suggest_changes', None)
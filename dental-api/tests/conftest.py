@@ -0,0 +1,70 @@
+"""Test fixtures: the real application against a throwaway SQLite database.
+
+The database is configured through the environment before ``src.main`` is
+imported, so the app starts exactly as in development (``create_all`` plus
+migrations). Every test starts from empty tables and caches. Background job
+workers are disabled; tests run jobs explicitly.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+_database_dir = tempfile.mkdtemp(prefix='dental-api-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ['AUTO_MIGRATE'] = '1'
+os.environ['JOB_WORKERS'] = '0'
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from src.main import app as flask_app
+from src.database import db
+from src.models.product import Product
+
+
+def _reset_database():
+    with flask_app.app_context():
+        db.session.remove()
+        with db.engine.begin() as connection:
+            for table in reversed(db.metadata.sorted_tables):
+                if table.name != 'schema_migrations':
+                    connection.execute(table.delete())
+            if connection.dialect.name == 'sqlite':
+                connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        flask_app.extensions['response_cache'].clear()
+
+
+@pytest.fixture
+def app():
+    _reset_database()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_headers(app):
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'admin'})
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def make_product(app):
+    """Create an active product; keyword arguments override the defaults."""
+    def make(**values):
+        values = {'name': 'Product', 'category': 'consumables', 'price': 10.0, 'stock_quantity': 10, **values}
+        with app.app_context():
+            product = Product(**values)
+            db.session.add(product)
+            db.session.commit()
+            return product.id
+    return make
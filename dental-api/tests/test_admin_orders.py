@@ -0,0 +1,83 @@
+import csv
+import gzip
+import io
+
+from src.database import db
+from src.models.order import Order
+from src.models.user import User
+from src.routes.admin import orders_admin
+
+
+def add_order(app, **values):
+    values = {'customer_name': 'Alice', 'items': [], 'total_amount': 10.0, 'status': 'En attente', **values}
+    with app.app_context():
+        order = Order(**values)
+        db.session.add(order)
+        db.session.commit()
+        return order.id
+
+
+def test_order_list_includes_users(app, client, admin_headers):
+    with app.app_context():
+        user = User(username='alice', email='alice@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    add_order(app, user_id=user_id)
+    add_order(app, customer_name='Guest')
+
+    response = client.get('/api/admin/orders', headers=admin_headers)
+
+    assert response.status_code == 200
+    orders = {order['customer_name']: order for order in response.get_json()['orders']}
+    assert orders['Alice']['user_details'] == {'username': 'alice', 'email': 'alice@example.com'}
+    assert 'user_details' not in orders['Guest']
+
+
+def test_order_list_filters(app, client, admin_headers):
+    add_order(app, customer_name='Alice Martin', total_amount=50.0)
+    add_order(app, customer_name='alicia', status='Annulée', total_amount=5.0)
+    add_order(app, customer_name='Bob', total_amount=80.0)
+
+    def names(query):
+        response = client.get(f'/api/admin/orders?{query}', headers=admin_headers)
+        assert response.status_code == 200
+        return sorted(order['customer_name'] for order in response.get_json()['orders'])
+
+    assert names('customer=ALI') == ['Alice Martin', 'alicia']
+    assert names('status=En%20attente') == ['Alice Martin', 'Bob']
+    assert names('min_amount=10&max_amount=60') == ['Alice Martin']
+    assert client.get('/api/admin/orders?min_amount=abc', headers=admin_headers).status_code == 400
+
+
+def export_rows(body):
+    return list(csv.reader(io.StringIO(body.decode('utf-8'))))
+
+
+def test_csv_export_streams_every_matching_order(app, client, admin_headers, monkeypatch):
+    monkeypatch.setattr(orders_admin, 'EXPORT_BATCH_SIZE', 1)
+    for name in ('Alice', 'Bob', 'Carol'):
+        add_order(app, customer_name=name, items=[{'name': 'Gloves', 'quantity': 2, 'price': 5}])
+    add_order(app, customer_name='Dave', status='Annulée')
+
+    response = client.get('/api/admin/orders/export_csv?status=En attente', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    rows = export_rows(response.get_data())
+    assert rows[0][:2] == ['ID', 'Customer Name']
+    assert [row[1] for row in rows[1:]] == ['Carol', 'Bob', 'Alice']
+    assert rows[1][5] == 'Gloves (Qty: 2, Price: 5 MAD)'
+
+
+def test_csv_export_can_be_gzipped(app, client, admin_headers):
+    add_order(app, customer_name='Alice')
+    plain = client.get('/api/admin/orders/export_csv', headers=admin_headers).get_data()
+
+    response = client.get('/api/admin/orders/export_csv?gzip=1', headers=admin_headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith('orders_export.csv.gz')
+    assert gzip.decompress(response.get_data()) == plain
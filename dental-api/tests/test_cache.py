@@ -0,0 +1,68 @@
+from sqlalchemy import update
+
+from src.database import db
+from src.models.product import Product
+
+
+def price_of(client, product_id):
+    response = client.get(f'/api/products/{product_id}')
+    assert response.status_code == 200
+    return response.get_json()['price']
+
+
+def listed_stock(client):
+    return [product['stock_quantity'] for product in client.get('/api/products').get_json()['products']]
+
+
+def test_responses_are_cached_until_the_catalog_changes(app, client, make_product):
+    product_id = make_product(price=10.0)
+    assert price_of(client, product_id) == 10.0
+
+    with app.app_context():
+        # Core statements bypass the unit of work and are not noticed
+        db.session.execute(update(Product).where(Product.id == product_id).values(price=12.0))
+        db.session.commit()
+    assert price_of(client, product_id) == 10.0
+
+    with app.app_context():
+        db.session.get(Product, product_id).name = 'Renamed'
+        db.session.commit()
+    assert price_of(client, product_id) == 12.0
+
+
+def test_rolled_back_writes_keep_the_cache(app, client, make_product):
+    product_id = make_product(price=10.0)
+    first = client.get(f'/api/products/{product_id}')
+
+    with app.app_context():
+        db.session.get(Product, product_id).price = 99.0
+        db.session.flush()
+        db.session.rollback()
+
+    again = client.get(f'/api/products/{product_id}', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_admin_product_update_invalidates_listings(client, make_product, admin_headers):
+    product_id = make_product(price=10.0)
+    assert price_of(client, product_id) == 10.0
+
+    response = client.put(f'/api/admin/products/{product_id}', json={'price': 15.0}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert price_of(client, product_id) == 15.0
+
+
+def test_checkout_invalidates_stock_levels(client, make_product):
+    product_id = make_product(stock_quantity=3)
+    assert listed_stock(client) == [3]
+
+    response = client.post('/api/orders', json={
+        'cart_items': [{'id': product_id, 'name': 'ignored', 'quantity': 2, 'price': 1}],
+        'total_price': 1,
+        'customer_name': 'Test customer',
+        'whatsapp_message': 'test'
+    })
+
+    assert response.status_code == 201
+    assert listed_stock(client) == [1]
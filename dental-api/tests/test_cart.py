@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import session
+from flask_jwt_extended import create_access_token
+
+from src.utils.cart_store import MemoryCartStore, merge_guest_cart
+
+
+def cart_lines(client, headers=None):
+    response = client.get('/api/cart', headers=headers)
+    assert response.status_code == 200
+    return {item['id']: item['quantity'] for item in response.get_json()['items']}
+
+
+def test_concurrent_adds_to_one_cart_keep_every_line(app, client, make_product):
+    product_ids = [make_product(name=f'Product {number}') for number in range(8)]
+    client.post('/api/cart/add', json={'product_id': product_ids[0], 'quantity': 1})
+    cookie = client.get_cookie('session').value
+
+    def add(product_id):
+        other = app.test_client()
+        other.set_cookie('session', cookie)
+        return other.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1}).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(add, product_ids[1:] * 2))
+
+    assert statuses == [200] * 14
+    assert cart_lines(client) == {product_ids[0]: 1, **{product_id: 2 for product_id in product_ids[1:]}}
+
+
+def test_rejected_add_leaves_the_cart_alone(client, make_product):
+    product_id = make_product(stock_quantity=2)
+    client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 2})
+
+    response = client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1})
+
+    assert response.status_code == 400
+    assert cart_lines(client) == {product_id: 2}
+
+
+def test_sign_in_merges_the_guest_cart_into_the_account(app, client, make_product):
+    gloves, masks = make_product(name='Gloves'), make_product(name='Masks')
+    with app.app_context():
+        headers = {'Authorization': f"Bearer {create_access_token(identity='7')}"}
+    client.post('/api/cart/add', json={'product_id': gloves, 'quantity': 1}, headers=headers)
+    client.post('/api/cart/add', json={'product_id': gloves, 'quantity': 2})
+    client.post('/api/cart/add', json={'product_id': masks, 'quantity': 1})
+    with client.session_transaction() as cookie_session:
+        session_id = cookie_session['session_id']
+
+    with app.test_request_context():
+        session['session_id'] = session_id
+        merge_guest_cart(7)
+
+    assert cart_lines(client, headers) == {gloves: 3, masks: 1}
+    assert cart_lines(client) == {}
+
+
+def test_legacy_cookie_cart_is_moved_server_side(client, make_product):
+    product_id = make_product()
+    with client.session_transaction() as cookie_session:
+        cookie_session['cart_items'] = [{'product_id': product_id, 'quantity': 2}]
+
+    assert cart_lines(client) == {product_id: 2}
+    with client.session_transaction() as cookie_session:
+        assert 'cart_items' not in cookie_session
+    assert cart_lines(client) == {product_id: 2}
+
+
+def test_memory_store_merge_adds_up_quantities():
+    store = MemoryCartStore()
+    store.save('session:a', [{'product_id': 1, 'quantity': 1}, {'product_id': 2, 'quantity': 1}])
+    store.save('user:1', [{'product_id': 1, 'quantity': 2}])
+
+    merged = store.merge('session:a', 'user:1')
+
+    assert merged == store.load('user:1') == [{'product_id': 1, 'quantity': 3}, {'product_id': 2, 'quantity': 1}]
+    assert store.load('session:a') == []
+
+
+def test_bulk_operations_apply_in_order(client, make_product):
+    gloves, masks, bibs = make_product(name='Gloves'), make_product(name='Masks'), make_product(name='Bibs')
+    client.post('/api/cart/add', json={'product_id': gloves, 'quantity': 1})
+
+    response = client.post('/api/cart/bulk', json={'operations': [
+        {'op': 'add', 'product_id': gloves, 'quantity': 2},
+        {'op': 'add', 'product_id': masks},
+        {'op': 'set', 'product_id': bibs, 'quantity': 4},
+        {'op': 'remove', 'product_id': masks},
+    ]})
+
+    assert response.status_code == 200
+    assert response.get_json()['total_items'] == 7
+    assert cart_lines(client) == {gloves: 3, bibs: 4}
+
+
+def test_bulk_operations_are_all_or_nothing(client, make_product):
+    gloves = make_product(name='Gloves')
+    scarce = make_product(name='Scarce', stock_quantity=1)
+    client.post('/api/cart/add', json={'product_id': gloves, 'quantity': 1})
+
+    response = client.post('/api/cart/bulk', json={'operations': [
+        {'op': 'add', 'product_id': gloves, 'quantity': 1},
+        {'op': 'set', 'product_id': scarce, 'quantity': 2},
+        {'op': 'add', 'product_id': 999},
+    ]})
+
+    assert response.status_code == 400
+    assert [(error['index'], error['error']) for error in response.get_json()['details']] == [
+        (1, 'Insufficient stock'), (2, 'Product not found')
+    ]
+    assert cart_lines(client) == {gloves: 1}
+
+
+def test_malformed_bulk_requests_are_rejected(client):
+    assert client.post('/api/cart/bulk', json=['add']).status_code == 400
+    assert client.post('/api/cart/bulk', json={'operations': []}).status_code == 400
+    response = client.post('/api/cart/bulk', json={'operations': [
+        {'op': 'replace', 'product_id': 1}, {'op': 'set', 'product_id': 1, 'quantity': -1},
+    ]})
+    assert [error['index'] for error in response.get_json()['details']] == [0, 1]
@@ -0,0 +1,58 @@
+from src.database import db
+from src.models.product import CategoryStat, Product
+from src.utils.category_stats import rebuild_category_stats
+
+
+def stored_counts(app):
+    with app.app_context():
+        return {row.category: row.active_count for row in CategoryStat.query.all() if row.active_count}
+
+
+def listed_counts(client):
+    return {entry['id']: entry['count'] for entry in client.get('/api/products/categories').get_json()}
+
+
+def test_counts_follow_product_writes(app, client, make_product):
+    make_product(category='consumables')
+    moved = make_product(category='consumables')
+    hidden = make_product(category='instruments')
+    deleted = make_product(category='instruments')
+    make_product(category='equipment', is_active=False)
+    assert listed_counts(client) == {'all': 4, 'consumables': 2, 'instruments': 2}
+
+    with app.app_context():
+        db.session.get(Product, moved).category = 'equipment'
+        db.session.get(Product, hidden).is_active = False
+        db.session.delete(db.session.get(Product, deleted))
+        db.session.commit()
+
+    assert listed_counts(client) == {'all': 2, 'consumables': 1, 'equipment': 1}
+
+
+def test_incremental_counts_match_a_rebuild(app, make_product):
+    for category in ('consumables', 'consumables', 'instruments'):
+        make_product(category=category)
+    with app.app_context():
+        product = Product.query.filter_by(category='instruments').one()
+        product.category, product.is_active = 'equipment', False
+        db.session.commit()
+    incremental = stored_counts(app)
+
+    with app.app_context():
+        rebuild_category_stats()
+
+    assert stored_counts(app) == incremental == {'consumables': 2}
+
+
+def test_rebuild_repairs_bulk_updates(app, client, make_product):
+    make_product(category='consumables')
+    make_product(category='consumables')
+    assert listed_counts(client)['consumables'] == 2
+
+    with app.app_context():
+        # Query.update() bypasses the unit of work, hence the counters
+        Product.query.update({Product.category: 'instruments'})
+        db.session.commit()
+        rebuild_category_stats()
+
+    assert listed_counts(client) == {'all': 2, 'instruments': 2}
@@ -0,0 +1,55 @@
+import gzip
+
+import pytest
+
+from src.utils.compression import ENCODINGS
+
+
+@pytest.fixture
+def catalog(make_product):
+    for number in range(20):
+        make_product(name=f'Product {number}', description='A fairly long description. ' * 5)
+
+
+def test_large_json_is_gzipped_when_accepted(client, catalog):
+    plain = client.get('/api/products')
+    compressed = client.get('/api/products', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in plain.headers
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    assert gzip.decompress(compressed.get_data()) == plain.get_data()
+    assert len(compressed.get_data()) < len(plain.get_data())
+    # Both encodings of the cached body share one (weak) validator
+    assert compressed.headers['ETag'] == plain.headers['ETag']
+    assert compressed.headers['ETag'].startswith('W/')
+
+
+def test_small_bodies_and_unsupported_encodings_are_left_alone(client, catalog):
+    small = client.get('/api/products/categories', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+
+    if 'br' not in ENCODINGS:
+        response = client.get('/api/products', headers={'Accept-Encoding': 'br'})
+        assert 'Content-Encoding' not in response.headers
+
+    refused = client.get('/api/products', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in refused.headers
+
+
+def test_not_modified_responses_have_no_body_to_compress(client, catalog):
+    etag = client.get('/api/products').headers['ETag']
+
+    response = client.get('/api/products', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_uncached_views_are_compressed_too(client, make_product):
+    product_ids = [make_product(name=f'Product {number}') for number in range(30)]
+
+    response = client.post('/api/products/batch', json={'ids': product_ids}, headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(gzip.decompress(response.get_data())) > 1024
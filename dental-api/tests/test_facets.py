@@ -0,0 +1,61 @@
+import pytest
+
+
+def listing(client, query):
+    response = client.get(f'/api/products?{query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def names(client, query):
+    return sorted(product['name'] for product in listing(client, query)['products'])
+
+
+@pytest.fixture
+def catalog(make_product):
+    make_product(name='Nitrile gloves', category='consumables', price=8.0, badge='promo',
+                 specifications={'Material': 'Nitrile', 'Brand': 'Acme'})
+    make_product(name='Latex gloves', category='consumables', price=6.0, stock_quantity=0,
+                 specifications={'Material': 'Latex', 'Brand': 'Acme'})
+    make_product(name='Steel mirror', category='instruments', price=15.0, badge='new',
+                 specifications={'Material': 'Steel', 'Brand': 'Medi'})
+    make_product(name='Chair', category='equipments', price=900.0)
+    make_product(name='Hidden', category='consumables', is_active=False, specifications={'Material': 'Nitrile'})
+
+
+def test_filters(client, catalog):
+    assert names(client, 'category=consumables') == ['Latex gloves', 'Nitrile gloves']
+    assert names(client, 'min_price=7&max_price=20') == ['Nitrile gloves', 'Steel mirror']
+    assert names(client, 'in_stock=false') == ['Latex gloves']
+    assert names(client, 'badge=promo,new') == ['Nitrile gloves', 'Steel mirror']
+    assert names(client, 'spec.material=Nitrile,Steel') == ['Nitrile gloves', 'Steel mirror']
+    assert names(client, 'spec.brand=Acme&in_stock=true') == ['Nitrile gloves']
+
+
+def test_facets_ignore_their_own_filter(client, catalog):
+    facets = listing(client, 'facets=1&category=consumables&spec.material=Nitrile')['facets']
+
+    # Each facet is counted with every filter except its own
+    assert facets['category'] == [{'value': 'consumables', 'count': 1}]
+    assert facets['specifications']['material'] == [
+        {'value': 'Latex', 'count': 1}, {'value': 'Nitrile', 'count': 1}
+    ]
+    assert facets['specifications']['brand'] == [{'value': 'Acme', 'count': 1}]
+    assert facets['in_stock'] == {'true': 1, 'false': 0}
+    assert facets['price'] == {'min': 8.0, 'max': 8.0}
+
+
+def test_facets_without_filters(client, catalog):
+    facets = listing(client, 'facets=true')['facets']
+
+    assert facets['category'] == [
+        {'value': 'consumables', 'count': 2}, {'value': 'equipments', 'count': 1}, {'value': 'instruments', 'count': 1}
+    ]
+    assert facets['badge'] == [{'value': 'new', 'count': 1}, {'value': 'promo', 'count': 1}]
+    assert facets['in_stock'] == {'true': 3, 'false': 1}
+    assert facets['price'] == {'min': 6.0, 'max': 900.0}
+    assert facets['specifications']['origin'] == []
+
+
+def test_malformed_prices_are_rejected(client, catalog):
+    assert client.get('/api/products?min_price=cheap').status_code == 400
@@ -0,0 +1,103 @@
+import hashlib
+import json
+
+import pytest
+from flask import session
+
+from src.database import db
+from src.models.order import Order
+from src.utils.idempotency import _scoped_key, get_idempotency_store
+
+
+@pytest.fixture
+def guest(client, make_product):
+    """A guest client holding a session cookie, and a product to order."""
+    product_id = make_product(stock_quantity=10)
+    assert client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1}).status_code == 200
+    return client, product_id
+
+
+def order_body(product_id, quantity=1):
+    return {
+        'cart_items': [{'id': product_id, 'name': 'ignored', 'quantity': quantity, 'price': 1}],
+        'total_price': 1,
+        'customer_name': 'Guest',
+        'whatsapp_message': 'test'
+    }
+
+
+def order_count(app):
+    with app.app_context():
+        return db.session.query(Order).count()
+
+
+def test_retry_replays_the_first_response(app, guest):
+    client, product_id = guest
+    headers = {'Idempotency-Key': 'order-1'}
+
+    first = client.post('/api/orders', json=order_body(product_id), headers=headers)
+    retry = client.post('/api/orders', json=order_body(product_id), headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert retry.get_json() == first.get_json()
+    assert order_count(app) == 1
+
+
+def test_key_reused_with_another_body_is_rejected(app, guest):
+    client, product_id = guest
+    headers = {'Idempotency-Key': 'order-1'}
+    client.post('/api/orders', json=order_body(product_id), headers=headers)
+
+    response = client.post('/api/orders', json=order_body(product_id, 2), headers=headers)
+
+    assert response.status_code == 422
+    assert order_count(app) == 1
+
+
+def test_retry_during_the_first_attempt_conflicts(app, guest):
+    client, product_id = guest
+    app.config['IDEMPOTENCY_WAIT'] = 0
+    body = json.dumps(order_body(product_id)).encode('utf-8')
+    with client.session_transaction() as cookie_session:
+        session_id = cookie_session['session_id']
+    # Claim the key as an attempt still in progress would
+    with app.test_request_context('/api/orders', method='POST'):
+        session['session_id'] = session_id
+        get_idempotency_store().claim(_scoped_key('order-1'), hashlib.sha256(body).hexdigest())
+
+    try:
+        response = client.post(
+            '/api/orders', data=body, content_type='application/json', headers={'Idempotency-Key': 'order-1'}
+        )
+    finally:
+        app.config['IDEMPOTENCY_WAIT'] = 10
+
+    assert response.status_code == 409
+    assert order_count(app) == 0
+
+
+def test_first_time_guests_can_use_keys(app, client, make_product):
+    product_id = make_product()
+    headers = {'Idempotency-Key': 'order-1'}
+
+    first = client.post('/api/orders', json=order_body(product_id), headers=headers)
+    retry = client.post('/api/orders', json=order_body(product_id), headers=headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert order_count(app) == 1
+
+
+def test_keys_are_scoped_to_the_guest_session(app, guest, make_product):
+    client, product_id = guest
+    other = app.test_client()
+    other.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1})
+    headers = {'Idempotency-Key': 'order-1'}
+
+    client.post('/api/orders', json=order_body(product_id), headers=headers)
+    response = other.post('/api/orders', json=order_body(product_id), headers=headers)
+
+    assert response.status_code == 201
+    assert 'Idempotent-Replayed' not in response.headers
+    assert order_count(app) == 2
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from src.database import db
+from src.models.job import Job
+from src.utils.jobs import _claim_next, _execute, enqueue, job, run_next_job
+
+calls = []
+
+
+@job('test.flaky', max_attempts=2)
+def flaky(fail=True):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError('boom')
+
+
+@pytest.fixture(autouse=True)
+def forget_calls():
+    calls.clear()
+
+
+def add_job(app, **payload):
+    with app.app_context():
+        new_job = enqueue('test.flaky', payload)
+        db.session.commit()
+        return new_job.id
+
+
+def load(app, job_id):
+    with app.app_context():
+        return db.session.get(Job, job_id)
+
+
+def set_job(app, job_id, **values):
+    with app.app_context():
+        db.session.execute(update(Job).where(Job.id == job_id).values(**values))
+        db.session.commit()
+
+
+def test_successful_job_is_done(app):
+    job_id = add_job(app, fail=False)
+
+    with app.app_context():
+        assert run_next_job()
+
+    done = load(app, job_id)
+    assert calls == [False]
+    assert (done.status, done.attempts, done.last_error) == (Job.DONE, 1, None)
+    assert done.finished_at is not None
+
+
+def test_failing_job_is_retried_with_backoff_then_failed(app):
+    job_id = add_job(app)
+    before = datetime.utcnow()
+
+    with app.app_context():
+        run_next_job()
+        assert not run_next_job()  # the retry is not due yet
+
+    retry = load(app, job_id)
+    assert (retry.status, retry.attempts) == (Job.QUEUED, 1)
+    assert retry.run_at > before + timedelta(seconds=5)
+    assert 'boom' in retry.last_error
+    assert retry.finished_at is None
+
+    set_job(app, job_id, run_at=datetime.utcnow())
+    with app.app_context():
+        run_next_job()
+
+    failed = load(app, job_id)
+    assert calls == [True, True]
+    assert (failed.status, failed.attempts) == (Job.FAILED, 2)
+    assert failed.finished_at is not None
+
+
+def test_timed_out_run_is_requeued_and_its_late_result_discarded(app):
+    job_id = add_job(app, fail=False)
+    with app.app_context():
+        first = _claim_next(timeout=60)
+    set_job(app, job_id, started_at=datetime.utcnow() - timedelta(seconds=120))
+
+    with app.app_context():
+        second = _claim_next(timeout=60)
+        assert (second.id, second.attempts) == (job_id, 2)
+        _execute(first)
+
+    assert (load(app, job_id).status, load(app, job_id).attempts) == (Job.RUNNING, 2)
+
+    with app.app_context():
+        _execute(second)
+
+    assert load(app, job_id).status == Job.DONE
+
+
+def test_timing_out_the_last_attempt_fails_the_job(app):
+    job_id = add_job(app)
+    set_job(app, job_id, status=Job.RUNNING, attempts=2, started_at=datetime.utcnow() - timedelta(seconds=120))
+
+    with app.app_context():
+        assert not run_next_job(timeout=60)
+
+    failed = load(app, job_id)
+    assert failed.status == Job.FAILED
+    assert failed.finished_at is not None
+    assert failed.last_error == 'Timed out (worker stopped)'
+
+
+def test_admin_can_list_and_retry_failed_jobs(app, client, admin_headers):
+    job_id = add_job(app)
+    set_job(app, job_id, status=Job.FAILED, attempts=2, finished_at=datetime.utcnow())
+
+    listing = client.get('/api/admin/jobs?status=failed', headers=admin_headers)
+    assert listing.status_code == 200
+    assert [entry['id'] for entry in listing.get_json()['jobs']] == [job_id]
+    listed = listing.get_json()['jobs'][0]
+    assert datetime.fromisoformat(listed['finished_at']) <= datetime.utcnow()
+    assert listed['started_at'] is None
+
+    retried = client.post(f'/api/admin/jobs/{job_id}/retry', headers=admin_headers)
+    assert retried.status_code == 200
+    assert (retried.get_json()['status'], retried.get_json()['attempts']) == (Job.QUEUED, 0)
+    assert client.post(f'/api/admin/jobs/{job_id}/retry', headers=admin_headers).status_code == 409
@@ -0,0 +1,61 @@
+from src.database import db
+from src.models.order_item import OrderItem
+
+
+def order(client, *lines):
+    response = client.post('/api/orders', json={
+        'cart_items': [
+            {'id': product_id, 'name': 'ignored', 'quantity': quantity, 'price': 1}
+            for product_id, quantity in lines
+        ],
+        'total_price': 1,
+        'customer_name': 'Test customer',
+        'whatsapp_message': 'test'
+    })
+    assert response.status_code == 201
+    return response.get_json()['order_id']
+
+
+def test_orders_write_their_lines(app, client, make_product):
+    first = make_product(price=4.0)
+    second = make_product(price=2.5)
+    order_id = order(client, (first, 2), (second, 1))
+
+    with app.app_context():
+        lines = [item.to_dict() for item in db.session.query(OrderItem).filter_by(order_id=order_id)]
+    assert sorted(lines, key=lambda line: line['product_id']) == [
+        {'order_id': order_id, 'product_id': first, 'quantity': 2, 'unit_price': 4.0},
+        {'order_id': order_id, 'product_id': second, 'quantity': 1, 'unit_price': 2.5},
+    ]
+
+
+def test_product_sales_leave_out_cancelled_orders(client, make_product, admin_headers):
+    product_id = make_product(price=3.0)
+    order(client, (product_id, 2))
+    cancelled = order(client, (product_id, 1))
+    order(client, (product_id, 4))
+    client.put(f'/api/admin/orders/{cancelled}/status', json={'status': 'Annulée'}, headers=admin_headers)
+
+    response = client.get(f'/api/admin/products/{product_id}/sales', headers=admin_headers)
+
+    assert response.status_code == 200
+    sales = response.get_json()
+    assert (sales['units_sold'], sales['revenue'], sales['order_count']) == (6, 18.0, 2)
+    assert [line['quantity'] for line in sales['recent_orders']] == [4, 2]
+
+
+def test_backfill_reads_both_item_shapes(app):
+    from src.migrations.versions import v0003_backfill_order_items as backfill
+    from src.models.order import Order
+
+    with app.app_context():
+        db.session.add_all([
+            Order(customer_name='Checkout', total_amount=8.0, items=[{'id': 7, 'quantity': 2, 'price': 4.0}]),
+            Order(customer_name='WhatsApp', total_amount=6.0, items=[{'product_id': 9, 'qty': 3, 'subtotal': 6.0}]),
+        ])
+        db.session.commit()
+        with db.engine.begin() as connection:
+            backfill.upgrade(connection)
+            backfill.upgrade(connection)
+        lines = {(item.product_id, item.quantity, item.unit_price) for item in db.session.query(OrderItem)}
+    assert lines == {(7, 2, 4.0), (9, 3, 2.0)}
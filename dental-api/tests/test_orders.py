@@ -0,0 +1,33 @@
+import pytest
+
+
+def order_body(*cart_items):
+    return {'cart_items': list(cart_items), 'total_price': 1, 'customer_name': 'Test customer', 'whatsapp_message': 'test'}
+
+
+def test_numeric_string_ids_are_accepted(client, make_product):
+    product_id = make_product(name='Gloves', price=4.0)
+
+    response = client.post('/api/orders', json=order_body(
+        {'id': str(product_id), 'name': 'ignored', 'quantity': 2, 'price': 1}
+    ))
+
+    assert response.status_code == 201
+    assert response.get_json()['order_details']['items'] == [
+        {'id': product_id, 'name': 'Gloves', 'quantity': 2, 'price': 4.0}
+    ]
+    assert response.get_json()['order_details']['total_amount'] == 8.0
+
+
+@pytest.mark.parametrize('item', [
+    {'id': 'abc', 'name': 'x', 'quantity': 1, 'price': 1},
+    {'id': None, 'name': 'x', 'quantity': 1, 'price': 1},
+    'not an item',
+    ['id', 'name', 'quantity', 'price'],
+])
+def test_malformed_cart_items_are_rejected(client, make_product, item):
+    make_product()
+
+    response = client.post('/api/orders', json=order_body(item))
+
+    assert response.status_code == 400
@@ -0,0 +1,57 @@
+from src.utils.pagination import encode_cursor
+
+
+def walk(client, query):
+    """Follow ``next_cursor`` from the first page; returns the product ids in order."""
+    ids, cursor = [], ''
+    while True:
+        response = client.get(f'/api/products?{query}&per_page=2&cursor={cursor}')
+        assert response.status_code == 200
+        body = response.get_json()
+        ids += [product['id'] for product in body['products']]
+        if not body['has_next']:
+            return ids
+        cursor = body['next_cursor']
+
+
+def offset_ids(client, query):
+    body = client.get(f'/api/products?{query}&per_page=100').get_json()
+    return [product['id'] for product in body['products']]
+
+
+def test_cursor_pages_match_the_offset_listing(client, make_product):
+    for number in range(5):
+        make_product(name=f'Product {number}', price=10 + number % 2)
+
+    for sort in ('name', 'price-asc', 'price-desc', 'created_at'):
+        assert walk(client, f'sort={sort}') == offset_ids(client, f'sort={sort}')
+
+
+def test_rows_with_null_sort_values_come_last_and_are_not_skipped(client, make_product):
+    unrated = [make_product(name='Unrated', rating=None) for _ in range(3)]
+    good = make_product(name='Good', rating=4.5)
+    better = make_product(name='Better', rating=4.5)
+    fair = make_product(name='Fair', rating=3.0)
+
+    expected = [better, good, fair] + sorted(unrated, reverse=True)
+    assert walk(client, 'sort=rating') == expected
+    assert offset_ids(client, 'sort=rating') == expected
+
+
+def test_relevance_cursor_walks_every_match_once(client, make_product):
+    for number in range(5):
+        make_product(name=f'Composite resin {number}', description='composite ' * number)
+    make_product(name='Gloves')
+
+    ids = walk(client, 'search=composite')
+
+    assert sorted(ids) == sorted(offset_ids(client, 'search=composite'))
+    assert len(ids) == len(set(ids)) == 5
+
+
+def test_invalid_cursors_are_rejected(client, make_product):
+    make_product()
+
+    assert client.get('/api/products?sort=rating&cursor=not-a-cursor').status_code == 400
+    other_sort = encode_cursor('name', ['Product', 1])
+    assert client.get(f'/api/products?sort=rating&cursor={other_sort}').status_code == 400
@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from src.database import db
+from src.models.product import Product
+
+
+@contextmanager
+def recorded_queries(app):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def test_card_view_returns_only_card_fields(app, client, make_product):
+    make_product(description='Long text', specifications={'Material': 'Nitrile'}, stock_quantity=0)
+
+    with recorded_queries(app) as statements:
+        response = client.get('/api/products?view=card')
+
+    product, = response.get_json()['products']
+    assert list(product) == sorted(Product.CARD_FIELDS)
+    assert product['in_stock'] is False
+    listing = next(statement for statement in statements if 'FROM products' in statement and 'LIMIT' in statement)
+    assert 'products.description' not in listing
+    assert 'products.specifications' not in listing
+
+
+def test_fields_projection(client, make_product):
+    product_id = make_product(name='Gloves', price=4.5, stock_quantity=3)
+
+    response = client.get('/api/products?fields=price,name,in_stock,name')
+
+    assert response.get_json()['products'] == [{'id': product_id, 'name': 'Gloves', 'price': 4.5, 'in_stock': True}]
+
+
+def test_unknown_fields_are_rejected(client, make_product):
+    make_product()
+
+    response = client.get('/api/products?fields=name,password_hash')
+
+    assert response.status_code == 400
+    assert 'password_hash' in response.get_json()['error']
+
+
+def test_batch_lookup_keeps_request_order_and_lists_missing_ids(client, make_product):
+    first, second = make_product(name='First'), make_product(name='Second')
+
+    response = client.post('/api/products/batch?view=card', json={'ids': [second, '999', first, second]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [product['name'] for product in body['products']] == ['Second', 'First']
+    assert list(body['products'][0]) == sorted(Product.CARD_FIELDS)
+    assert body['missing'] == [999]
+    assert client.get(f'/api/products?ids={second},{first}').get_json()['products'][0]['name'] == 'Second'
+
+
+def test_batch_lookup_validates_its_body(client):
+    assert client.post('/api/products/batch', json=[1, 2]).status_code == 400
+    assert client.post('/api/products/batch', json={'ids': []}).status_code == 400
+    assert client.post('/api/products/batch', json={'ids': ['one']}).status_code == 400
+    assert client.post('/api/products/batch', json={'ids': list(range(101))}).status_code == 400
+
+
+def test_product_detail_pages_reviews_in_one_query(app, client, make_product):
+    product_id = make_product(name='Gloves')
+    for number, rating in enumerate((5, 4, 4)):
+        client.post(f'/api/products/{product_id}/reviews', json={
+            'author_name': f'Reviewer {number}', 'rating': rating, 'comment': 'ok'
+        })
+
+    with recorded_queries(app) as statements:
+        first = client.get(f'/api/products/{product_id}?reviews_per_page=2').get_json()
+    second = client.get(f'/api/products/{product_id}?reviews_per_page=2&reviews_page=2').get_json()
+
+    assert len(statements) == 1
+    assert first['name'] == 'Gloves'
+    assert [review['author_name'] for review in first['reviews']] == ['Reviewer 2', 'Reviewer 1']
+    assert first['reviews_has_next'] is True
+    assert first['rating_histogram'] == {'1': 0, '2': 0, '3': 0, '4': 2, '5': 1}
+    assert [review['author_name'] for review in second['reviews']] == ['Reviewer 0']
+    assert second['reviews_has_next'] is False
+
+
+def test_product_detail_without_reviews(client, make_product):
+    product_id = make_product()
+
+    body = client.get(f'/api/products/{product_id}').get_json()
+
+    assert body['reviews'] == []
+    assert body['rating_histogram'] == {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0}
+    assert client.get('/api/products/999').status_code == 404
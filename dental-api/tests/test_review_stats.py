@@ -0,0 +1,69 @@
+from src.database import db
+from src.models.product import Product, ProductRatingStats, ProductReview
+from src.utils.review_stats import rebuild_review_stats
+
+
+def review(client, product_id, rating):
+    return client.post(f'/api/products/{product_id}/reviews', json={
+        'author_name': 'Dr. Test', 'rating': rating, 'comment': 'ok'
+    })
+
+
+def aggregates(app, product_id):
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        return product.rating, product.reviews_count
+
+
+def stats_rows(app):
+    with app.app_context():
+        return {
+            row.product_id: (row.rating_count, row.rating_sum, [getattr(row, f'stars_{n}') for n in range(1, 6)])
+            for row in ProductRatingStats.query.all()
+        }
+
+
+def test_reviews_update_the_product_aggregates(app, client, make_product):
+    product_id = make_product()
+    for rating in (5, 4, 4):
+        assert review(client, product_id, rating).status_code == 201
+
+    assert aggregates(app, product_id) == (4.3, 3)
+    assert client.get(f'/api/products/{product_id}').get_json()['rating'] == 4.3
+    assert stats_rows(app) == {product_id: (3, 13, [0, 0, 0, 2, 1])}
+
+
+def test_invalid_ratings_are_not_counted(app, client, make_product):
+    product_id = make_product()
+
+    assert review(client, product_id, 6).status_code == 400
+    assert review(client, product_id, True).status_code == 400
+    assert aggregates(app, product_id) == (0.0, 0)
+
+
+def test_rebuild_matches_the_incremental_aggregates(app, client, make_product):
+    first, second = make_product(), make_product()
+    for product_id, rating in ((first, 5), (first, 2), (second, 3)):
+        review(client, product_id, rating)
+    incremental = stats_rows(app), aggregates(app, first), aggregates(app, second)
+
+    with app.app_context():
+        rebuild_review_stats()
+
+    assert (stats_rows(app), aggregates(app, first), aggregates(app, second)) == incremental
+
+
+def test_rebuild_resets_products_whose_reviews_are_gone(app, client, make_product):
+    reviewed, untouched = make_product(), make_product()
+    review(client, reviewed, 5)
+    review(client, untouched, 4)
+    assert client.get(f'/api/products/{reviewed}').get_json()['reviews_count'] == 1
+
+    with app.app_context():
+        ProductReview.query.filter_by(product_id=reviewed).delete()
+        db.session.commit()
+        rebuild_review_stats()
+
+    assert aggregates(app, reviewed) == (0.0, 0)
+    assert aggregates(app, untouched) == (4.0, 1)
+    assert client.get(f'/api/products/{reviewed}').get_json()['reviews_count'] == 0
@@ -0,0 +1,78 @@
+from datetime import datetime
+
+from src.database import db
+from src.models.order import Order
+from src.models.sales import DailySales, ProductDailySales
+from src.utils.sales_stats import rebuild_sales_stats
+
+
+def add_order(app, **values):
+    values = {
+        'customer_name': 'Alice', 'status': 'En attente', 'total_amount': 20.0,
+        'items': [{'id': 1, 'quantity': 2, 'price': 10.0}], **values
+    }
+    with app.app_context():
+        order = Order(**values)
+        db.session.add(order)
+        db.session.commit()
+        return order.id
+
+
+def rollups(app):
+    with app.app_context():
+        daily = {row.status: (row.order_count, row.revenue) for row in DailySales.query if row.order_count}
+        products = {row.product_id: (row.units, row.revenue) for row in ProductDailySales.query if row.units}
+    return daily, products
+
+
+def test_new_orders_are_counted(app):
+    add_order(app)
+    add_order(app, total_amount=5.0, items=[{'product_id': 2, 'qty': 1, 'subtotal': 5.0}])
+
+    assert rollups(app) == ({'En attente': (2, 25.0)}, {1: (2, 20.0), 2: (1, 5.0)})
+
+
+def test_status_change_after_commit_moves_the_order(app):
+    order_id = add_order(app)
+    with app.app_context():
+        # Loaded and committed: every attribute is expired before the change
+        order = db.session.get(Order, order_id)
+        db.session.commit()
+        order.status = 'Annulée'
+        db.session.commit()
+
+    assert rollups(app) == ({'Annulée': (1, 20.0)}, {})
+
+
+def test_deleting_an_order_takes_it_out(app):
+    order_id = add_order(app)
+    add_order(app, total_amount=10.0, items=[{'id': 1, 'quantity': 1, 'price': 10.0}])
+    with app.app_context():
+        db.session.delete(db.session.get(Order, order_id))
+        db.session.commit()
+
+    assert rollups(app) == ({'En attente': (1, 10.0)}, {1: (1, 10.0)})
+
+
+def test_rebuild_matches_incremental_rollups(app):
+    add_order(app)
+    add_order(app, status='Livrée', total_amount=7.5, items=[{'id': 3, 'quantity': 3, 'price': 2.5}])
+    incremental = rollups(app)
+    with app.app_context():
+        rebuild_sales_stats()
+
+    assert rollups(app) == incremental
+
+
+def test_stats_endpoint(app, client, admin_headers):
+    add_order(app)
+    add_order(app, status='Annulée', total_amount=99.0)
+    today = datetime.utcnow().date().isoformat()
+
+    response = client.get(f'/api/admin/stats?date_from={today}&date_to={today}', headers=admin_headers)
+
+    assert response.status_code == 200
+    stats = response.get_json()
+    assert (stats['orders'], stats['revenue']) == (1, 20.0)
+    assert stats['by_status']['Annulée'] == {'orders': 1, 'revenue': 99.0}
+    assert stats['top_products'][0]['product_id'] == 1
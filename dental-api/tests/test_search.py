@@ -0,0 +1,58 @@
+import pytest
+
+from src.database import db
+from src.models.product import Product
+
+
+def found(client, term, **args):
+    query = '&'.join(f'{name}={value}' for name, value in {'search': term, **args}.items())
+    response = client.get(f'/api/products?{query}')
+    assert response.status_code == 200
+    return [product['name'] for product in response.get_json()['products']]
+
+
+@pytest.fixture
+def catalog(make_product):
+    make_product(name='Composite resin', short_description='Light-cured', description='For anterior fillings')
+    make_product(name='Bonding agent', description='Use before the composite')
+    make_product(name='Nitrile gloves', description='Powder-free, size M')
+    make_product(name='Résine acrylique', description='Pour prothèses')
+    make_product(name='Composite kit', is_active=False)
+
+
+def test_full_text_search_ranks_name_matches_first(app, client, catalog):
+    assert app.config['SEARCH_BACKEND'] == 'fts5'
+
+    assert found(client, 'composite') == ['Composite resin', 'Bonding agent']
+
+
+def test_every_word_must_match_and_the_last_is_a_prefix(client, catalog):
+    assert found(client, 'compo') == ['Composite resin', 'Bonding agent']
+    assert found(client, 'composite fill') == ['Composite resin']
+    assert found(client, 'gloves composite') == []
+
+
+def test_accents_are_ignored(client, catalog):
+    assert found(client, 'resine') == ['Résine acrylique']
+    assert found(client, 'prothese') == ['Résine acrylique']
+
+
+def test_index_follows_product_writes(app, client, catalog):
+    with app.app_context():
+        gloves = Product.query.filter_by(name='Nitrile gloves').one()
+        gloves.name = 'Latex gloves'
+        db.session.commit()
+
+    assert found(client, 'nitrile') == []
+    assert found(client, 'latex') == ['Latex gloves']
+
+
+def test_explicit_sort_overrides_relevance(client, catalog):
+    assert found(client, 'composite', sort='name') == ['Bonding agent', 'Composite resin']
+
+
+def test_like_fallback(app, client, catalog, monkeypatch):
+    monkeypatch.setitem(app.config, 'SEARCH_BACKEND', 'like')
+
+    assert sorted(found(client, 'posit')) == ['Bonding agent', 'Composite resin']
+    assert found(client, 'size M') == ['Nitrile gloves']
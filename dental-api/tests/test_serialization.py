@@ -0,0 +1,54 @@
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+from src.database import db
+from src.models.product import Product
+from src.utils.json_provider import FastJSONProvider, orjson
+
+
+@pytest.mark.parametrize('payload', [
+    {'b': 1, 'a': [True, None, 'text']},
+    {'name': 'Résine composite', 'emoji': '🦷', 'quote': '"\\/\n'},
+    [0.1, 1.5, 1e16, 5e-05, 123456789.125, -0.0, 1e-7],
+    {'created_at': datetime(2024, 1, 31, 12, 30, 5), 'day': date(2024, 1, 31)},
+    {'decimal': Decimal('12.50'), 'uuid': uuid.UUID(int=1)},
+    {'big': 2 ** 70},
+    {2: 'int keys', 1: 'are sorted'},
+])
+def test_fast_provider_matches_flask_byte_for_byte(app, payload):
+    fast, standard = FastJSONProvider(app), DefaultJSONProvider(app)
+
+    assert fast.response(payload).get_data() == standard.response(payload).get_data()
+
+
+def test_orjson_is_used_for_plain_payloads(app):
+    if orjson is None:
+        pytest.skip('orjson is not installed')
+
+    assert FastJSONProvider(app)._fast_dumps({'a': 'é', 'b': 1.5}) == b'{"a":"\\u00e9","b":1.5}'
+
+
+def test_model_serializers_match_the_columns(app, make_product):
+    product_id = make_product(name='Gloves', specifications={'Material': 'Nitrile'}, stock_quantity=0)
+
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        full = product.to_dict()
+        card = product.to_dict(['price', 'id', 'in_stock'])
+        db.session.expire(product)
+        expired = product.to_dict()
+
+    assert list(full) == [
+        'id', 'name', 'description', 'short_description', 'category', 'price', 'original_price', 'rating',
+        'reviews_count', 'stock_quantity', 'is_active', 'badge', 'image_url', 'specifications', 'features',
+        'in_stock', 'created_at', 'updated_at'
+    ]
+    assert full['specifications'] == {'Material': 'Nitrile'}
+    assert full['in_stock'] is False
+    assert datetime.fromisoformat(full['created_at'])
+    assert list(card.items()) == [('id', product_id), ('price', 10.0), ('in_stock', False)]
+    assert expired == full
@@ -0,0 +1,92 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+
+from src.database import db
+from src.models.job import Job
+from src.models.product import Product
+from src.models.stock_reservation import StockReservation
+from src.utils.jobs import run_next_job
+
+
+def order_body(product_id, quantity=1):
+    return {
+        'cart_items': [{'id': product_id, 'name': 'ignored', 'quantity': quantity, 'price': 1}],
+        'total_price': 1,
+        'customer_name': 'Test customer',
+        'whatsapp_message': 'test'
+    }
+
+
+def stock_of(app, product_id):
+    with app.app_context():
+        return db.session.get(Product, product_id).stock_quantity
+
+
+def test_concurrent_orders_never_oversell(app, make_product):
+    product_id = make_product(stock_quantity=5)
+
+    def place(_):
+        return app.test_client().post('/api/orders', json=order_body(product_id)).status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = Counter(pool.map(place, range(20)))
+
+    assert statuses == {201: 5, 409: 15}
+    assert stock_of(app, product_id) == 0
+    with app.app_context():
+        reserved = db.session.query(func.sum(StockReservation.quantity)).scalar()
+    assert reserved == 5
+
+
+def test_multi_line_order_is_all_or_nothing(app, client, make_product):
+    plenty = make_product(name='Plenty', stock_quantity=10)
+    scarce = make_product(name='Scarce', stock_quantity=1)
+    body = order_body(plenty, 2)
+    body['cart_items'].append({'id': scarce, 'name': 'ignored', 'quantity': 2, 'price': 1})
+
+    response = client.post('/api/orders', json=body)
+
+    assert response.status_code == 409
+    assert response.get_json()['product_id'] == scarce
+    assert stock_of(app, plenty) == 10
+    assert stock_of(app, scarce) == 1
+
+
+def test_cancelling_a_pending_order_gives_stock_back(app, client, make_product, admin_headers):
+    product_id = make_product(stock_quantity=3)
+    order_id = client.post('/api/orders', json=order_body(product_id, 2)).get_json()['order_id']
+    assert stock_of(app, product_id) == 1
+
+    response = client.put(f'/api/admin/orders/{order_id}/status', json={'status': 'Annulée'}, headers=admin_headers)
+
+    assert response.status_code == 200
+    assert stock_of(app, product_id) == 3
+
+
+def test_shipped_orders_cannot_be_cancelled(app, client, make_product, admin_headers):
+    product_id = make_product(stock_quantity=3)
+    order_id = client.post('/api/orders', json=order_body(product_id, 2)).get_json()['order_id']
+    for status in ('Confirmée', 'Expédiée'):
+        client.put(f'/api/admin/orders/{order_id}/status', json={'status': status}, headers=admin_headers)
+
+    response = client.put(f'/api/admin/orders/{order_id}/status', json={'status': 'Annulée'}, headers=admin_headers)
+
+    assert response.status_code == 409
+    assert stock_of(app, product_id) == 1
+
+
+def test_expired_holds_are_released_by_their_job(app, client, make_product):
+    product_id = make_product(stock_quantity=3)
+    client.post('/api/orders', json=order_body(product_id, 2))
+    with app.app_context():
+        past = datetime.utcnow() - timedelta(seconds=1)
+        db.session.execute(update(StockReservation).values(expires_at=past))
+        db.session.execute(update(Job).where(Job.name == 'stock.release_expired').values(run_at=past))
+        db.session.commit()
+        while run_next_job():
+            pass
+
+    assert stock_of(app, product_id) == 3
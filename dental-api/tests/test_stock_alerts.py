@@ -0,0 +1,41 @@
+import json
+
+from src.database import db
+from src.models.product import Product
+
+
+def events(response):
+    """The stream's SSE events as dicts, skipping heartbeats."""
+    for chunk in response.iter_encoded():
+        chunk = chunk.decode('utf-8')
+        if chunk.startswith('data: '):
+            yield json.loads(chunk[len('data: '):])
+
+
+def test_stream_sends_the_low_stock_snapshot_then_changes(app, client, make_product, admin_headers, monkeypatch):
+    monkeypatch.setitem(app.config, 'STOCK_ALERT_HEARTBEAT', 1)
+    product_id = make_product(name='Gloves', stock_quantity=3)
+
+    response = client.get('/api/admin/stock_alerts', headers=admin_headers, buffered=False)
+    try:
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        stream = events(response)
+        assert next(stream)['type'] == 'connection_ack'
+        assert next(stream) == {
+            'type': 'low_stock', 'products': [{'id': product_id, 'name': 'Gloves', 'stock_quantity': 3}]
+        }
+
+        with app.app_context():
+            db.session.get(Product, product_id).stock_quantity = 50
+            db.session.commit()
+
+        assert next(stream) == {'type': 'stock_ok', 'products': [{'id': product_id, 'status': 'stock_ok'}]}
+    finally:
+        response.close()
+
+    assert app.extensions['stock_alerts'].subscriber_count() == 0
+
+
+def test_stream_requires_an_admin(client):
+    assert client.get('/api/admin/stock_alerts').status_code == 401
@@ -0,0 +1,51 @@
+import pytest
+
+from src.database import db
+from src.models.product import Product
+from src.utils.suggest import suggest_index
+
+
+@pytest.fixture
+def catalog(app, make_product):
+    ids = {
+        'implant': make_product(name='Implant kit', category='implants'),
+        'implantology': make_product(name='Implantology handbook', category='books'),
+        'gloves': make_product(name='Nitrile gloves', category='consumables'),
+        'hidden': make_product(name='Implant driver', category='implants', is_active=False),
+    }
+    # The index is per process; start from this test's products
+    with app.app_context():
+        suggest_index.load()
+    return ids
+
+
+def suggest(client, query):
+    response = client.get(f'/api/products/suggest?q={query}')
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_prefix_suggestions_rank_shorter_completions_first(client, catalog):
+    body = suggest(client, 'impl')
+
+    assert [product['name'] for product in body['products']] == ['Implant kit', 'Implantology handbook']
+    assert body['categories'] == [{'id': 'implants', 'name': 'Implants', 'count': 1}]
+
+
+def test_misspelled_words_still_match(client, catalog):
+    assert [product['name'] for product in suggest(client, 'nitril glovs')['products']] == ['Nitrile gloves']
+
+
+def test_index_follows_commits(app, client, catalog):
+    with app.app_context():
+        db.session.get(Product, catalog['gloves']).name = 'Latex gloves'
+        db.session.get(Product, catalog['hidden']).is_active = True
+        db.session.commit()
+
+    assert suggest(client, 'nitrile')['products'] == []
+    assert suggest(client, 'latex')['products'][0]['id'] == catalog['gloves']
+    assert {product['id'] for product in suggest(client, 'implant d')['products']} == {catalog['hidden']}
+
+
+def test_empty_query(client, catalog):
+    assert suggest(client, '%20') == {'query': ' ', 'products': [], 'categories': []}